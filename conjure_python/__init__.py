@@ -1,5 +1,11 @@
-from .conjure import is_conjure_available
+from .conjure import is_conjure_available, MemoryLimitExceeded
 from . import essence_types
 from .model import EssenceModel
-from .solution import EssenceSolution, SAT, UNSAT
-from .conjuremagics import load_ipython_extension
+from .solution import EssenceSolution, SolutionIndex, SAT, UNSAT
+from .fingerprint import fingerprint
+from .json_backend import set_json_backend, get_json_backend
+
+def load_ipython_extension(ipython):
+    # IPython is only imported when the extension is loaded, so headless use never pays for it
+    from .conjuremagics import load_ipython_extension as load_conjure_magics
+    load_conjure_magics(ipython)
@@ -0,0 +1,385 @@
+"""
+Benchmark a matrix of models, instances and solver configurations.
+
+    python -m conjure_python.bench models/ --solver minion --solver kissat --timeout 60 --jobs 8 \
+        --output results.jsonl --baseline baseline.jsonl --threshold 1.2
+
+With --generate N, each model is benchmarked on N random instances sampled from its 'given' domains,
+written next to the results file so a later run with the same seed compares the same instances.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from glob import glob
+from os.path import basename, dirname, isdir, join, relpath, splitext
+from shutil import rmtree
+
+from . import json_backend
+from .conjure import MemoryLimitExceeded, aggregate_resources
+from .conjure_cache import file_hash
+from .selection import configuration_key, solver_timed_out
+from .tracing import Tracer, span, submit
+from .tuning import CONFIGURATION_KEYS, apply_configuration, score
+
+MODEL_SUFFIX = '.essence'
+PARAMETER_SUFFIXES = ('.param', '.json')
+# seconds a run may exceed its time limit, for Conjure and Savile Row, before it is cancelled
+TIMEOUT_GRACE = 10
+SOLVED_STATUSES = ['SAT', 'UNSAT']
+
+def discover(directory:str, instances:str|None=None) -> list[tuple[str, str|None]]:
+    """
+    List the (model, instance) pairs of a benchmark directory. Each model is paired with the parameter files
+    of its own directory, or solved without parameters if there are none.
+
+    Args:
+        directory (str): Directory searched recursively for .essence models
+        instances (str, optional): Glob pattern of the parameter files paired with every model, in place of the model directories
+
+    Returns:
+        list[tuple[str, str | None]]: Model path and parameter file path, None for models without parameters
+    """
+    models = sorted(glob(join(directory, '**', f'*{MODEL_SUFFIX}'), recursive=True))
+    pairs = []
+    for model in models:
+        if instances is not None:
+            parameters = sorted(glob(instances, recursive=True))
+        else:
+            parameters = sorted([p for p in glob(join(dirname(model), '*')) if p.endswith(PARAMETER_SUFFIXES)])
+        pairs += [(model, p) for p in parameters] if len(parameters) > 0 else [(model, None)]
+    return pairs
+
+def generate(model_file:str, count:int, seed:int, directory:str) -> list[tuple[str, str]]:
+    """
+    Sample random instances of a model, see EssenceModel.generate_instances.
+
+    Args:
+        model_file (str): Path of the Essence model
+        count (int): Number of instances
+        seed (int): Seed of the first instance
+        directory (str): Directory the parameter files are written to
+
+    Returns:
+        list[tuple[str, str]]: Model path and parameter file path of each instance
+    """
+    from .model import EssenceModel
+    cache_dir = tempfile.mkdtemp(prefix='conjure-bench-')
+    try:
+        model = EssenceModel.from_file(model_file, cache_dir=cache_dir)
+        return [(model_file, path) for path in model.generate_instances(count, seed, directory=directory)]
+    finally:
+        rmtree(cache_dir, ignore_errors=True)
+
+def run(model_file:str, parameter_file:str|None, configuration:dict, timeout:int|None=None, tracer:Tracer|None=None, 
+        memory_limit:int|None=None, cpu_affinity:list[int]|None=None) -> dict:
+    """
+    Solve one model and instance with a solver configuration.
+
+    Args:
+        model_file (str): Path of the Essence model
+        parameter_file (str, optional): Path of the parameter file
+        configuration (dict): Solver configuration, see tuning.CONFIGURATION_KEYS
+        timeout (int, optional): Solver time limit in seconds. The run is cancelled TIMEOUT_GRACE seconds later
+        tracer (Tracer, optional): Tracer recording the steps of the solve
+        memory_limit (int, optional): Memory limit of each process of the solve in megabytes
+        cpu_affinity (list[int], optional): CPUs the solve is pinned to
+
+    Returns:
+        dict: Result with the keys 'model', 'instance', 'instance_key' (hash of the parameter file), 'configuration', 
+            'status' ('SAT', 'UNSAT', 'timeout', 'memout' or 'error'), 'runtime', 'solutions', 'info' (statistics from get_infos), 
+            'resources' (see EssenceModel.get_resources) and 'error'
+    """
+    from .model import EssenceModel
+    result = {'model': model_file, 'instance': parameter_file, 'instance_key': None, 'configuration': configuration, 
+              'status': 'error', 'runtime': None, 'solutions': 0, 'info': None, 'resources': None, 'error': None}
+    cache_dir = tempfile.mkdtemp(prefix='conjure-bench-')
+    timer, model = None, None
+    try:
+        if parameter_file is not None:
+            result['instance_key'] = file_hash(parameter_file)
+        model = EssenceModel.from_file(model_file, cache_dir=join(cache_dir, 'cache'))
+        apply_configuration(model, configuration)
+        model.set_tracer(tracer)
+        model.set_memory_limit(memory_limit)
+        model.set_cpu_affinity(cpu_affinity)
+        if timeout is not None:
+            model.set_time_limit(timeout)
+            timer = threading.Timer(timeout + TIMEOUT_GRACE, model.cancel)
+            timer.start()
+        start = time.perf_counter()
+        try:
+            with span(tracer, 'run', model=model_file, instance=parameter_file, configuration=configuration_key(configuration)):
+                solution = model.solve(parameter_file if parameter_file is not None else {})
+        finally:
+            result['runtime'] = time.perf_counter() - start
+        result['info'] = model.getStats()
+        result['solutions'] = len(solution)
+        result['status'] = 'timeout' if solver_timed_out(result['info']) else solution.state
+    except MemoryLimitExceeded as e:
+        result['status'] = 'memout'
+        result['error'] = str(e)
+    except Exception as e:
+        cancelled = timer is not None and not timer.is_alive()
+        result['status'] = 'timeout' if cancelled else 'error'
+        result['error'] = str(e)
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if model is not None:
+            result['resources'] = model.get_resources()
+        rmtree(cache_dir, ignore_errors=True)
+    return result
+
+def result_key(result:dict) -> tuple[str, str|None, str]:
+    """
+    Get the key identifying the model, instance and configuration of a result. Instances are identified by the hash
+    of their parameter file, so generated instances match between runs whatever directory they were written to.
+
+    Args:
+        result (dict): Benchmark result
+
+    Returns:
+        tuple[str, str | None, str]: Model, instance key and configuration key
+    """
+    # results written before instance keys were recorded fall back to the instance path
+    instance = result.get('instance_key') or result['instance']
+    return result['model'], instance, configuration_key(result['configuration'])
+
+def summarise(results:list[dict]) -> list[dict]:
+    """
+    Summarise the results of each solver configuration.
+
+    Args:
+        results (list[dict]): Benchmark results
+
+    Returns:
+        list[dict]: One row per configuration with the keys 'configuration', 'runs', 'solved', 'timeouts', 'memouts', 'errors',
+            the 'mean', 'median' and 'p90' runtime of the solved runs (None if no run was solved), 'cpu_time' (user and
+            system time of all the runs) and 'max_rss' (peak memory of the largest process in kilobytes)
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault(configuration_key(result['configuration']), []).append(result)
+    rows = []
+    for key, group in groups.items():
+        runtimes = [r['runtime'] for r in group if r['status'] in SOLVED_STATUSES]
+        row = {'configuration': json_backend.loads(key), 'runs': len(group), 'solved': len(runtimes),
+               'timeouts': len([r for r in group if r['status'] == 'timeout']),
+               'memouts': len([r for r in group if r['status'] == 'memout']),
+               'errors': len([r for r in group if r['status'] == 'error'])}
+        for statistic in ['mean', 'median', 'p90']:
+            row[statistic] = score(runtimes, statistic) if len(runtimes) > 0 else None
+        resources = aggregate_resources([r.get('resources') for r in group])
+        row['cpu_time'] = resources['user_time'] + resources['system_time'] if resources is not None else None
+        row['max_rss'] = resources['max_rss'] if resources is not None else None
+        rows.append(row)
+    return rows
+
+def format_table(rows:list[dict]) -> str:
+    """
+    Format the summary rows as a text table.
+
+    Args:
+        rows (list[dict]): Rows returned by summarise
+
+    Returns:
+        str: Aligned table, one line per configuration
+    """
+    header = ['configuration', 'runs', 'solved', 'timeouts', 'memouts', 'errors', 'mean', 'median', 'p90', 'cpu_time', 'max_rss']
+    lines = [header]
+    for row in rows:
+        configuration = ' '.join([f'{k}={v}' for k, v in row['configuration'].items() if v is not None]) or 'default'
+        lines.append([configuration] + [str(row.get(k, 0)) for k in header[1:6]] +
+                     ['-' if row.get(k) is None else f'{row[k]:.3f}' for k in header[6:10]] +
+                     ['-' if row.get('max_rss') is None else str(row['max_rss'])])
+    widths = [max([len(line[i]) for line in lines]) for i in range(len(header))]
+    return '\n'.join(['  '.join([cell.ljust(w) if i == 0 else cell.rjust(w) for i, (cell, w) in enumerate(zip(line, widths))])
+                      for line in lines])
+
+def compare(results:list[dict], baseline:list[dict], threshold:float=1.2) -> list[dict]:
+    """
+    Compare results with a baseline run of the same benchmark. Results missing from the baseline are not compared,
+    see unmatched.
+
+    Args:
+        results (list[dict]): Benchmark results
+        baseline (list[dict]): Baseline results
+        threshold (float, optional): Minimum ratio between the runtime and the baseline runtime to report a slowdown
+
+    Returns:
+        list[dict]: One entry per regression with the keys 'model', 'instance', 'configuration', 'reason'
+            ('slower' or 'unsolved'), 'baseline' and 'runtime'
+    """
+    previous = {result_key(r): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None or before['status'] not in SOLVED_STATUSES:
+            continue
+        entry = {'model': result['model'], 'instance': result['instance'], 'configuration': result['configuration'],
+                 'baseline': before['runtime'], 'runtime': result['runtime']}
+        if result['status'] not in SOLVED_STATUSES:
+            regressions.append({**entry, 'reason': 'unsolved'})
+        elif before['runtime'] > 0 and result['runtime'] / before['runtime'] >= threshold:
+            regressions.append({**entry, 'reason': 'slower'})
+    return regressions
+
+def unmatched(results:list[dict], baseline:list[dict]) -> list[dict]:
+    """
+    Find the results that have no run of the same model, instance and configuration in a baseline, and so are not compared.
+
+    Args:
+        results (list[dict]): Benchmark results
+        baseline (list[dict]): Baseline results
+
+    Returns:
+        list[dict]: Results missing from the baseline, in order
+    """
+    previous = set([result_key(r) for r in baseline])
+    return [result for result in results if result_key(result) not in previous]
+
+def load_results(path:str) -> list[dict]:
+    """
+    Load a JSONL results file.
+
+    Args:
+        path (str): Path of the file
+
+    Returns:
+        list[dict]: Benchmark results
+    """
+    with open(path, 'rb') as f:
+        return [json_backend.loads(line) for line in f if line.strip() != b'']
+
+def parse_configurations(solvers:list[str]|None, configurations_file:str|None) -> list[dict]:
+    """
+    Build the solver configurations from the command line.
+
+    Args:
+        solvers (list[str], optional): Solver names, one configuration each
+        configurations_file (str, optional): JSON file with a list of configurations
+
+    Returns:
+        list[dict]: Solver configurations, the default configuration if none is given
+
+    Raises:
+        Exception: If a configuration has an unknown key
+    """
+    configurations = [{'solver': solver} for solver in solvers or []]
+    if configurations_file is not None:
+        with open(configurations_file, 'rb') as f:
+            configurations += json_backend.load(f)
+    for configuration in configurations:
+        unknown = [key for key in configuration if key not in CONFIGURATION_KEYS]
+        if len(unknown) > 0:
+            raise Exception(f"unknown configuration keys {unknown}. Supported keys are: {CONFIGURATION_KEYS}")
+    return configurations if len(configurations) > 0 else [{}]
+
+def main(argv:list[str]|None=None) -> int:
+    """
+    Run the benchmark command line.
+
+    Args:
+        argv (list[str], optional): Command line arguments, sys.argv by default
+
+    Returns:
+        int: Exit code, 1 if regressions were found against the baseline, 2 for invalid arguments or a baseline
+            with none of the runs
+    """
+    parser = argparse.ArgumentParser(prog='python -m conjure_python.bench', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('directory', help='directory searched recursively for .essence models and their parameter files')
+    parser.add_argument('--instances', help='glob of the parameter files paired with every model')
+    parser.add_argument('--generate', type=int, help='benchmark this many random instances of each model instead of its parameter files')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first random instance')
+    parser.add_argument('--solver', action='append', help='solver to benchmark, can be repeated')
+    parser.add_argument('--configs', help='JSON file with a list of solver configurations')
+    parser.add_argument('--timeout', type=int, help='time limit of each run in seconds')
+    parser.add_argument('--memory-limit', type=int, help='memory limit of each solver process in megabytes')
+    parser.add_argument('--pin', action='store_true', help='pin each run to its own CPU, at most one run per CPU at once')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='number of runs at once')
+    parser.add_argument('--output', default='bench-results.jsonl', help='JSONL results file')
+    parser.add_argument('--baseline', help='JSONL results file of an earlier run to compare with')
+    parser.add_argument('--trace', help='Chrome trace event file of the runs, to open in chrome://tracing or Perfetto')
+    parser.add_argument('--otlp', help='OpenTelemetry JSON file of the runs')
+    parser.add_argument('--threshold', type=float, default=1.2, help='runtime ratio reported as a regression')
+    args = parser.parse_args(argv)
+
+    if not isdir(args.directory):
+        print(f"directory {args.directory} not found", file=sys.stderr)
+        return 2
+    try:
+        configurations = parse_configurations(args.solver, args.configs)
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 2
+    pairs = discover(args.directory, args.instances)
+    if args.generate is not None:
+        instances_dir = splitext(args.output)[0] + '-instances'
+        models = sorted(set([model for model, _ in pairs]))
+        try:
+            pairs = [pair for model in models for pair in
+                     generate(model, args.generate, args.seed, join(instances_dir, splitext(relpath(model, args.directory))[0]))]
+        except Exception as e:
+            print(e, file=sys.stderr)
+            return 2
+    runs = [(model, instance, configuration) for model, instance in pairs for configuration in configurations]
+    print(f"running {len(runs)} benchmarks ({len(pairs)} model/instance pairs, {len(configurations)} configurations)")
+
+    results = []
+    tracer = Tracer() if args.trace is not None or args.otlp is not None else None
+    cpus = Queue()
+    for cpu in sorted(os.sched_getaffinity(0)) if args.pin else []:
+        cpus.put(cpu)
+    def pinned_run(model:str, instance:str|None, configuration:dict) -> dict:
+        cpu = cpus.get() if args.pin else None
+        try:
+            return run(model, instance, configuration, args.timeout, tracer, args.memory_limit, None if cpu is None else [cpu])
+        finally:
+            if cpu is not None:
+                cpus.put(cpu)
+    jobs = min(args.jobs, cpus.qsize()) if args.pin else args.jobs
+    with open(args.output, 'w') as output, ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [submit(executor, tracer, pinned_run, model, instance, configuration) for model, instance, configuration in runs]
+        for future in futures:
+            result = future.result()
+            results.append(result)
+            output.write(json_backend.dumps(result) + '\n')
+            output.flush()
+            name = relpath(result['model'], args.directory) + ('' if result['instance'] is None else f" {basename(result['instance'])}")
+            runtime = '-' if result['runtime'] is None else f"{result['runtime']:.3f}s"
+            print(f"{result['status']:>7} {runtime:>10}  {name}  {configuration_key(result['configuration'])}")
+
+    if tracer is not None and args.trace is not None:
+        tracer.export_chrome(args.trace)
+    if tracer is not None and args.otlp is not None:
+        tracer.export_otlp(args.otlp)
+    print()
+    print(format_table(summarise(results)))
+    if args.baseline is None:
+        return 0
+    baseline = load_results(args.baseline)
+    missing = unmatched(results, baseline)
+    if len(missing) > 0:
+        print()
+        print(f"{len(missing)} of {len(results)} runs not found in {args.baseline}")
+        for result in missing:
+            print(f"{'':>9}  {result['model']} {result['instance'] or ''}  {configuration_key(result['configuration'])}")
+    if len(results) > 0 and len(missing) == len(results):
+        print(f"no run matches {args.baseline}, nothing was compared", file=sys.stderr)
+        return 2
+    regressions = compare(results, baseline, args.threshold)
+    print()
+    print(f"{len(regressions)} regressions against {args.baseline}")
+    for regression in regressions:
+        print(f"{regression['reason']:>9}  {regression['model']} {regression['instance'] or ''}  "
+              f"{configuration_key(regression['configuration'])}  {regression['baseline']:.3f}s -> "
+              f"{'-' if regression['runtime'] is None else format(regression['runtime'], '.3f') + 's'}")
+    return 1 if len(regressions) > 0 else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,109 @@
+import os
+import resource
+import signal
 import subprocess
-from .conjure_cache import Cache
-from os.path import join
+import threading
+import time
+from collections import deque
+from copy import deepcopy
+from queue import Queue
+from shutil import copyfile, rmtree
+from typing import Callable, Iterator
+from .conjure_cache import Cache, file_hash
+from os.path import join, isdir, isfile, abspath
 from os import listdir
-import json
+from hashlib import sha256
+from shlex import quote, split
+from . import json_backend
+from .tracing import Tracer, span
 
 MODEL = 'EssenceModel.essence'
 INSTANCE = 'EssenceInstance.json'
 SOLUTION_DIR = "ConjureSolution"
+SOLUTION_FILE_SUFFIX = ".solution.json"
+# seconds between two scans of the output directory for new solutions
+SOLUTION_POLL_INTERVAL = 0.2
+
+TRANSLATION_DIR_SUFFIX = "-translations"
+REPRESENTATION_DIR_SUFFIX = "-representations"
+CHOSEN_REPRESENTATION = 'chosen.eprime'
+EXISTING_MODEL = 'existing.eprime'
+EPRIME_MODEL = 'model.eprime'
+EPRIME_PARAM = 'instance.eprime-param'
+MINION_MODEL = 'instance.minion'
+SAT_MODEL = 'instance.dimacs'
+SAVILEROW_AUX = 'instance.aux'
+# solver conjure uses when none is given
+DEFAULT_SOLVER = 'minion'
+# solvers whose translated input can be reused, with the Savile Row flags targeting them.
+# the minion or DIMACS input is kept as it is and only the solver runs again, savile row then reads its solution back
+TRANSLATABLE_SOLVERS = {
+    'minion': [],
+    'kissat': ['-sat', '-sat-family', 'kissat', '-satsolver-bin', 'kissat'],
+    'lingeling': ['-sat', '-sat-family', 'lingeling', '-satsolver-bin', 'lingeling'],
+}
+
+# output of conjure --version, looked up once
+_conjure_version = None
+
+# prefixes of conjure solve output lines and the phase they start
+PHASES = [
+    ('Generating models', 'modelling'),
+    ('Savile Row', 'savile row'),
+    ('Running', 'solving'),
+    ('Copying solution', 'translating solutions'),
+]
+
+# messages of processes that ran out of memory: GHC (conjure), the JVM (Savile Row), C and C++ solvers, python
+OUT_OF_MEMORY_MESSAGES = ['out of memory', 'outofmemoryerror', 'memoryerror', 'cannot allocate memory', 'bad_alloc', 
+                          'memory allocation failed', 'memory exhausted', 'could not reserve enough space']
+# signals a process dies of when an allocation fails and is not checked
+OUT_OF_MEMORY_SIGNALS = [signal.SIGABRT, signal.SIGSEGV, signal.SIGBUS, signal.SIGKILL]
+# lines of standard output kept to look for out of memory messages, conjure reports errors of its steps there
+OUTPUT_TAIL = 50
+
+class MemoryLimitExceeded(Exception):
+    """
+    Raised when a solve runs out of the memory allowed by its memory limit.
+
+    Args:
+        message (str): Error output of the process that ran out of memory
+        memory_limit (int): Memory limit of the solve in megabytes
+        resources (dict, optional): Resources used by the solve, see Conjure.get_resources
+    """
+    def __init__(self, message:str, memory_limit:int, resources:dict|None=None) -> None:
+        """
+        Initialize the MemoryLimitExceeded instance.
+
+        Args:
+            message (str): Error output of the process that ran out of memory
+            memory_limit (int): Memory limit of the solve in megabytes
+            resources (dict, optional): Resources used by the solve
+        """
+        super().__init__(f"memory limit of {memory_limit} MB exceeded\n{message}".strip())
+        self.memory_limit = memory_limit
+        self.resources = resources
+
+def _no_resources() -> dict:
+    return {'user_time': 0.0, 'system_time': 0.0, 'max_rss': 0, 'wall_time': 0.0, 'processes': 0}
+
+def aggregate_resources(resources:list[dict|None]) -> dict|None:
+    """
+    Combine the resources used by several solves, e.g. the jobs of a batch.
+
+    Args:
+        resources (list[dict | None]): Resources of each solve, as returned by Conjure.get_resources. None entries are skipped
+
+    Returns:
+        dict | None: Summed 'user_time', 'system_time', 'wall_time' and 'processes', and the largest 'max_rss'. 
+            None if no solve reported its resources
+    """
+    known = [r for r in resources if r is not None]
+    if len(known) == 0:
+        return None
+    total = {key: sum([r.get(key, 0) for r in known]) for key in ['user_time', 'system_time', 'wall_time', 'processes']}
+    total['max_rss'] = max([r.get('max_rss', 0) for r in known])
+    return total
 
 class Conjure:
     """
@@ -15,6 +112,7 @@ class Conjure:
     Args:
         **kwargs: Optional keyword arguments
             cache_dir (str): Custom cache directory path
+            tracer (Tracer): Tracer recording the steps and phases of each solve
     """
     def __init__(self, **kwargs):
         """
@@ -23,30 +121,158 @@ class Conjure:
         Args:
             **kwargs: Optional keyword arguments
                 cache_dir (str): Custom cache directory path
+                tracer (Tracer): Tracer recording the steps and phases of each solve
         """
         self.cache = Cache(cache_dir= kwargs['cache_dir'] if 'cache_dir' in kwargs else None)
+        # translated solver inputs live next to the cache directory, which is emptied by every solve
+        self.translation_dir = self.cache.cache_dir.rstrip(os.sep) + TRANSLATION_DIR_SUFFIX
+        self.representation_dir = self.cache.cache_dir.rstrip(os.sep) + REPRESENTATION_DIR_SUFFIX
+        # model file hash -> declarations dumped by conjure
+        self.__declarations = {}
+        self.__process = None
+        # set by cancel, each solve has its own so a late cancel cannot stop the next solve
+        self.__cancel_token = threading.Event()
+        self.__progress = {'phase': None, 'solutions': 0, 'start': None, 'end': None, 'phases': []}
+        self.tracer: Tracer|None = kwargs.get('tracer')
+        self.__resources = None
+        # limits applied to the processes of the current solve
+        self.__memory_limit = None
+        self.__cpu_affinity = None
 
-    def solve(self, model:str, parameter:str|None=None, *args) -> list[dict]:
+    def solve(self, model:str, parameter:str|dict|None=None, *args, parameter_file:str|None=None, 
+              on_solution:Callable[[dict], None]|None=None, keep_solutions:bool=True, existing_model:str|None=None, 
+              memory_limit:int|None=None, cpu_affinity:list[int]|None=None, 
+              cancel_token:threading.Event|None=None) -> list[dict]:
         """
         Solve a constraint problem using Conjure.
 
         Args:
             model (str): Essence model string
-            parameter (str, optional): Essence instance parameters
+            parameter (str | dict, optional): Essence instance parameters, either as a JSON string or as a JSON-compatible dict.
+                Dicts are streamed to the instance file in chunks
             *args: Additional arguments to pass to Conjure
+            parameter_file (str, optional): Path of an existing parameter file, used in place of parameter without copying it
+            on_solution (Callable[[dict], None], optional): Called with each solution as soon as Conjure writes it, 
+                possibly from a watcher thread. Conjure writes the solutions once the solver has finished, so they are 
+                delivered after the solver ends, not while it searches
+            keep_solutions (bool, optional): If False, solutions are only delivered to on_solution and an empty list is returned
+            existing_model (str, optional): Path of an Essence' model to solve, in place of the one chosen by Conjure's default heuristic
+            memory_limit (int, optional): Address space limit in megabytes of conjure, savilerow and the solver (RLIMIT_AS), 
+                each process being limited on its own
+            cpu_affinity (list[int], optional): CPUs the processes of the solve are pinned to
+            cancel_token (threading.Event, optional): Cancellation token of the solve, set by cancel. A new one is used by 
+                default, callers pass their own to cancel the solve before it reaches Conjure
 
         Returns:
             list[dict]: List of solution dictionaries
 
         Raises:
+            MemoryLimitExceeded: If a process runs out of memory under the memory limit
+            OSError: If the parameters cannot be written to the cache directory
             Exception: If Conjure execution fails
         """
         self.cache.empty()
+        self.__resources = _no_resources()
+        self.__cancel_token = cancel_token if cancel_token is not None else threading.Event()
+        self.__set_limits(memory_limit, cpu_affinity)
         self.cache.create_file(MODEL, model)
-        model_file = join(self.cache.cache_dir, MODEL)
-        if parameter is not None:
+        return self.__solve(join(self.cache.cache_dir, MODEL), parameter, args, parameter_file, on_solution, keep_solutions, existing_model)
+
+    def solve_file(self, model_file:str, parameter_file:str|None=None, *args, parameter:str|dict|None=None, 
+                   on_solution:Callable[[dict], None]|None=None, keep_solutions:bool=True, existing_model:str|None=None, 
+                   memory_limit:int|None=None, cpu_affinity:list[int]|None=None, 
+                   cancel_token:threading.Event|None=None) -> list[dict]:
+        """
+        Solve a constraint problem using Conjure, reading the model and the parameters from existing files.
+        The files are passed to Conjure in place, without copying them.
+
+        Args:
+            model_file (str): Path of the Essence model file
+            parameter_file (str, optional): Path of the parameter file
+            *args: Additional arguments to pass to Conjure
+            parameter (str | dict, optional): Essence instance parameters, used when no parameter file is given
+            on_solution (Callable[[dict], None], optional): Called with each solution as soon as Conjure writes it, 
+                possibly from a watcher thread. Conjure writes the solutions once the solver has finished, so they are 
+                delivered after the solver ends, not while it searches
+            keep_solutions (bool, optional): If False, solutions are only delivered to on_solution and an empty list is returned
+            existing_model (str, optional): Path of an Essence' model to solve, in place of the one chosen by Conjure's default heuristic
+            memory_limit (int, optional): Address space limit in megabytes of conjure, savilerow and the solver (RLIMIT_AS), 
+                each process being limited on its own
+            cpu_affinity (list[int], optional): CPUs the processes of the solve are pinned to
+            cancel_token (threading.Event, optional): Cancellation token of the solve, set by cancel. A new one is used by 
+                default, callers pass their own to cancel the solve before it reaches Conjure
+
+        Returns:
+            list[dict]: List of solution dictionaries
+
+        Raises:
+            MemoryLimitExceeded: If a process runs out of memory under the memory limit
+            OSError: If the parameters cannot be written to the cache directory
+            Exception: If a file is not found or Conjure execution fails
+        """
+        if not isfile(model_file):
+            raise Exception(f"model file {model_file} not found")
+        self.cache.empty()
+        self.__resources = _no_resources()
+        self.__cancel_token = cancel_token if cancel_token is not None else threading.Event()
+        self.__set_limits(memory_limit, cpu_affinity)
+        return self.__solve(quote(abspath(model_file)), parameter, args, parameter_file, on_solution, keep_solutions, existing_model)
+
+    def solve_iter(self, model:str, parameter:str|dict|None=None, *args, parameter_file:str|None=None) -> Iterator[dict]:
+        """
+        Solve a constraint problem using Conjure, yielding each solution as soon as Conjure writes it.
+        Conjure writes the solutions only once the solver has finished, so the first one is not available earlier
+        than with solve, the iterator only saves keeping them all in memory.
+
+        Args:
+            model (str): Essence model string
+            parameter (str | dict, optional): Essence instance parameters
+            *args: Additional arguments to pass to Conjure
+            parameter_file (str, optional): Path of an existing parameter file
+
+        Returns:
+            Iterator[dict]: Solutions, in the order Conjure writes them
+
+        Raises:
+            Exception: If Conjure execution fails
+        """
+        return iterate_callback(lambda on_solution: self.solve(model, parameter, *args, parameter_file=parameter_file, on_solution=on_solution))
+
+    def __solve(self, model_file:str, parameter:str|dict|None, args:tuple, parameter_file:str|None, 
+                on_solution:Callable[[dict], None]|None=None, keep_solutions:bool=True, existing_model:str|None=None) -> list[dict]:
+        """
+        Run conjure solve on a model file and return the solutions.
+
+        Args:
+            model_file (str): Path of the model file, ready to be used in a shell command
+            parameter (str | dict, optional): Essence instance parameters
+            args (tuple): Additional arguments to pass to Conjure
+            parameter_file (str, optional): Path of an existing parameter file
+            on_solution (Callable[[dict], None], optional): Called with each solution as soon as Conjure writes it
+            keep_solutions (bool, optional): If False, solutions are only delivered to on_solution and not returned
+            existing_model (str, optional): Path of an Essence' model to solve, skipping the modelling phase
+
+        Returns:
+            list[dict]: List of solution dictionaries
+
+        Raises:
+            OSError: If the parameters cannot be written to the cache directory
+            Exception: If Conjure execution fails
+        """
+        instance_file = None
+        if parameter_file is not None:
+            if not isfile(parameter_file):
+                raise Exception(f"parameter file {parameter_file} not found")
+            instance_file = quote(abspath(parameter_file))
+        elif isinstance(parameter, dict):
+            with span(self.tracer, 'write parameters'):
+                if not self.cache.create_file_from_chunks(INSTANCE, json_backend.iterdumps(parameter)):
+                    raise OSError(f"could not write parameters to {join(self.cache.cache_dir, INSTANCE)}")
+            instance_file = join(self.cache.cache_dir, INSTANCE)
+        elif parameter is not None:
             self.cache.create_file(INSTANCE, parameter)
             instance_file = join(self.cache.cache_dir, INSTANCE)
+        if instance_file is not None:
             cmd = ['conjure', 
                    'solve', 
                    model_file, 
@@ -61,14 +287,512 @@ class Conjure:
                    '--output-format=json', 
                    '--solutions-in-one-file', 
                    f'--output-directory={join(self.cache.cache_dir, SOLUTION_DIR)}']
+        if on_solution is not None:
+            # one file per solution, so solutions can be read while conjure is still running
+            cmd.remove('--solutions-in-one-file')
+        if existing_model is not None:
+            # conjure only reuses models found in its output directory
+            if not isfile(existing_model):
+                raise Exception(f"model file {existing_model} not found")
+            os.makedirs(join(self.cache.cache_dir, SOLUTION_DIR), exist_ok=True)
+            copyfile(existing_model, join(self.cache.cache_dir, SOLUTION_DIR, EXISTING_MODEL))
+            cmd.append(f'--use-existing-models={EXISTING_MODEL}')
 
         for arg in args:
             cmd.append(str(arg))
 
-        output = subprocess.run(" ".join(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
-        if output.returncode != 0:
-            raise Exception(output.stderr.decode('utf-8'))
-        return self.__load_solution()
+        if on_solution is None:
+            returncode, stderr = self.__run(" ".join(cmd))
+        else:
+            watcher = SolutionWatcher(join(self.cache.cache_dir, SOLUTION_DIR), on_solution, keep_solutions)
+            watcher.start()
+            try:
+                returncode, stderr = self.__run(" ".join(cmd))
+            finally:
+                watcher.stop()
+        if self.__cancel_token.is_set():
+            raise Exception("solve cancelled")
+        if returncode != 0:
+            raise Exception(stderr)
+        if on_solution is not None:
+            return watcher.solutions
+        with span(self.tracer, 'load solutions'):
+            return self.__load_solution()
+
+    def solve_translated(self, model:str|None, parameter:dict|None, solver:str, solver_options:str="", 
+                         model_file:str|None=None, parameter_file:str|None=None, existing_model:str|None=None, 
+                         savilerow_options:str="", memory_limit:int|None=None, cpu_affinity:list[int]|None=None, 
+                         cancel_token:threading.Event|None=None) -> list[dict]:
+        """
+        Solve for a single solution, reusing the solver input translated by an earlier call with the same model, 
+        parameters and solver. The first call translates the model with conjure modelling, conjure refine-param 
+        and Savile Row, and keeps the result. Later calls, e.g. with other seeds or time limits, run only the solver on 
+        the kept input and the translation of its solution.
+
+        Args:
+            model (str, optional): Essence model string, used when no model file is given
+            parameter (dict, optional): Essence instance parameters, used when no parameter file is given
+            solver (str): One of the TRANSLATABLE_SOLVERS
+            solver_options (str, optional): Options passed to the back-end solver
+            model_file (str, optional): Path of the Essence model file
+            parameter_file (str, optional): Path of an existing parameter file
+            existing_model (str, optional): Path of an Essence' model to translate, skipping the modelling phase
+            savilerow_options (str, optional): Options passed to Savile Row
+            memory_limit (int, optional): Address space limit in megabytes of each process (RLIMIT_AS)
+            cpu_affinity (list[int], optional): CPUs the processes are pinned to
+            cancel_token (threading.Event, optional): Cancellation token of the solve, set by cancel. A new one is used by 
+                default, callers pass their own to cancel the solve before it reaches Conjure
+
+        Returns:
+            list[dict]: The solution, empty if there is none
+
+        Raises:
+            MemoryLimitExceeded: If a step runs out of memory under the memory limit
+            OSError: If the parameters cannot be written to the cache directory
+            Exception: If the solver is not supported or a step fails
+        """
+        if solver not in TRANSLATABLE_SOLVERS:
+            raise Exception(f"cannot reuse translations for solver {solver}. Supported solvers are: {list(TRANSLATABLE_SOLVERS.keys())}")
+        self.cache.empty()
+        self.__resources = _no_resources()
+        self.__cancel_token = cancel_token if cancel_token is not None else threading.Event()
+        self.__set_limits(memory_limit, cpu_affinity)
+        if model_file is None:
+            assert model is not None, "expected a model or a model file"
+            self.cache.create_file(MODEL, model)
+            model_file = join(self.cache.cache_dir, MODEL)
+        elif not isfile(model_file):
+            raise Exception(f"model file {model_file} not found")
+        if parameter_file is None and parameter is not None:
+            with span(self.tracer, 'write parameters'):
+                if not self.cache.create_file_from_chunks(INSTANCE, json_backend.iterdumps(parameter)):
+                    raise OSError(f"could not write parameters to {join(self.cache.cache_dir, INSTANCE)}")
+            parameter_file = join(self.cache.cache_dir, INSTANCE)
+        elif parameter_file is not None and not isfile(parameter_file):
+            raise Exception(f"parameter file {parameter_file} not found")
+        model_file = abspath(model_file)
+        parameter_file = abspath(parameter_file) if parameter_file is not None else None
+
+        key = sha256('\0'.join([file_hash(model_file), file_hash(parameter_file) if parameter_file is not None else '', solver, 
+                                 file_hash(existing_model) if existing_model is not None else '', savilerow_options]).encode('utf-8')).hexdigest()
+        translation = join(self.translation_dir, key)
+        # translations without the solver input, e.g. SAT translations kept by earlier versions, are made again
+        if not isfile(join(translation, MINION_MODEL if solver == 'minion' else SAT_MODEL)):
+            rmtree(translation, ignore_errors=True)
+            with span(self.tracer, 'translate', solver=solver):
+                self.__translate(model_file, parameter_file, solver, translation, existing_model, savilerow_options)
+
+        eprime_solution = join(self.cache.cache_dir, 'solution.eprime-solution')
+        if solver == 'minion':
+            minion_solution = join(self.cache.cache_dir, 'solution.minion')
+            cmd = ['minion', '-noprintsols', '-solsout', minion_solution, *split(solver_options), join(translation, MINION_MODEL)]
+            self.__run_solver(cmd)
+            if not isfile(minion_solution) or os.path.getsize(minion_solution) == 0:
+                return []
+            self.__run_step(['savilerow', '-mode', 'ReadSolution', '-out-aux', join(translation, SAVILEROW_AUX), 
+                             '-minion-sol-file', minion_solution, '-out-solution', eprime_solution])
+        else:
+            sat_solution = join(self.cache.cache_dir, 'solution.sat')
+            flags = TRANSLATABLE_SOLVERS[solver]
+            cmd = [flags[flags.index('-satsolver-bin') + 1], *split(solver_options), join(translation, SAT_MODEL)]
+            # SAT solvers exit with 10 when they find a solution, 20 when there is none and 0 when they stop without an answer
+            if self.__run_solver(cmd, stdout=sat_solution) != 10:
+                return []
+            self.__run_step(['savilerow', '-mode', 'ReadSolution', *flags, '-out-aux', join(translation, SAVILEROW_AUX), 
+                             '-sat-sol-file', sat_solution, '-out-solution', eprime_solution])
+        if not isfile(eprime_solution):
+            return []
+
+        essence_solution = join(self.cache.cache_dir, 'solution' + SOLUTION_FILE_SUFFIX)
+        cmd = ['conjure', 'translate-solution', f'--eprime={join(translation, EPRIME_MODEL)}', 
+               f'--eprime-solution={eprime_solution}', f'--essence-solution={essence_solution}', '--output-format=json']
+        if parameter_file is not None:
+            cmd.append(f'--essence-param={parameter_file}')
+        self.__run_step(cmd)
+        with open(essence_solution, 'rb') as f:
+            return [json_backend.load(f)]
+
+    def __translate(self, model_file:str, parameter_file:str|None, solver:str, translation:str, existing_model:str|None=None, 
+                    savilerow_options:str="") -> None:
+        """
+        Translate a model and its parameters to the input of a solver, keeping every intermediate file.
+
+        Args:
+            model_file (str): Absolute path of the Essence model file
+            parameter_file (str, optional): Absolute path of the parameter file
+            solver (str): One of the TRANSLATABLE_SOLVERS
+            translation (str): Directory the translation is written to
+            existing_model (str, optional): Path of an Essence' model used in place of running conjure modelling
+            savilerow_options (str, optional): Options passed to Savile Row
+
+        Raises:
+            Exception: If a step fails
+        """
+        os.makedirs(self.translation_dir, exist_ok=True)
+        # built in a temporary directory and renamed, so a failed translation is never reused
+        work_dir = translation + '.tmp'
+        rmtree(work_dir, ignore_errors=True)
+        os.mkdir(work_dir)
+        try:
+            if existing_model is None:
+                self.__run_step(['conjure', 'modelling', '-ac', model_file, f'--output-directory={work_dir}'])
+                os.replace(join(work_dir, 'model000001.eprime'), join(work_dir, EPRIME_MODEL))
+            else:
+                copyfile(existing_model, join(work_dir, EPRIME_MODEL))
+            savilerow = ['savilerow', '-in-eprime', join(work_dir, EPRIME_MODEL), *split(savilerow_options)]
+            if parameter_file is not None:
+                self.__run_step(['conjure', 'refine-param', f'--eprime={join(work_dir, EPRIME_MODEL)}', 
+                                 f'--essence-param={parameter_file}', f'--eprime-param={join(work_dir, EPRIME_PARAM)}'])
+                savilerow += ['-in-param', join(work_dir, EPRIME_PARAM)]
+            if solver == 'minion':
+                self.__run_step(savilerow + ['-out-minion', join(work_dir, MINION_MODEL), 
+                                             '-out-aux', join(work_dir, SAVILEROW_AUX), '-save-symbols'])
+            else:
+                self.__run_step(savilerow + [*TRANSLATABLE_SOLVERS[solver], '-out-sat', join(work_dir, SAT_MODEL), 
+                                             '-out-aux', join(work_dir, SAVILEROW_AUX), '-save-symbols'])
+            os.replace(work_dir, translation)
+        finally:
+            rmtree(work_dir, ignore_errors=True)
+
+    def __run_step(self, cmd:list[str]) -> None:
+        """
+        Run one step of a translation.
+
+        Args:
+            cmd (list[str]): Command and its arguments
+
+        Raises:
+            Exception: If the command fails
+        """
+        with span(self.tracer, ' '.join(cmd[:2]) if cmd[0] == 'conjure' else cmd[0]) as step_span:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, preexec_fn=self.__child_limits())
+            returncode, stdout, stderr, usage = self.__wait(process, time.time())
+            if step_span is not None:
+                step_span['attributes'].update(usage)
+            if returncode != 0:
+                self.__check_memory(returncode, stderr + stdout)
+        if returncode != 0:
+            raise Exception(stderr or stdout)
+
+    def __run_solver(self, cmd:list[str], stdout:str|None=None) -> int:
+        """
+        Run a back-end solver on translated input, so it can be cancelled like a conjure solve.
+
+        Args:
+            cmd (list[str]): Command and its arguments
+            stdout (str, optional): File the standard output of the solver is written to
+
+        Returns:
+            int: Return code of the solver
+
+        Raises:
+            Exception: If the solve is cancelled or fails
+        """
+        command = " ".join([quote(arg) for arg in cmd]) + (f" > {quote(stdout)}" if stdout is not None else "")
+        returncode, stderr = self.__run(command, phase='solving')
+        if self.__cancel_token.is_set():
+            raise Exception("solve cancelled")
+        # SAT solvers exit with 10 (satisfiable) and 20 (unsatisfiable)
+        if returncode not in (0, 10, 20):
+            raise Exception(stderr)
+        return returncode
+
+    def __run(self, cmd:str, phase:str='starting') -> tuple[int, str]:
+        """
+        Run a conjure solve command in its own process group, tracking its progress from the output.
+        With a tracer, the run is recorded as a span with one child span per phase.
+
+        Args:
+            cmd (str): Shell command
+            phase (str, optional): Phase reported until the output shows another one
+
+        Returns:
+            tuple[int, str]: Return code and standard error of the command
+        """
+        with span(self.tracer, split(cmd)[0], command=cmd) as run_span:
+            returncode, stderr, usage = self.__run_process(cmd, phase)
+            if run_span is not None:
+                run_span['attributes'].update({'returncode': returncode, 'solutions': self.__progress['solutions'], **usage})
+                transitions = self.__progress['phases'] + [(None, self.__progress['end'])]
+                for (name, phase_start), (_, phase_end) in zip(transitions, transitions[1:]):
+                    self.tracer.add_span(name, phase_start, phase_end, parent=run_span['id'])
+        return returncode, stderr
+
+    def __run_process(self, cmd:str, phase:str) -> tuple[int, str, dict]:
+        """
+        Run a command in its own process group, see __run.
+
+        Args:
+            cmd (str): Shell command
+            phase (str): Phase reported until the output shows another one
+
+        Returns:
+            tuple[int, str, dict]: Return code, standard error and resource usage of the command
+        """
+        start = time.time()
+        self.__progress = {'phase': phase, 'solutions': 0, 'start': start, 'end': None, 'phases': [(phase, start)]}
+        self.__process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, start_new_session=True, 
+                                          preexec_fn=self.__child_limits())
+        # the solve was cancelled before its process started
+        if self.__cancel_token.is_set():
+            try:
+                os.killpg(self.__process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        output = deque(maxlen=OUTPUT_TAIL)
+        def on_line(line:str) -> None:
+            output.append(line)
+            self.__update_progress(line)
+        returncode, _, stderr, usage = self.__wait(self.__process, start, on_line)
+        self.__process = None
+        self.__progress['end'] = time.time()
+        self.__progress['phase'] = 'cancelled' if self.__cancel_token.is_set() else 'done'
+        # SAT solvers exit with 10 and 20 when they succeed
+        if not self.__cancel_token.is_set() and returncode not in (0, 10, 20):
+            self.__check_memory(returncode, stderr + '\n'.join(output))
+        return returncode, stderr, usage
+
+    def __wait(self, process:subprocess.Popen, start:float, on_line:Callable[[str], None]|None=None) -> tuple[int, str, str, dict]:
+        """
+        Read the output of a process until it exits, then reap it with wait4 to get the resources used by the process
+        and the descendants it waited for (conjure waits for savilerow and the solver), and add them to the solve.
+
+        Args:
+            process (subprocess.Popen): Process with piped standard output and error
+            start (float): Time the process was started
+            on_line (Callable[[str], None], optional): Called with each line of standard output, which is then not returned
+
+        Returns:
+            tuple[int, str, str, dict]: Return code, standard output, standard error and resource usage of the process
+        """
+        stdout, stderr = [], []
+        # stderr is drained on its own thread so neither pipe can fill up and block the process
+        stderr_reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+        for line in process.stdout:
+            if on_line is not None:
+                on_line(line.decode('utf-8', errors='replace').strip())
+            else:
+                stdout.append(line)
+        _, status, rusage = os.wait4(process.pid, 0)
+        # the process is reaped here, Popen must not wait for it again
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stderr_reader.join()
+        process.stdout.close()
+        process.stderr.close()
+        usage = {'user_time': rusage.ru_utime, 'system_time': rusage.ru_stime, 
+                 'max_rss': rusage.ru_maxrss, 'wall_time': time.time() - start}
+        if self.__resources is not None:
+            self.__resources = aggregate_resources([self.__resources, {**usage, 'processes': 1}])
+        return process.returncode, b''.join(stdout).decode('utf-8'), b''.join(stderr).decode('utf-8'), usage
+
+    def __set_limits(self, memory_limit:int|None, cpu_affinity:list[int]|None) -> None:
+        """
+        Set the limits applied to the processes of a solve.
+
+        Args:
+            memory_limit (int, optional): Address space limit in megabytes of each process
+            cpu_affinity (list[int], optional): CPUs the processes are pinned to
+        """
+        assert memory_limit is None or memory_limit > 0, f"expected a positive memory limit, got {memory_limit}"
+        if cpu_affinity is not None:
+            cpu_affinity = sorted(set(cpu_affinity))
+            available = os.sched_getaffinity(0)
+            unavailable = [cpu for cpu in cpu_affinity if cpu not in available]
+            if len(cpu_affinity) == 0 or len(unavailable) > 0:
+                raise Exception(f"cannot pin solve to CPUs {unavailable or cpu_affinity}. Available CPUs are: {sorted(available)}")
+        self.__memory_limit = memory_limit
+        self.__cpu_affinity = cpu_affinity
+
+    def __child_limits(self) -> Callable[[], None]|None:
+        """
+        Build the function applying the limits of the solve in a child process, before it runs its command.
+        The limits are inherited by the processes it starts.
+
+        Returns:
+            Callable[[], None] | None: Function run in the child, None without limits
+        """
+        memory_limit, cpu_affinity = self.__memory_limit, self.__cpu_affinity
+        if memory_limit is None and cpu_affinity is None:
+            return None
+        def apply() -> None:
+            if memory_limit is not None:
+                limit = memory_limit * 1024 * 1024
+                resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+            if cpu_affinity is not None:
+                os.sched_setaffinity(0, cpu_affinity)
+        return apply
+
+    def __check_memory(self, returncode:int, output:str) -> None:
+        """
+        Check if a process that failed under a memory limit ran out of memory.
+
+        Args:
+            returncode (int): Return code of the process, negative if it was killed by a signal
+            output (str): Error output and last lines of output of the process
+
+        Raises:
+            MemoryLimitExceeded: If the output reports an allocation failure or the process died of a signal
+        """
+        if self.__memory_limit is None:
+            return
+        killed = returncode < 0 and -returncode in OUT_OF_MEMORY_SIGNALS
+        # shells report the signal that killed their command as 128 + signal
+        killed = killed or returncode - 128 in OUT_OF_MEMORY_SIGNALS
+        if killed or any([message in output.lower() for message in OUT_OF_MEMORY_MESSAGES]):
+            raise MemoryLimitExceeded(output, self.__memory_limit, self.get_resources())
+
+    def get_resources(self) -> dict|None:
+        """
+        Get the resources used by the processes of the current, or last, solve: Conjure and the Savile Row and solver
+        processes it waited for, or each step of a solve reusing a translation.
+
+        Returns:
+            dict | None: 'user_time', 'system_time' and 'wall_time' summed over the processes in seconds, 'max_rss' the
+                peak resident memory of the largest process in kilobytes, and 'processes' the number of processes run.
+                None before the first solve
+        """
+        return dict(self.__resources) if self.__resources is not None else None
+
+    def __update_progress(self, line:str) -> None:
+        """
+        Update the solve progress from a line of conjure output.
+
+        Args:
+            line (str): Output line
+        """
+        for prefix, phase in PHASES:
+            if line.startswith(prefix) and self.__progress['phase'] != phase:
+                self.__progress['phase'] = phase
+                self.__progress['phases'].append((phase, time.time()))
+        if line.startswith('Copying solution'):
+            self.__progress['solutions'] += 1
+
+    def get_progress(self) -> dict:
+        """
+        Get the progress of the current, or last, solve.
+
+        Returns:
+            dict: Current phase, number of solutions found so far, elapsed time in seconds 
+                and seconds spent in each phase so far
+        """
+        start, end = self.__progress['start'], self.__progress['end']
+        now = end if end is not None else time.time()
+        elapsed = 0.0 if start is None else now - start
+        # seconds spent in each phase, a phase seen twice (e.g. solving then translating again) adds up
+        phases = {}
+        transitions = self.__progress['phases']
+        for i, (phase, phase_start) in enumerate(transitions):
+            phase_end = transitions[i + 1][1] if i + 1 < len(transitions) else now
+            phases[phase] = phases.get(phase, 0.0) + phase_end - phase_start
+        return {'phase': self.__progress['phase'], 'solutions': self.__progress['solutions'], 'elapsed': elapsed, 'phases': phases}
+
+    def cancel(self) -> bool:
+        """
+        Cancel the running solve, killing the whole conjure process tree. The cancellation token of the solve is set,
+        so a process the solve has not started yet is killed as soon as it starts, while the next solve has its own token.
+
+        Returns:
+            bool: True if a running process was killed, False otherwise
+        """
+        self.__cancel_token.set()
+        process = self.__process
+        # the solve thread reaps the process with wait4, so its return code is not polled here
+        if process is None or process.returncode is not None:
+            return False
+        try:
+            os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+        except ProcessLookupError:
+            return False
+        return True
+
+    def generate_models(self, portfolio_size:int, model:str|None=None, model_file:str|None=None) -> list[str]:
+        """
+        Ask Conjure for a portfolio of alternative Essence' models, one per choice of representations.
+        Portfolios are kept, so Conjure only runs again when the model changes.
+
+        Args:
+            portfolio_size (int): Maximum number of models
+            model (str, optional): Essence model string, used when no model file is given
+            model_file (str, optional): Path of the Essence model file
+
+        Returns:
+            list[str]: Paths of the generated Essence' models
+
+        Raises:
+            Exception: If Conjure execution fails
+        """
+        key = self.model_key(model, model_file)
+        portfolio = join(self.representation_dir, key, f'portfolio{portfolio_size}')
+        if not isdir(portfolio):
+            os.makedirs(join(self.representation_dir, key), exist_ok=True)
+            work_dir = portfolio + '.tmp'
+            rmtree(work_dir, ignore_errors=True)
+            os.mkdir(work_dir)
+            self.__resources = _no_resources()
+            self.__cancel_token = threading.Event()
+            self.__set_limits(None, None)
+            try:
+                if model_file is None:
+                    assert model is not None, "expected a model or a model file"
+                    model_file = join(work_dir, MODEL)
+                    with open(model_file, 'w') as f:
+                        f.write(model)
+                self.__run_step(['conjure', 'modelling', f'--portfolio={portfolio_size}', abspath(model_file), 
+                                 f'--output-directory={join(work_dir, "models")}'])
+                os.replace(join(work_dir, 'models'), portfolio)
+            finally:
+                rmtree(work_dir, ignore_errors=True)
+        return sorted([join(portfolio, f) for f in listdir(portfolio) if f.endswith('.eprime')])
+
+    def save_representation(self, existing_model:str, model:str|None=None, model_file:str|None=None) -> str:
+        """
+        Remember an Essence' model as the representation choice for later solves of an Essence model.
+
+        Args:
+            existing_model (str): Path of the Essence' model
+            model (str, optional): Essence model string, used when no model file is given
+            model_file (str, optional): Path of the Essence model file
+
+        Returns:
+            str: Path of the saved copy of the Essence' model
+        """
+        directory = join(self.representation_dir, self.model_key(model, model_file))
+        os.makedirs(directory, exist_ok=True)
+        copyfile(existing_model, join(directory, CHOSEN_REPRESENTATION + '.tmp'))
+        os.replace(join(directory, CHOSEN_REPRESENTATION + '.tmp'), join(directory, CHOSEN_REPRESENTATION))
+        return join(directory, CHOSEN_REPRESENTATION)
+
+    def get_saved_representation(self, model:str|None=None, model_file:str|None=None) -> str|None:
+        """
+        Get the Essence' model saved as the representation choice of an Essence model.
+
+        Args:
+            model (str, optional): Essence model string, used when no model file is given
+            model_file (str, optional): Path of the Essence model file
+
+        Returns:
+            str | None: Path of the Essence' model, None if no choice was saved
+        """
+        chosen = join(self.representation_dir, self.model_key(model, model_file), CHOSEN_REPRESENTATION)
+        return chosen if isfile(chosen) else None
+
+    @staticmethod
+    def model_key(model:str|None=None, model_file:str|None=None) -> str:
+        """
+        Get a key identifying the content of an Essence model.
+
+        Args:
+            model (str, optional): Essence model string, used when no model file is given
+            model_file (str, optional): Path of the Essence model file
+
+        Returns:
+            str: Hex digest of the model
+        """
+        if model_file is not None:
+            return file_hash(model_file)
+        assert model is not None, "expected a model or a model file"
+        return sha256(model.encode('utf-8')).hexdigest()
 
     def get_model_parameters(self, model: str) -> list[dict]:
         """
@@ -85,7 +809,42 @@ class Conjure:
         """
         self.cache.empty()
         self.cache.create_file(MODEL, model)
-        model_file = join(self.cache.cache_dir, MODEL)
+        return self.__dump_declarations(join(self.cache.cache_dir, MODEL))
+
+    def get_model_parameters_file(self, model_file:str) -> list[dict]:
+        """
+        Get parameters from an Essence model file.
+        Declarations are cached by file hash, so Conjure only runs again when the file changes.
+
+        Args:
+            model_file (str): Path of the Essence model file
+
+        Returns:
+            list[dict]: List of parameter declarations
+
+        Raises:
+            Exception: If the file is not found or Conjure execution fails
+        """
+        if not isfile(model_file):
+            raise Exception(f"model file {model_file} not found")
+        key = file_hash(model_file)
+        if key not in self.__declarations:
+            self.__declarations[key] = self.__dump_declarations(abspath(model_file))
+        return deepcopy(self.__declarations[key])
+
+    def __dump_declarations(self, model_file:str) -> list[dict]:
+        """
+        Run conjure ide --dump-declarations on a model file.
+
+        Args:
+            model_file (str): Path of the model file
+
+        Returns:
+            list[dict]: List of parameter declarations
+
+        Raises:
+            Exception: If Conjure execution fails
+        """
         cmd = ['conjure', 
                'ide', 
                '--dump-declarations',
@@ -94,10 +853,23 @@ class Conjure:
         output = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         if output.returncode != 0:
             raise Exception(output.stderr.decode('utf-8'))
-        return json.loads(output.stdout.decode('utf-8'))
+        return json_backend.loads(output.stdout)
     
-    def get_required_parameters(self, model:str) -> list[str]:
-        all_parameters = self.get_model_parameters(model)
+    def get_required_parameters(self, model:str, model_file:str|None=None) -> list[str]:
+        all_parameters = self.get_model_parameters(model) if model_file is None else self.get_model_parameters_file(model_file)
+        return Conjure.required_parameters(all_parameters)
+
+    @staticmethod
+    def required_parameters(all_parameters:list[dict]) -> list[str]:
+        """
+        Get the names of the parameters that must be given to solve a model.
+
+        Args:
+            all_parameters (list[dict]): Declarations of the model, as returned by get_model_parameters
+
+        Returns:
+            list[str]: Names of the required parameters
+        """
         required_parameters = []
         for param in all_parameters:
             param_kind = param.get("kind", '')
@@ -120,8 +892,8 @@ class Conjure:
         """
         for file in listdir(join(self.cache.cache_dir, SOLUTION_DIR)):
             if "solutions.json" in file:
-                f = open(join(self.cache.cache_dir, SOLUTION_DIR, file))
-                solutions = json.load(f)
+                f = open(join(self.cache.cache_dir, SOLUTION_DIR, file), 'rb')
+                solutions = json_backend.load(f)
                 f.close()
                 return solutions
         raise Exception("Solution not found")
@@ -143,7 +915,41 @@ class Conjure:
         self.cache.empty()
 
         self.cache.create_file(MODEL, code)
-        shell_output = subprocess.run(["conjure", "pretty", f"--output-format={output_type}", join(self.cache.cache_dir, MODEL)], 
+        return self.__pretty_print(join(self.cache.cache_dir, MODEL), output_type)
+
+    def pretty_print_file(self, model_file:str, output_type:str) -> str:
+        """
+        Pretty print an Essence file in specified format.
+
+        Args:
+            model_file (str): Path of the Essence file to format
+            output_type (str): Desired output format
+
+        Returns:
+            str: Formatted Essence code
+
+        Raises:
+            Exception: If the file is not found or Conjure execution fails
+        """
+        if not isfile(model_file):
+            raise Exception(f"model file {model_file} not found")
+        return self.__pretty_print(abspath(model_file), output_type)
+
+    def __pretty_print(self, model_file:str, output_type:str) -> str:
+        """
+        Run conjure pretty on a model file.
+
+        Args:
+            model_file (str): Path of the model file
+            output_type (str): Desired output format
+
+        Returns:
+            str: Formatted Essence code
+
+        Raises:
+            Exception: If Conjure execution fails
+        """
+        shell_output = subprocess.run(["conjure", "pretty", f"--output-format={output_type}", model_file], 
                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
         if shell_output.returncode != 0:
@@ -175,6 +981,24 @@ class Conjure:
         except Exception as e:
             raise Exception(f"issue reading info file: {e}")
 
+    @staticmethod
+    def version() -> str|None:
+        """
+        Get the version of Conjure installed on the system. It is looked up once per session.
+
+        Returns:
+            str | None: First line of conjure --version, None if Conjure is not available
+        """
+        global _conjure_version
+        if _conjure_version is None:
+            try:
+                output = subprocess.run(["conjure", "--version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                lines = output.stdout.decode('utf-8').strip().splitlines()
+                _conjure_version = lines[0] if output.returncode == 0 and len(lines) > 0 else ''
+            except OSError:
+                _conjure_version = ''
+        return _conjure_version if _conjure_version != '' else None
+
     @staticmethod
     def available() -> bool:
         """
@@ -197,4 +1021,107 @@ def is_conjure_available() -> bool:
     Returns:
         bool: True if Conjure is available, False otherwise
     """
-    return Conjure.available()
\ No newline at end of file
+    return Conjure.available()
+
+class SolutionWatcher:
+    """
+    Watches a conjure output directory and delivers each solution file as soon as it is complete.
+
+    Args:
+        solution_dir (str): Conjure output directory
+        on_solution (Callable[[dict], None]): Called with each new solution, in file name order
+        keep (bool, optional): Keep the delivered solutions in the solutions list
+    """
+    def __init__(self, solution_dir:str, on_solution:Callable[[dict], None], keep:bool=True) -> None:
+        """
+        Initialize the SolutionWatcher instance.
+
+        Args:
+            solution_dir (str): Conjure output directory
+            on_solution (Callable[[dict], None]): Called with each new solution, in file name order
+            keep (bool, optional): Keep the delivered solutions in the solutions list
+        """
+        self.solution_dir = solution_dir
+        self.keep = keep
+        self.solutions = []
+        self.__on_solution = on_solution
+        self.__seen = set()
+        self.__lock = threading.Lock()
+        self.__stopped = threading.Event()
+        self.__thread = threading.Thread(target=self.__watch, daemon=True)
+
+    def start(self) -> None:
+        """
+        Start watching the output directory.
+        """
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop watching and deliver the solutions written since the last scan.
+        """
+        self.__stopped.set()
+        self.__thread.join()
+        self.scan(final=True)
+
+    def __watch(self) -> None:
+        while not self.__stopped.wait(SOLUTION_POLL_INTERVAL):
+            self.scan()
+
+    def scan(self, final:bool=False) -> None:
+        """
+        Deliver the solution files that appeared since the last scan.
+
+        Args:
+            final (bool, optional): If False, files that cannot be decoded yet are assumed to be still being written and retried later
+        """
+        with self.__lock:
+            try:
+                files = sorted([f for f in listdir(self.solution_dir) if f.endswith(SOLUTION_FILE_SUFFIX) and f not in self.__seen])
+            except FileNotFoundError:
+                return
+            for file in files:
+                try:
+                    with open(join(self.solution_dir, file), 'rb') as f:
+                        solution = json_backend.load(f)
+                except ValueError:
+                    if not final:
+                        # later solutions are delivered after this one, to keep their order
+                        return
+                    raise
+                self.__seen.add(file)
+                if self.keep:
+                    self.solutions.append(solution)
+                self.__on_solution(solution)
+
+def iterate_callback(run:Callable[[Callable[[dict], None]], object]) -> Iterator[dict]:
+    """
+    Turn a function delivering solutions to a callback into an iterator over the solutions.
+    The function runs on a worker thread, and its exception, if any, is raised by the iterator.
+
+    Args:
+        run (Callable): Function taking the on_solution callback
+
+    Returns:
+        Iterator[dict]: Solutions, as soon as they are delivered
+    """
+    done = object()
+    queue = Queue()
+    errors = []
+
+    def worker():
+        try:
+            run(queue.put)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            queue.put(done)
+
+    threading.Thread(target=worker, daemon=True).start()
+    while True:
+        item = queue.get()
+        if item is done:
+            break
+        yield item
+    if len(errors) > 0:
+        raise errors[0]
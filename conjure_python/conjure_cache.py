@@ -1,7 +1,35 @@
 import os
+from hashlib import sha256
 from shutil import rmtree
+from typing import Iterable
 
 CACHE_DIR = '.cache'
+HASH_CHUNK_SIZE = 1 << 20
+
+# file path -> (modification time, size, digest), so each file is hashed once while it is unchanged
+_file_hashes = {}
+
+def file_hash(path:str) -> str:
+    """
+    Get the sha256 digest of a file, computed once and reused until the file changes.
+
+    Args:
+        path (str): File path
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    cached = _file_hashes.get(path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    digest = sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    _file_hashes[path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+    return _file_hashes[path][2]
 
 class Cache:
     def __init__(self, cache_dir:str|None=None) -> None:
@@ -23,6 +51,22 @@ class Cache:
         except:
             return False
 
+    def create_file_from_chunks(self, file_name:str, chunks:Iterable[str]) -> bool:
+        path = os.path.join(self.cache_dir, file_name)
+        try:
+            with open(path, 'w') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                return True
+        except OSError:
+            # a partially written file would be read as a truncated instance
+            self.__remove(path)
+            return False
+        except BaseException:
+            # errors raised while producing the chunks, e.g. a value that cannot be encoded, are the caller's
+            self.__remove(path)
+            raise
+
     def write(self, file_name:str, file_content:str, create:bool=True) -> bool:
         if not create and not os.path.exists(os.path.join(self.cache_dir, file_name)):
             return False
@@ -36,3 +80,9 @@ class Cache:
                 return True
         except:
             return False
+
+    def __remove(self, path:str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,11 +1,33 @@
+import atexit
+import os
 import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from contextlib import nullcontext
+from shutil import rmtree
+from typing import Callable
 from IPython import get_ipython
 from .conjure import Conjure
 from IPython.core.magic import (Magics, magics_class, cell_magic, line_magic)
 from IPython.display import display, Markdown
 from .model import EssenceModel
+from .solution import EssenceSolution
+from .fingerprint import fingerprint
 import json
 
+# cell flag forcing a fresh solve instead of reusing a memoized result
+FRESH_FLAG = '--fresh'
+# cell flag running the solve off the main thread
+BACKGROUND_FLAG = '--background'
+# seconds between two refreshes of the background solve widget
+PROGRESS_REFRESH = 0.5
+# number of solutions rendered at once when there are multiple solutions
+SOLUTIONS_PAGE_SIZE = 10
+# number of memoized cell results, the least recently used ones are forgotten first
+MEMOIZED_RESULTS = 32
+
 
 @magics_class
 class ConjureMagics(Magics):
@@ -18,14 +40,24 @@ class ConjureMagics(Magics):
     # stores conjure models which needs to be executed
     conjure_models = []
 
+    # (model, cell arguments, parameters fingerprint) -> (solutions, info) of previous runs in this session, least recently used first
+    conjure_results = OrderedDict()
+    # background solves memoize their result from their own thread
+    conjure_results_lock = threading.Lock()
+
+    # model -> EssenceModel, which keeps the declarations dumped by conjure
+    conjure_session_models = {}
+
+    # directory of the solution stores of this session, solutions are read from disk one page at a time
+    conjure_solutions_dir = None
+    conjure_solves = 0
+
     choose_representations_options = [
         'Use Conjure\'s default heuristic', 'Manual selection (using the Representations tab)']
     choose_representations_value = choose_representations_options[0]
 
     @cell_magic
     def conjure(self, args, code, append_code=False):
-        model = EssenceModel()
-
         # removing language Essence 1.3 from code in incremental building
         # we will only remove it in subsequent runs
         if len(self.conjure_models) > 0 and code.startswith('language Essence '):
@@ -39,19 +71,107 @@ class ConjureMagics(Magics):
             else:
                 self.conjure_models = [code]
             assert self.shell is not None
-            model.append('\n'.join(self.conjure_models))
+            args, flags = self.parse_flags(args, [FRESH_FLAG, BACKGROUND_FLAG])
+            model_text = '\n'.join(self.conjure_models)
+            if model_text not in self.conjure_session_models:
+                self.conjure_session_models[model_text] = EssenceModel(model_text)
+            model = self.conjure_session_models[model_text]
             required_params = self.filter_params(model)
-            solution = model.solve(parameters=
-                                   required_params if len(required_params.keys()) > 0 else None, 
-                                   solver_arguments=args).__dict__()
-            infodict = model.getStats()
-            self.shell.user_ns["conjure_info"] = infodict
+            key = self.result_key(model_text, args, required_params)
+            memoized = self.recall_result(key) if FRESH_FLAG not in flags else None
+            if memoized is not None:
+                solution, infodict = memoized
+            else:
+                if BACKGROUND_FLAG in flags:
+                    self.solve_in_background(model, required_params, args, key)
+                    return
+                solution, infodict = self.run_model(model, required_params, args, key)
 
         except Exception as err:
             self.conjure_models.pop()
             print("{}: {}".format(type(err).__name__, err), file=sys.stderr)
             return
 
+        self.display_results(solution, infodict)
+
+    def run_model(self, model:EssenceModel, required_params:dict, args:str, key:tuple|None) -> tuple[EssenceSolution, dict|None]:
+        solution = model.solve(parameters=
+                               required_params if len(required_params.keys()) > 0 else None, 
+                               solver_arguments=args, store=self.store_path())
+        solution.set_mode("raw")
+        infodict = model.getStats()
+        if key is not None:
+            self.remember_result(key, solution, infodict)
+        return solution, infodict
+
+    def recall_result(self, key:tuple|None) -> tuple[EssenceSolution, dict|None]|None:
+        if key is None:
+            return None
+        with self.conjure_results_lock:
+            if key not in self.conjure_results:
+                return None
+            self.conjure_results.move_to_end(key)
+            return self.conjure_results[key]
+
+    def remember_result(self, key:tuple, solution:EssenceSolution, infodict:dict|None) -> None:
+        with self.conjure_results_lock:
+            self.conjure_results[key] = (solution, infodict)
+            self.conjure_results.move_to_end(key)
+            while len(self.conjure_results) > MEMOIZED_RESULTS:
+                self.conjure_results.popitem(last=False)
+
+    def solve_in_background(self, model:EssenceModel, required_params:dict, args:str, key:tuple|None) -> None:
+        import ipywidgets as widgets
+
+        # the background solve gets its own cache directory, so cells run meanwhile do not overwrite its files
+        cache_dir = tempfile.mkdtemp(prefix='conjure-background-')
+        model = model.copy(cache_dir=cache_dir)
+        status = widgets.Label(value='Starting...')
+        cancel = widgets.Button(description='Cancel', button_style='danger', icon='stop')
+        output = widgets.Output()
+        cancel.on_click(lambda _: model.cancel())
+        display(widgets.VBox([widgets.HBox([cancel, status]), output]))
+        done = threading.Event()
+
+        def report_progress():
+            while not done.wait(PROGRESS_REFRESH):
+                progress = model.get_progress()
+                status.value = "%.1fs | phase: %s | solutions found: %d" % (progress['elapsed'], progress['phase'], progress['solutions'])
+
+        def solve():
+            try:
+                solution, infodict = self.run_model(model, required_params, args, key)
+            except Exception as err:
+                done.set()
+                cancel.disabled = True
+                if model.get_progress()['phase'] == 'cancelled':
+                    status.value = 'Cancelled after %.1fs' % model.get_progress()['elapsed']
+                else:
+                    status.value = 'Failed'
+                    output.append_stderr("{}: {}\n".format(type(err).__name__, err))
+                return
+            finally:
+                rmtree(cache_dir, ignore_errors=True)
+            done.set()
+            cancel.disabled = True
+            status.value = 'Done in %.1fs | solutions found: %d' % (model.get_progress()['elapsed'], len(solution))
+            # the output widget is written directly, as the thread has no output context of its own
+            self.display_results(solution, infodict, output.append_display_data)
+
+        threading.Thread(target=report_progress, daemon=True).start()
+        threading.Thread(target=solve, daemon=True).start()
+
+    def store_path(self) -> str:
+        if ConjureMagics.conjure_solutions_dir is None:
+            ConjureMagics.conjure_solutions_dir = tempfile.mkdtemp(prefix='conjure-notebook-')
+            # the stores back the memoized results, so they are kept until the kernel shuts down
+            atexit.register(rmtree, ConjureMagics.conjure_solutions_dir, ignore_errors=True)
+        ConjureMagics.conjure_solves += 1
+        return os.path.join(ConjureMagics.conjure_solutions_dir, f'solutions{ConjureMagics.conjure_solves}.jsonl')
+
+    def display_results(self, solution:Sequence[dict], infodict:dict|None, show:Callable=display) -> None:
+        assert self.shell is not None
+        self.shell.user_ns["conjure_info"] = infodict
         self.shell.user_ns['conjure_solutions'] = solution
         if len(solution) == 1:
             # assign results of single solution to notebook environment
@@ -59,31 +179,13 @@ class ConjureMagics(Magics):
                 self.shell.user_ns[key] = value
 
         if len(solution) == 0:
-            display(Markdown("No solutions found."))
+            show(Markdown("No solutions found."))
 
         elif len(solution) == 1:
-            try:
-                self.shell.user_ns["conjure_display_solution"]()
-            except Exception:
-                # no user defined version, use the default
-                output_md = "```json\n"
-                output_md += json.dumps(solution[0])
-                output_md += "\n```"
-                display(Markdown(output_md))
+            self.display_solution(solution[0], show)
 
         else:  # multiple solutions
-            try:
-                for solnum, sol in enumerate(solution):
-                    for key, value in sol.items():
-                        self.shell.user_ns[key] = value
-                    display(Markdown(f'## Solution {solnum+1}'))
-                    self.shell.user_ns["conjure_display_solution"]()
-            except Exception as e:
-                # no user defined version, use the default
-                output_md = "```json\n"
-                output_md += json.dumps(solution[0])
-                output_md += "\n```"
-                display(Markdown(output_md))
+            self.display_solution_pages(solution, show)
 
         try:
             self.shell.user_ns["conjure_display_info"]()
@@ -93,7 +195,56 @@ class ConjureMagics(Magics):
             assert infodict is not None
             for k, v in infodict.items():
                 output_md += "| %s | %s |\n" % (k, v)
-            display(Markdown(output_md))
+            show(Markdown(output_md))
+
+    def display_solution(self, solution:dict, show:Callable=display) -> None:
+        assert self.shell is not None
+        try:
+            self.shell.user_ns["conjure_display_solution"]()
+        except Exception:
+            # no user defined version, use the default
+            output_md = "```json\n"
+            output_md += json.dumps(solution)
+            output_md += "\n```"
+            show(Markdown(output_md))
+
+    def display_solution_pages(self, solution:Sequence[dict], show:Callable=display) -> None:
+        import ipywidgets as widgets
+
+        n_pages = (len(solution) + SOLUTIONS_PAGE_SIZE - 1) // SOLUTIONS_PAGE_SIZE
+        previous_page = widgets.Button(description='Previous', icon='arrow-left')
+        next_page = widgets.Button(description='Next', icon='arrow-right')
+        page_label = widgets.Label()
+        output = widgets.Output()
+        current = {'page': 0}
+
+        def render(page:int) -> None:
+            # only the solutions of the visible page are read from the store, bound and displayed
+            assert self.shell is not None
+            current['page'] = page
+            start, end = page * SOLUTIONS_PAGE_SIZE, min((page + 1) * SOLUTIONS_PAGE_SIZE, len(solution))
+            page_label.value = f'Solutions {start+1}-{end} of {len(solution)}'
+            previous_page.disabled = page == 0
+            next_page.disabled = page == n_pages - 1
+            output.outputs = ()
+            if threading.current_thread() is threading.main_thread():
+                # the page is drawn inside the widget, so conjure_display_solution() output stays on its page
+                context, show_page = output, display
+            else:
+                # a background solve has no output context, the widget is written directly
+                context, show_page = nullcontext(), output.append_display_data
+            with context:
+                for solnum in range(start, end):
+                    page_solution = solution[solnum]
+                    for key, value in page_solution.items():
+                        self.shell.user_ns[key] = value
+                    show_page(Markdown(f'## Solution {solnum+1}'))
+                    self.display_solution(page_solution, show_page)
+
+        previous_page.on_click(lambda _: render(current['page'] - 1))
+        next_page.on_click(lambda _: render(current['page'] + 1))
+        show(widgets.VBox([widgets.HBox([previous_page, next_page, page_label]), output]))
+        render(0)
 
     def conjure_plus(self, args, code):
         return self.conjure(args, code, append_code=True)
@@ -141,16 +292,22 @@ Conjure Notebook comes with a number of magic commands (i.e. commands that start
 
 - `%conjure_rollback`: remove the last conjure model fragment that was added via `%%conjure+`
 
+- `%conjure_clear_results`: forget the memoized results. Re-running a `%%conjure` cell with the same model, arguments and parameter values returns the previous result instantly, unless `--fresh` is passed in the first line. Only the most recently used results are kept.
+
+- `%%conjure --background`: runs the solve without blocking the notebook. A widget shows the elapsed time, the current phase and the solutions found so far, with a button to cancel the solve. Results are stored in the notebook variables when the solve completes.
+
 - `%conjure_settings`: 
 
 ## Special variable/function names
 
-- `conjure_solutions`: a Python array that contains the set of solutions returned by Conjure.
+- `conjure_solutions`: the solutions returned by Conjure, as an `EssenceSolution` in raw mode. Solutions are kept on disk and read when they are accessed.
 
 - `conjure_info`: a Python dictionary that contains some statistics about the solving process.
 
 - `conjure_display_solution()`: a Python function that will be called per solution, if defined. If it's not defined, Conjure Notebook will display the entire solution as a JSON dump.
 
+    Multiple solutions are shown 10 per page, and only the solutions of the visible page are displayed.
+
     If you don't want solution printing, define it to do nothing (i.e. `def conjure_display_solution(): pass`).
 
     Takes no arguments. When defining, you can refer to the decision variables by their names.
@@ -164,13 +321,34 @@ Conjure Notebook comes with a number of magic commands (i.e. commands that start
 More information about Conjure: https://conjure-cp.github.io
         """))
     
+    def parse_flags(self, args:str, flags:list[str]) -> tuple[str, set[str]]:
+        tokens = args.split()
+        found = set([t for t in tokens if t in flags])
+        if len(found) == 0:
+            return args, found
+        return ' '.join([t for t in tokens if t not in flags]), found
+
+    def result_key(self, model_text:str, args:str, params:dict) -> tuple|None:
+        try:
+            return (model_text, args.strip(), fingerprint(params))
+        except TypeError:
+            # parameter values we cannot fingerprint are never memoized
+            return None
+
+    @line_magic
+    def conjure_clear_results(self, line):
+        with self.conjure_results_lock:
+            self.conjure_results.clear()
+        print('Memoized results are removed.')
+
     def filter_params(self, model:EssenceModel) -> dict:
-        required_params = model.get_required_params()
-        model_params = {}
-        all_shell_params = dict(self.shell.user_ns)
-        for param in required_params:
-            model_params[param] = all_shell_params[param]
-        return model_params
+        assert self.shell is not None
+        declarations = model.get_all_model_params()
+        required_params = Conjure.required_parameters(declarations)
+        user_ns = self.shell.user_ns
+        # only the required names are looked up, the notebook namespace is never copied.
+        # values stay python objects, the model encodes them once when solving
+        return {param: user_ns[param] for param in required_params}
             
 def load_ipython_extension(ipython):
     ipython.register_magics(ConjureMagics)
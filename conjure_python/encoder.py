@@ -0,0 +1,244 @@
+from typing import Any
+
+from . import json_backend
+from .essence_types import EssenceMatrix, EssenceFunction, EssenceRecord, EssenceRelation, EssenceSet, EssenceSequence, EssenceTuple, is_bool, is_function, is_int, is_matrix, is_record, is_relation, is_sequence, is_set, is_tuple
+
+def split_top_level(text:str, separator:str) -> list[str]:
+    """
+    Split a domain string on a separator, ignoring separators nested in brackets.
+
+    Args:
+        text (str): Domain string
+        separator (str): Separator to split on
+
+    Returns:
+        list[str]: Stripped parts
+    """
+    parts, depth, start, i = [], 0, 0, 0
+    while i < len(text):
+        char = text[i]
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif depth == 0 and text.startswith(separator, i):
+            parts.append(text[start:i].strip())
+            i += len(separator)
+            start = i
+            continue
+        i += 1
+    parts.append(text[start:].strip())
+    return parts
+
+def inner_domain(domain:str) -> str:
+    """
+    Get the domain of the elements of a matrix, set, multi-set, sequence or relation domain.
+
+    Args:
+        domain (str): Collection domain string
+
+    Returns:
+        str: Element domain string
+    """
+    return ' of '.join(split_top_level(domain, ' of ')[1:])
+
+def matrix_index_domains(domain:str) -> list[str]:
+    """
+    Get the index domains of a matrix domain.
+
+    Args:
+        domain (str): Matrix domain string
+
+    Returns:
+        list[str]: Index domain strings, one per dimension
+    """
+    start = domain.index('[')
+    depth = 0
+    for i in range(start, len(domain)):
+        if domain[i] in '([{':
+            depth += 1
+        elif domain[i] in ')]}':
+            depth -= 1
+            if depth == 0:
+                return split_top_level(domain[start+1:i], ',')
+    raise Exception(f"malformed matrix domain {domain}")
+
+def _strip_brackets(domain:str) -> str:
+    domain = domain.strip()
+    if domain.startswith('tuple'):
+        domain = domain[len('tuple'):].strip()
+    if domain[0] in '({' and domain[-1] in ')}':
+        return domain[1:-1]
+    return domain
+
+def function_domains(domain:str) -> tuple[str, str]:
+    """
+    Get the domain and the codomain of a function domain.
+
+    Args:
+        domain (str): Function domain string
+
+    Returns:
+        tuple[str, str]: Domain and codomain strings
+    """
+    from_domain, to_domain = split_top_level(domain, '-->')
+    tokens = split_top_level(from_domain[len('function'):].strip(), ' ')
+    # drop the function attributes, e.g. (total, injective)
+    if len(tokens) > 1 and tokens[0].startswith('('):
+        tokens = tokens[1:]
+    return ' '.join(tokens), to_domain
+
+def tuple_domains(domain:str) -> list[str]:
+    """
+    Get the domain of each component of a tuple or relation domain.
+
+    Args:
+        domain (str): Tuple or relation domain string
+
+    Returns:
+        list[str]: Component domain strings
+    """
+    if is_relation(domain):
+        return split_top_level(_strip_brackets(inner_domain(domain)), '*')
+    return split_top_level(_strip_brackets(domain), ',')
+
+def record_domains(domain:str) -> dict[str, str]:
+    """
+    Get the domain of each field of a record domain.
+
+    Args:
+        domain (str): Record domain string
+
+    Returns:
+        dict[str, str]: Field domain strings by field name
+    """
+    fields = split_top_level(_strip_brackets(domain[domain.index('{'):]), ',')
+    return {f.split(':', 1)[0].strip(): f.split(':', 1)[1].strip() for f in fields}
+
+def _is_array(value:Any) -> bool:
+    # numpy arrays and scalars (and pandas objects) convert themselves to python values in one vectorized call
+    return hasattr(value, 'tolist') and hasattr(value, 'dtype')
+
+def _encode_matrix(value:Any, domain:str) -> Any:
+    element_domain = inner_domain(domain)
+    dimensions = len(matrix_index_domains(domain))
+    if isinstance(value, EssenceMatrix):
+        value = value.matrix
+    if _is_array(value) and (is_int(element_domain) or is_bool(element_domain)):
+        _check_dtype(value, element_domain, domain)
+        if is_bool(element_domain) and value.dtype.kind != 'b':
+            value = value.astype(bool)
+        return value.tolist()
+    return _encode_dimension(value, dimensions, element_domain)
+
+def _check_dtype(value:Any, element_domain:str, domain:str) -> None:
+    # int domains only take integer dtypes, bool domains also take integers as truth values
+    if (is_int(element_domain) or is_bool(element_domain)) and value.dtype.kind not in ('iub' if is_bool(element_domain) else 'iu'):
+        raise Exception(f"cannot encode array of dtype {value.dtype} as {domain}")
+
+def _encode_dimension(value:Any, dimensions:int, element_domain:str) -> Any:
+    if dimensions == 0:
+        return encode_parameter(value, element_domain)
+    if _is_array(value):
+        value = value.tolist()
+    if dimensions == 1 and is_int(element_domain) and isinstance(value, list) and all(type(v) is int for v in value):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _encode_dimension(v, dimensions - 1, element_domain) for k,v in value.items()}
+    return [_encode_dimension(v, dimensions - 1, element_domain) for v in value]
+
+def _encode_key(key:Any) -> str:
+    # JSON object keys must be strings, Conjure reads them back following the function domain
+    return key if isinstance(key, str) else json_backend.dumps(key)
+
+def _decode_key(key:Any, domain:str) -> Any:
+    # keys already in Conjure's string form, e.g. from an encoded parameter, are read back so encoding twice is harmless
+    if isinstance(key, str) and (is_int(domain) or is_bool(domain) or is_tuple(domain) or domain.startswith('tuple')):
+        try:
+            return json_backend.loads(key)
+        except ValueError:
+            return key
+    return key
+
+def _sorted_values(values:list) -> list:
+    try:
+        return sorted(values)
+    except TypeError:
+        return values
+
+def encode_parameter(value:Any, domain:str) -> Any:
+    """
+    Convert a python value to Conjure's JSON parameter format, following its Essence domain.
+    Supports python scalars, lists, tuples, sets and dicts, NumPy arrays and scalars, and the library EssenceType objects.
+
+    Args:
+        value (Any): Python value
+        domain (str): Essence domain of the parameter, as returned by the model declarations
+
+    Returns:
+        Any: JSON-compatible value
+
+    Raises:
+        Exception: If the value cannot be encoded for the domain
+    """
+    domain = domain.strip()
+    # tuples and records may contain any other domain, so they are recognised by their first token before the others
+    if is_tuple(domain) or domain.startswith('tuple'):
+        values = value.values if isinstance(value, EssenceTuple) else value
+        return [encode_parameter(v, d) for v, d in zip(values, tuple_domains(domain))]
+    if domain.startswith('record') and is_record(domain):
+        field_domains = record_domains(domain)
+        return {k: encode_parameter(v, field_domains[k]) for k,v in value.items()}
+    if is_matrix(domain):
+        return _encode_matrix(value, domain)
+    if is_function(domain):
+        from_domain, to_domain = function_domains(domain)
+        items = value.values.items() if isinstance(value, EssenceFunction) else dict(value).items()
+        return {_encode_key(encode_parameter(_decode_key(k, from_domain), from_domain)): encode_parameter(v, to_domain) for k,v in items}
+    if is_relation(domain):
+        component_domains = tuple_domains(domain)
+        values = value.values if isinstance(value, EssenceRelation) else value
+        if _is_array(values):
+            values = values.tolist()
+        return _sorted_values([[encode_parameter(c, d) for c, d in zip(v, component_domains)] for v in values])
+    if is_int(domain) or is_bool(domain):
+        if _is_array(value):
+            _check_dtype(value, domain, domain)
+            return value.tolist()
+        if is_bool(domain):
+            return bool(value)
+        # bools are ints in python, but not in Essence
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        raise Exception(f"cannot encode {type(value).__name__} as {domain}")
+    if is_sequence(domain):
+        element_domain = inner_domain(domain)
+        values = value.values if isinstance(value, EssenceSequence) else value
+        if _is_array(values):
+            _check_dtype(values, element_domain, domain)
+            return values.tolist()
+        return [encode_parameter(v, element_domain) for v in values]
+    if is_set(domain) or domain.startswith('mset'):
+        element_domain = inner_domain(domain)
+        values = value.values if isinstance(value, EssenceSet) else value
+        if _is_array(values):
+            values = values.tolist()
+        return _sorted_values([encode_parameter(v, element_domain) for v in values])
+    # enumerated types, unnamed types and unknown domains are passed as they are
+    if _is_array(value):
+        return value.tolist()
+    return value
+
+def encode_parameters(parameters:dict[str, Any], declarations:list[dict]) -> dict[str, Any]:
+    """
+    Convert the parameters of a model to Conjure's JSON parameter format.
+
+    Args:
+        parameters (dict[str, Any]): Parameter values by name
+        declarations (list[dict]): Declarations of the 'given' parameters, each with 'name' and 'domain'
+
+    Returns:
+        dict[str, Any]: JSON-compatible parameters. Parameters without a declared domain are passed as they are
+    """
+    domains = {d['name']: d['domain'] for d in declarations if 'domain' in d}
+    return {name: encode_parameter(value, domains[name]) if name in domains else value for name, value in parameters.items()}
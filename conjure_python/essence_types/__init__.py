@@ -1,5 +1,5 @@
 from .base import EssenceType
-from .helpers import is_int, is_bool, is_tuple, is_matrix, is_record, is_function, is_relation, is_set, is_sequence
+from .helpers import is_int, is_bool, is_tuple, is_matrix, is_record, is_function, is_relation, is_set, is_sequence, freeze
 from .matrix import EssenceMatrix
 from .record import EssenceRecord
 from .relation import EssenceRelation
@@ -25,6 +25,15 @@ class EssenceType:
         """
         raise NotImplementedError("method __len__ not implemented. It must be implemented by the children class")
 
+    def __eq__(self, other) -> bool:
+        """
+        Check if two Essence values are equal.
+
+        Raises:
+            NotImplementedError: Must be implemented by child classes
+        """
+        raise NotImplementedError("method __eq__ not implemented. It must be implemented by the children class")
+
     def __hash__(self) -> int:
         """
         Get the hash value of the Essence type.
@@ -1,5 +1,5 @@
 from .base import EssenceType
-from .helpers import cast
+from .helpers import cast, freeze
 
 class EssenceFunction(EssenceType):
     """
@@ -92,14 +92,26 @@ class EssenceFunction(EssenceType):
         """
         return len(self.domain_values)
 
+    def __eq__(self, other) -> bool:
+        """
+        Check if two functions have the same mappings.
+
+        Args:
+            other: Object to compare with
+
+        Returns:
+            bool: True if other is a function with the same mappings, False otherwise
+        """
+        return isinstance(other, EssenceFunction) and self.values == other.values
+
     def __hash__(self) -> int:
         """
         Get the hash value of the function.
 
         Returns:
-            int: Hash value based on function items
+            int: Hash value based on function items, independent of their order
         """
-        return hash(tuple(list(self.values.items())))
+        return hash(freeze(self.values))
 
     def __str__(self) -> str:
         """
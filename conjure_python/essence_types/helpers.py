@@ -75,7 +75,7 @@ def is_function(domain:str) -> bool:
     is_there_function = "function" == domain.split('(')[0].replace(" ",'')
     if not is_there_function:
         return False
-    return '-->' in domain.split('(')[1]
+    return '-->' in domain
 
 def is_relation(domain:str) -> bool:
     """
@@ -138,3 +138,22 @@ def is_sequence(domain:str) -> bool:
         bool: True if domain is a sequence type, False otherwise
     """
     return 'sequence' in domain
+
+def freeze(value):
+    """
+    Convert a (possibly nested) value into an equivalent hashable value.
+    Lists become tuples, sets become frozensets and dicts become frozensets of their items.
+
+    Args:
+        value: Value to convert
+
+    Returns:
+        Hashable version of the value
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple([freeze(v) for v in value])
+    if isinstance(value, (set, frozenset)):
+        return frozenset([freeze(v) for v in value])
+    if isinstance(value, dict):
+        return frozenset([(freeze(k), freeze(v)) for k,v in value.items()])
+    return value
@@ -1,28 +1,37 @@
 from .base import EssenceType
-from .helpers import cast
+from .helpers import cast, freeze
+from ..json_backend import decode_matrix
 
 class EssenceMatrix(EssenceType):
     """
     Represents a multi-dimensional matrix in Essence.
 
     Args:
-        values (dict): Dictionary containing matrix values
+        values (dict | list): Dictionary containing matrix values, or nested lists for int indexed matrices
         essece_types (str): String representation of matrix types in the Essence language
     """
-    def __init__(self, values:dict, essece_types:str) -> None:
+    def __init__(self, values:dict|list, essece_types:str) -> None:
         """
         Initialize a new EssenceMatrix instance.
 
         Args:
-            values (dict): Dictionary containing matrix values
+            values (dict | list): Dictionary containing matrix values, or nested lists for int indexed matrices
             essece_types (str): String representation of matrix types in the Essence language
         """
         super().__init__(values, essece_types)
         matrix_types, indexes_types = self.__parse_types(essece_types)
-        shape = self.__get_shape(values, indexes_types)
-        self.shape = tuple([s[1] for s in shape])
-        self.index_types = tuple([s[0] for s in shape])
-        self.matrix = self.__create_matrix(values, list(self.index_types), matrix_types)
+        # fast path: int indexed matrices keyed by '1'..'n' are decoded straight into lists
+        matrix = decode_matrix(values, matrix_types, len(indexes_types)) if all(t == int for t in indexes_types) else None
+        if matrix is not None:
+            self.matrix = matrix
+            self.shape = self.__get_list_shape(matrix, len(indexes_types))
+            self.index_types = tuple(indexes_types)
+        else:
+            assert isinstance(values, dict), f'expected dict for non int indexed matrix, got: {type(values)}'
+            shape = self.__get_shape(values, indexes_types)
+            self.shape = tuple([s[1] for s in shape])
+            self.index_types = tuple([s[0] for s in shape])
+            self.matrix = self.__create_matrix(values, list(self.index_types), matrix_types)
         self.__current_idx = 0
 
     def __getitem__(self, idx:int|tuple):
@@ -98,6 +107,25 @@ class EssenceMatrix(EssenceType):
             return self.__get_shape(values[key], types=types, current_shape=current_shape)
         return current_shape
     
+    def __get_list_shape(self, values:list, dimensions:int) -> tuple:
+        """
+        Get the shape of a matrix stored as nested lists.
+
+        Args:
+            values (list): Matrix values
+            dimensions (int): Number of dimensions of the matrix
+
+        Returns:
+            tuple: Size of each dimension
+        """
+        shape = []
+        for _ in range(dimensions):
+            shape.append(len(values))
+            if len(values) == 0:
+                break
+            values = values[0]
+        return tuple(shape)
+
     def __create_matrix(self, values:dict, types:list, value_type) -> list|dict:
         """
         Create the matrix structure from values.
@@ -145,14 +173,26 @@ class EssenceMatrix(EssenceType):
         self.__current_idx += 1
         return el
 
+    def __eq__(self, other) -> bool:
+        """
+        Check if two matrices have the same contents.
+
+        Args:
+            other: Object to compare with
+
+        Returns:
+            bool: True if other is a matrix with the same contents, False otherwise
+        """
+        return isinstance(other, EssenceMatrix) and self.matrix == other.matrix
+
     def __hash__(self) -> int:
         """
         Get the hash value of the matrix.
 
         Returns:
-            int: Hash value based on matrix contents
+            int: Hash value based on matrix contents, for any number of dimensions
         """
-        return hash(tuple([tuple(row) for row in self.matrix]))
+        return hash(freeze(self.matrix))
     
     def __str__(self) -> str:
         """
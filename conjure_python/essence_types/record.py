@@ -1,5 +1,5 @@
 from .base import EssenceType
-from .helpers import is_int, is_bool
+from .helpers import is_int, is_bool, freeze
 
 class EssenceRecord(EssenceType):
     """
@@ -125,14 +125,26 @@ class EssenceRecord(EssenceType):
         self.__current_key_idx += 1
         return el
 
+    def __eq__(self, other) -> bool:
+        """
+        Check if two records have the same fields and values.
+
+        Args:
+            other: Object to compare with
+
+        Returns:
+            bool: True if other is a record with the same fields and values, False otherwise
+        """
+        return isinstance(other, EssenceRecord) and dict(self.items()) == dict(other.items())
+
     def __hash__(self) -> int:
         """
         Get the hash value of the record.
 
         Returns:
-            int: Hash value based on record items
+            int: Hash value based on record items, independent of their order
         """
-        return hash(tuple([itm for itm in self.__values.items()]))
+        return hash(freeze(self.__values))
 
     def __str__(self) -> str:
         """
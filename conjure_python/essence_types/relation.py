@@ -97,14 +97,26 @@ class EssenceRelation(EssenceType):
         self.__current_idx += 1
         return el
 
+    def __eq__(self, other) -> bool:
+        """
+        Check if two relations contain the same tuples.
+
+        Args:
+            other: Object to compare with
+
+        Returns:
+            bool: True if other is a relation with the same tuples, False otherwise
+        """
+        return isinstance(other, EssenceRelation) and set(self.values) == set(other.values)
+
     def __hash__(self) -> int:
         """
         Get the hash value of the relation.
 
         Returns:
-            int: Hash value based on relation contents
+            int: Hash value based on relation contents, independent of their order
         """
-        return hash(self.values)
+        return hash(frozenset(self.values))
 
     def __str__(self) -> str:
         """
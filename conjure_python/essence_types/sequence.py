@@ -43,6 +43,18 @@ class EssenceSequence(EssenceType):
         """
         return self.values[idx]
 
+    def __eq__(self, other) -> bool:
+        """
+        Check if two sequences have the same elements in the same order.
+
+        Args:
+            other: Object to compare with
+
+        Returns:
+            bool: True if other is a sequence with the same elements, False otherwise
+        """
+        return isinstance(other, EssenceSequence) and self.values == other.values
+
     def __hash__(self) -> int:
         """
         Get the hash value of the sequence.
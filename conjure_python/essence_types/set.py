@@ -36,14 +36,26 @@ class EssenceSet(EssenceType):
         """
         return len(self.values)
 
+    def __eq__(self, other) -> bool:
+        """
+        Check if two sets have the same elements.
+
+        Args:
+            other: Object to compare with
+
+        Returns:
+            bool: True if other is a set with the same elements, False otherwise
+        """
+        return isinstance(other, EssenceSet) and self.values == other.values
+
     def __hash__(self) -> int:
         """
         Get the hash value of the set.
 
         Returns:
-            int: Hash value based on set contents
+            int: Hash value based on set contents, independent of their order
         """
-        return hash(tuple(self.values))
+        return hash(frozenset(self.values))
 
     def __str__(self) -> str:
         """
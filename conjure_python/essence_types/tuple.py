@@ -32,6 +32,18 @@ class EssenceTuple(EssenceType):
         """
         return len(self.values)
 
+    def __eq__(self, other) -> bool:
+        """
+        Check if two tuples have the same elements.
+
+        Args:
+            other: Object to compare with
+
+        Returns:
+            bool: True if other is a tuple with the same elements, False otherwise
+        """
+        return isinstance(other, EssenceTuple) and self.values == other.values
+
     def __hash__(self) -> int:
         """
         Get the hash value of the tuple.
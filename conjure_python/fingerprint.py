@@ -0,0 +1,63 @@
+import json
+from hashlib import sha256
+from typing import Any
+
+from .essence_types import EssenceType, EssenceMatrix, EssenceFunction, EssenceRecord, EssenceRelation, EssenceSet, EssenceSequence, EssenceTuple
+
+def canonical(value:Any) -> Any:
+    """
+    Convert a solution value into a canonical JSON-compatible form.
+    Unordered collections (sets, relations, functions and records) are sorted so equal values always give the same form.
+
+    Args:
+        value (Any): Solution value, either an EssenceType or a plain python value
+
+    Returns:
+        Any: Canonical form of the value
+    """
+    if isinstance(value, EssenceMatrix):
+        return ['matrix', canonical(value.matrix)]
+    if isinstance(value, EssenceFunction):
+        return ['function', _sorted([[canonical(k), canonical(v)] for k,v in value.values.items()])]
+    if isinstance(value, EssenceRecord):
+        return ['record', sorted([[k, canonical(v)] for k,v in value.items()], key=lambda kv: kv[0])]
+    if isinstance(value, EssenceRelation):
+        return ['relation', _sorted([canonical(v) for v in value.values])]
+    if isinstance(value, EssenceSet):
+        return ['set', _sorted([canonical(v) for v in value.values])]
+    if isinstance(value, (EssenceSequence, EssenceTuple)):
+        return [type(value).__name__[len('Essence'):].lower(), canonical(list(value.values))]
+    if isinstance(value, EssenceType):
+        raise Exception(f"cannot fingerprint essence type {type(value).__name__}")
+    if hasattr(value, 'tolist') and hasattr(value, 'dtype'):
+        # numpy arrays and scalars
+        return canonical(value.tolist())
+    if isinstance(value, (set, frozenset)):
+        return _sorted([canonical(v) for v in value])
+    if isinstance(value, dict):
+        return _sorted([[canonical(k), canonical(v)] for k,v in value.items()])
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    return value
+
+def _dumps(value:Any) -> str:
+    # fixed separators keep the serialization, and so the fingerprint, independent of the json backend
+    return json.dumps(value, separators=(',', ':'))
+
+def _sorted(values:list) -> list:
+    # values of mixed or nested types are ordered by their serialization
+    return sorted(values, key=_dumps)
+
+def fingerprint(solution:dict[str, Any]) -> str:
+    """
+    Compute a stable fingerprint of a single solution.
+    The fingerprint only depends on the solution contents, so it is the same across processes and runs.
+
+    Args:
+        solution (dict[str, Any]): Solution mapping variable names to values
+
+    Returns:
+        str: Hex digest identifying the solution
+    """
+    content = sorted([[name, canonical(value)] for name, value in solution.items()], key=lambda kv: kv[0])
+    return sha256(_dumps(content).encode('utf-8')).hexdigest()
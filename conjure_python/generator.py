@@ -0,0 +1,309 @@
+import ast
+import operator
+import random
+from typing import Any, Iterator
+
+from .encoder import function_domains, inner_domain, matrix_index_domains, record_domains, split_top_level, tuple_domains
+from .essence_types import freeze, is_bool, is_function, is_int, is_matrix, is_record, is_relation, is_sequence, is_set, is_tuple
+
+# size of collections whose size is neither fixed by their domain nor given
+DEFAULT_SIZE = 5
+# bounds of unbounded int domains
+DEFAULT_INT_RANGE = (0, 100)
+# draws allowed per element when sampling distinct values of domains that cannot be enumerated
+MAX_DRAWS_PER_ELEMENT = 100
+
+_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    # integer division and modulo in Essence
+    ast.Div: operator.floordiv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+def evaluate(expression:str, values:dict[str, Any]) -> int:
+    """
+    Evaluate an integer expression of a domain, e.g. a bound such as 'n - 1' or '2 * k'.
+
+    Args:
+        expression (str): Expression with integer literals, names of int parameters and arithmetic operators
+        values (dict[str, Any]): Values of the parameters
+
+    Returns:
+        int: Value of the expression
+
+    Raises:
+        Exception: If the expression uses anything else
+    """
+    def visit(node:ast.AST) -> int:
+        if isinstance(node, ast.Expression):
+            return visit(node.body)
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id not in values or isinstance(values[node.id], bool) or not isinstance(values[node.id], int):
+                raise Exception(f"cannot evaluate {expression}: {node.id} is not an int parameter with a value")
+            return values[node.id]
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -visit(node.operand)
+        if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+            return _OPERATORS[type(node.op)](visit(node.left), visit(node.right))
+        raise Exception(f"cannot evaluate {expression}")
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError:
+        raise Exception(f"cannot evaluate {expression}")
+    return visit(tree)
+
+def _attributes(domain:str, keyword:str) -> dict[str, str|bool]:
+    # attributes between brackets after the keyword, e.g. set (size 3, minSize 1) -> {'size': '3', 'minSize': '1'}
+    rest = domain[len(keyword):].strip()
+    if not rest.startswith('('):
+        return {}
+    depth = 0
+    for i, char in enumerate(rest):
+        depth += 1 if char == '(' else -1 if char == ')' else 0
+        if depth == 0:
+            break
+    attributes = {}
+    for attribute in split_top_level(rest[1:i], ','):
+        if attribute == '':
+            continue
+        name, _, value = attribute.partition(' ')
+        attributes[name] = value.strip() if value.strip() != '' else True
+    return attributes
+
+class _IntDomain:
+    # finite int domain made of ranges, sampled without enumerating its values
+    def __init__(self, domain:str, values:dict[str, Any]) -> None:
+        self.ranges = []
+        if '(' not in domain:
+            self.ranges.append(DEFAULT_INT_RANGE)
+            return
+        for part in split_top_level(domain[domain.index('(') + 1:domain.rindex(')')], ','):
+            if '..' in part:
+                lower, upper = part.split('..', 1)
+                self.ranges.append((evaluate(lower, values), evaluate(upper, values)))
+            else:
+                value = evaluate(part, values)
+                self.ranges.append((value, value))
+        self.ranges = [(lower, upper) for lower, upper in self.ranges if lower <= upper]
+
+    def __len__(self) -> int:
+        return sum([upper - lower + 1 for lower, upper in self.ranges])
+
+    def nth(self, index:int) -> int:
+        for lower, upper in self.ranges:
+            if index <= upper - lower:
+                return lower + index
+            index -= upper - lower + 1
+        raise IndexError(index)
+
+    def values(self) -> list[int]:
+        return [v for lower, upper in self.ranges for v in range(lower, upper + 1)]
+
+class InstanceGenerator:
+    """
+    Samples valid parameters from the domains of the 'given' declarations of a model.
+    Parameters are sampled in declaration order, so domains can refer to the parameters declared before them.
+
+    Args:
+        declarations (list[dict]): Declarations of the model, as returned by get_model_parameters
+        sizes (dict[str, int], optional): Size of the collections of each parameter (sets, sequences, relations and
+            non-total functions) whose size is not fixed by their domain
+        fixed (dict[str, Any], optional): Parameters with a fixed value, e.g. {'n': 100} to control the size of
+            the domains depending on n
+        default_size (int, optional): Size of the other collections
+    """
+    def __init__(self, declarations:list[dict], sizes:dict[str, int]|None=None, fixed:dict[str, Any]|None=None,
+                 default_size:int=DEFAULT_SIZE) -> None:
+        """
+        Initialize the InstanceGenerator instance.
+
+        Args:
+            declarations (list[dict]): Declarations of the model
+            sizes (dict[str, int], optional): Size of the collections of each parameter
+            fixed (dict[str, Any], optional): Parameters with a fixed value
+            default_size (int, optional): Size of the other collections
+        """
+        self.givens = [d for d in declarations if d.get('kind') == 'Given' and d.get('values') is None]
+        self.sizes = sizes or {}
+        self.fixed = fixed or {}
+        self.default_size = default_size
+
+    def generate(self, seed:int|None=None) -> dict[str, Any]:
+        """
+        Sample one instance.
+
+        Args:
+            seed (int, optional): Random seed, the same seed always gives the same instance
+
+        Returns:
+            dict[str, Any]: Parameters as python values (ints, bools, lists, sets, dicts and tuples), ready for solve
+
+        Raises:
+            Exception: If a domain cannot be sampled, e.g. an enumerated type without a fixed value
+        """
+        rng = random.Random(seed)
+        values = {}
+        for given in self.givens:
+            name = given['name']
+            if name in self.fixed:
+                values[name] = self.fixed[name]
+                continue
+            if 'domain' not in given:
+                raise Exception(f"cannot generate {name}: its domain is unknown, give it a fixed value")
+            values[name] = self.__sample(given['domain'].strip(), rng, values, self.sizes.get(name, self.default_size), name)
+        return values
+
+    def generate_many(self, count:int, seed:int=0) -> Iterator[dict[str, Any]]:
+        """
+        Sample several instances, using the seeds seed, seed + 1, ...
+
+        Args:
+            count (int): Number of instances
+            seed (int, optional): Seed of the first instance
+
+        Returns:
+            Iterator[dict[str, Any]]: Instances
+        """
+        for i in range(count):
+            yield self.generate(seed + i)
+
+    def __sample(self, domain:str, rng:random.Random, values:dict[str, Any], size:int, name:str) -> Any:
+        """
+        Sample a value of a domain.
+
+        Args:
+            domain (str): Essence domain
+            rng (random.Random): Random generator
+            values (dict[str, Any]): Parameters sampled so far
+            size (int): Size of the collections whose size is not fixed by the domain
+            name (str): Name of the parameter, for error messages
+
+        Returns:
+            Any: Python value
+        """
+        # tuples and records may contain any other domain, so they are recognised by their first token before the others
+        if is_tuple(domain) or domain.startswith('tuple') or domain.startswith('('):
+            return tuple([self.__sample(d, rng, values, size, name) for d in tuple_domains(domain)])
+        if domain.startswith('record') and is_record(domain):
+            return {field: self.__sample(field_domain, rng, values, size, name) for field, field_domain in record_domains(domain).items()}
+        if is_matrix(domain):
+            shape = [self.__finite_values(d, values, name) for d in matrix_index_domains(domain)]
+            element = inner_domain(domain)
+            def fill(dimensions:list[list]) -> list:
+                if len(dimensions) == 1:
+                    return [self.__sample(element, rng, values, size, name) for _ in dimensions[0]]
+                return [fill(dimensions[1:]) for _ in dimensions[0]]
+            return fill(shape)
+        if is_function(domain):
+            attributes = _attributes(domain, 'function')
+            from_domain, to_domain = function_domains(domain)
+            if 'total' in attributes:
+                keys = self.__finite_values(from_domain, values, name)
+            else:
+                keys = self.__distinct(from_domain, self.__size(attributes, values, size), rng, values, name)
+            if 'injective' in attributes or 'bijective' in attributes:
+                images = self.__distinct(to_domain, len(keys), rng, values, name)
+                rng.shuffle(images)
+            else:
+                images = [self.__sample(to_domain, rng, values, size, name) for _ in keys]
+            if 'surjective' in attributes or 'bijective' in attributes:
+                if len(set([freeze(v) for v in images])) != len(self.__finite_values(to_domain, values, name)):
+                    raise Exception(f"cannot generate {name}: only surjective functions between domains of the same size are supported")
+            return {freeze(k): v for k, v in zip(keys, images)}
+        if is_relation(domain):
+            attributes = _attributes(domain, 'relation')
+            return self.__distinct('tuple(' + ', '.join(tuple_domains(domain)) + ')', self.__size(attributes, values, size),
+                                   rng, values, name)
+        if is_int(domain):
+            int_domain = _IntDomain(domain, values)
+            if len(int_domain) == 0:
+                raise Exception(f"cannot generate {name}: domain {domain} is empty")
+            return int_domain.nth(rng.randrange(len(int_domain)))
+        if is_bool(domain):
+            return rng.random() < 0.5
+        if is_sequence(domain):
+            attributes = _attributes(domain, 'sequence')
+            element = inner_domain(domain)
+            count = self.__size(attributes, values, size)
+            if 'injective' in attributes:
+                return self.__distinct(element, count, rng, values, name)
+            return [self.__sample(element, rng, values, size, name) for _ in range(count)]
+        if domain.startswith('mset'):
+            attributes = _attributes(domain, 'mset')
+            return [self.__sample(inner_domain(domain), rng, values, size, name) for _ in range(self.__size(attributes, values, size))]
+        if is_set(domain):
+            attributes = _attributes(domain, 'set')
+            return set(self.__distinct(inner_domain(domain), self.__size(attributes, values, size), rng, values, name))
+        raise Exception(f"cannot generate {name}: unsupported domain {domain}, give it a fixed value")
+
+    def __size(self, attributes:dict[str, str|bool], values:dict[str, Any], size:int) -> int:
+        """
+        Get the size of a collection, from its attributes or the requested size kept within minSize and maxSize.
+        """
+        if isinstance(attributes.get('size'), str):
+            return evaluate(attributes['size'], values)
+        if isinstance(attributes.get('minSize'), str):
+            size = max(size, evaluate(attributes['minSize'], values))
+        if isinstance(attributes.get('maxSize'), str):
+            size = min(size, evaluate(attributes['maxSize'], values))
+        return size
+
+    def __finite_values(self, domain:str, values:dict[str, Any], name:str) -> list:
+        """
+        Enumerate the values of an int or bool domain.
+        """
+        if is_bool(domain):
+            return [False, True]
+        if is_int(domain) and '(' in domain:
+            return _IntDomain(domain, values).values()
+        raise Exception(f"cannot generate {name}: cannot enumerate domain {domain}")
+
+    def __distinct(self, domain:str, count:int, rng:random.Random, values:dict[str, Any], name:str) -> list:
+        """
+        Sample distinct values of a domain.
+        """
+        if is_int(domain) and '(' in domain:
+            int_domain = _IntDomain(domain, values)
+            if count > len(int_domain):
+                raise Exception(f"cannot generate {name}: {count} distinct values requested from {domain}")
+            return sorted([int_domain.nth(i) for i in rng.sample(range(len(int_domain)), count)])
+        if is_bool(domain):
+            if count > 2:
+                raise Exception(f"cannot generate {name}: {count} distinct values requested from bool")
+            return rng.sample([False, True], count)
+        found = {}
+        for _ in range(count * MAX_DRAWS_PER_ELEMENT):
+            if len(found) == count:
+                break
+            value = self.__sample(domain, rng, values, self.default_size, name)
+            found.setdefault(freeze(value), value)
+        if len(found) < count:
+            raise Exception(f"cannot generate {name}: could not find {count} distinct values of {domain}")
+        return list(found.values())
+
+def generate_instances(declarations:list[dict], count:int, seed:int=0, sizes:dict[str, int]|None=None,
+                       fixed:dict[str, Any]|None=None, default_size:int=DEFAULT_SIZE) -> list[dict[str, Any]]:
+    """
+    Sample instances of a model from the domains of its 'given' declarations.
+
+    Args:
+        declarations (list[dict]): Declarations of the model, as returned by get_model_parameters
+        count (int): Number of instances
+        seed (int, optional): Seed of the first instance, the others use the following seeds
+        sizes (dict[str, int], optional): Size of the collections of each parameter, when not fixed by its domain
+        fixed (dict[str, Any], optional): Parameters with a fixed value
+        default_size (int, optional): Size of the other collections
+
+    Returns:
+        list[dict[str, Any]]: Instances
+
+    Raises:
+        Exception: If a domain cannot be sampled
+    """
+    return list(InstanceGenerator(declarations, sizes, fixed, default_size).generate_many(count, seed))
@@ -0,0 +1,267 @@
+import sqlite3
+import threading
+import time
+from os.path import dirname, join, realpath
+from statistics import median
+
+from . import json_backend
+from .conjure import DEFAULT_SOLVER
+from .tuning import score
+
+HISTORY_DATABASE = join(dirname(realpath(__file__)), '.history.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL NOT NULL,
+    model TEXT NOT NULL,
+    instance TEXT,
+    solver TEXT,
+    solver_arguments TEXT,
+    configuration TEXT NOT NULL,
+    features TEXT NOT NULL,
+    status TEXT NOT NULL,
+    runtime REAL NOT NULL,
+    conjure_version TEXT,
+    user_time REAL,
+    system_time REAL,
+    max_rss INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model, timestamp);
+CREATE TABLE IF NOT EXISTS phases (
+    run INTEGER NOT NULL REFERENCES runs (id),
+    phase TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS info (
+    run INTEGER NOT NULL REFERENCES runs (id),
+    key TEXT NOT NULL,
+    number REAL,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS info_key ON info (key, run);
+"""
+
+def _typed(value:str) -> tuple[float|None, str|None]:
+    # .eprime-info values are strings, numbers are stored as numbers so they can be aggregated in SQL
+    try:
+        return float(value), None
+    except (TypeError, ValueError):
+        return None, value
+
+class HistoryDatabase:
+    """
+    SQLite database of solver runs. It records the same runs as RunHistory, with per-phase timings,
+    typed .eprime-info statistics and resource usage in their own tables, and adds query helpers.
+
+    Args:
+        path (str, optional): Path of the database file
+    """
+    def __init__(self, path:str=HISTORY_DATABASE) -> None:
+        """
+        Open the database, creating it if needed.
+
+        Args:
+            path (str, optional): Path of the database file
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        # solves may finish on worker threads, writes are serialized by the lock
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.executescript(_SCHEMA)
+
+    def record(self, model_key:str, features:dict[str, float], configuration:dict, runtime:float, status:str,
+               info:dict|None=None, instance_key:str|None=None, solver_arguments:str|None=None,
+               phases:dict[str, float]|None=None, resources:dict|None=None, conjure_version:str|None=None) -> int:
+        """
+        Record a solver run.
+
+        Args:
+            model_key (str): Key of the model, see Conjure.model_key
+            features (dict[str, float]): Features of the instance, see instance_features
+            configuration (dict): Solver configuration of the run. Runs without a solver are recorded with the default one
+            runtime (float): Wall-clock time of the run in seconds
+            status (str): 'SAT', 'UNSAT', 'timeout', 'memout' (memory limit exceeded) or 'error'
+            info (dict, optional): Statistics of the run from the .eprime-info file
+            instance_key (str, optional): Hash of the instance
+            solver_arguments (str, optional): Arguments passed to the solver
+            phases (dict[str, float], optional): Seconds spent in each phase of the solve
+            resources (dict, optional): Resource usage with the keys 'user_time', 'system_time' (seconds) and 'max_rss' (kilobytes)
+            conjure_version (str, optional): Version of Conjure
+
+        Returns:
+            int: Id of the run
+        """
+        resources = resources or {}
+        with self.__lock, self.__connection:
+            cursor = self.__connection.execute(
+                "INSERT INTO runs (timestamp, model, instance, solver, solver_arguments, configuration, features, status, runtime, "
+                "conjure_version, user_time, system_time, max_rss) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), model_key, instance_key, configuration.get('solver') or DEFAULT_SOLVER, solver_arguments, 
+                 json_backend.dumps(configuration),
+                 json_backend.dumps(features), status, runtime, conjure_version,
+                 resources.get('user_time'), resources.get('system_time'), resources.get('max_rss')))
+            run = cursor.lastrowid
+            self.__connection.executemany("INSERT INTO phases (run, phase, seconds) VALUES (?, ?, ?)",
+                                          [(run, phase, seconds) for phase, seconds in (phases or {}).items()])
+            self.__connection.executemany("INSERT INTO info (run, key, number, text) VALUES (?, ?, ?, ?)",
+                                          [(run, key, *_typed(value)) for key, value in (info or {}).items()])
+        assert run is not None
+        return run
+
+    def runs(self, model_key:str|None=None, since:float|None=None) -> list[dict]:
+        """
+        Get the recorded runs, in the format of RunHistory.runs.
+
+        Args:
+            model_key (str, optional): Only return the runs of this model
+            since (float, optional): Only return the runs recorded after this timestamp
+
+        Returns:
+            list[dict]: Recorded runs, oldest first
+        """
+        rows = self.__select("SELECT id, timestamp, model, instance, configuration, features, status, runtime, conjure_version, "
+                             "solver_arguments, user_time, system_time, max_rss FROM runs", model_key, since)
+        runs = []
+        for row in rows:
+            runs.append({'id': row[0], 'timestamp': row[1], 'model': row[2], 'instance': row[3],
+                         'configuration': json_backend.loads(row[4]), 'features': json_backend.loads(row[5]),
+                         'status': row[6], 'runtime': row[7], 'conjure_version': row[8], 'solver_arguments': row[9],
+                         'resources': {'user_time': row[10], 'system_time': row[11], 'max_rss': row[12]}})
+        return runs
+
+    def percentiles(self, percentiles:tuple[int, ...]=(50, 90, 99), model_key:str|None=None, solver:str|None=None,
+                    since:float|None=None, phase:str|None=None) -> dict[int, float]:
+        """
+        Get percentiles of the runtime of the successful runs (SAT or UNSAT).
+
+        Args:
+            percentiles (tuple[int, ...], optional): Percentiles to compute
+            model_key (str, optional): Only consider the runs of this model
+            solver (str, optional): Only consider the runs of this solver
+            since (float, optional): Only consider the runs recorded after this timestamp
+            phase (str, optional): Use the time spent in this phase (e.g. 'savile row') instead of the total runtime
+
+        Returns:
+            dict[int, float]: Runtime in seconds for each percentile, empty if no run matches
+        """
+        if phase is None:
+            query, params = "SELECT runtime FROM runs WHERE status IN ('SAT', 'UNSAT')", []
+        else:
+            query, params = "SELECT SUM(phases.seconds) FROM runs JOIN phases ON phases.run = runs.id " \
+                            "WHERE status IN ('SAT', 'UNSAT') AND phases.phase = ?", [phase]
+        if solver is not None:
+            # runs recorded before the default solver was stored have no solver
+            query += f" AND COALESCE(solver, '{DEFAULT_SOLVER}') = ?"
+            params.append(solver)
+        rows = self.__select(query, model_key, since, params, group_by="runs.id" if phase is not None else None)
+        runtimes = [row[0] for row in rows]
+        if len(runtimes) == 0:
+            return {}
+        return {p: score(runtimes, f'p{p}') for p in percentiles}
+
+    def regressions(self, threshold:float=1.2, model_key:str|None=None, minimum_runs:int=3) -> list[dict]:
+        """
+        Find slowdowns between Conjure versions: for each model, instance and configuration, the median runtime
+        of the successful runs of each version is compared with the one of the previous version.
+
+        Args:
+            threshold (float, optional): Minimum ratio between the two medians to report a slowdown
+            model_key (str, optional): Only consider the runs of this model
+            minimum_runs (int, optional): Minimum number of runs of each version for a comparison
+
+        Returns:
+            list[dict]: One entry per slowdown, largest first, with the keys 'model', 'instance', 'configuration',
+                'previous_version', 'version', 'previous_median', 'median' and 'ratio'
+        """
+        rows = self.__select("SELECT model, instance, configuration, conjure_version, runtime, timestamp FROM runs "
+                             "WHERE status IN ('SAT', 'UNSAT') AND conjure_version IS NOT NULL", model_key, None)
+        # (model, instance, configuration) -> version -> runtimes, versions in the order they were first recorded
+        groups = {}
+        for model, instance, configuration, version, runtime, _ in rows:
+            groups.setdefault((model, instance, configuration), {}).setdefault(version, []).append(runtime)
+        slowdowns = []
+        for (model, instance, configuration), versions in groups.items():
+            compared = [(v, median(r)) for v, r in versions.items() if len(r) >= minimum_runs]
+            for (previous_version, previous_median), (version, current_median) in zip(compared, compared[1:]):
+                if previous_median > 0 and current_median / previous_median >= threshold:
+                    slowdowns.append({'model': model, 'instance': instance, 'configuration': json_backend.loads(configuration),
+                                      'previous_version': previous_version, 'version': version,
+                                      'previous_median': previous_median, 'median': current_median,
+                                      'ratio': current_median / previous_median})
+        return sorted(slowdowns, key=lambda s: s['ratio'], reverse=True)
+
+    def runtime_over_time(self, model_key:str|None=None, bucket:float=86400.0, solver:str|None=None) -> list[dict]:
+        """
+        Get the median runtime of the successful runs over time, to spot gradual slowdowns.
+
+        Args:
+            model_key (str, optional): Only consider the runs of this model
+            bucket (float, optional): Width of each time bucket in seconds, one day by default
+            solver (str, optional): Only consider the runs of this solver
+
+        Returns:
+            list[dict]: One entry per non-empty bucket, oldest first, with the keys 'start', 'runs' and 'median'
+        """
+        query, params = "SELECT timestamp, runtime FROM runs WHERE status IN ('SAT', 'UNSAT')", []
+        if solver is not None:
+            # runs recorded before the default solver was stored have no solver
+            query += f" AND COALESCE(solver, '{DEFAULT_SOLVER}') = ?"
+            params.append(solver)
+        buckets = {}
+        for timestamp, runtime in self.__select(query, model_key, None, params):
+            buckets.setdefault(timestamp - timestamp % bucket, []).append(runtime)
+        return [{'start': start, 'runs': len(r), 'median': median(r)} for start, r in sorted(buckets.items())]
+
+    def info(self, key:str, model_key:str|None=None) -> list[tuple[int, float|str]]:
+        """
+        Get a statistic from the .eprime-info files of the recorded runs, e.g. 'SolverNodes'.
+
+        Args:
+            key (str): Name of the statistic
+            model_key (str, optional): Only consider the runs of this model
+
+        Returns:
+            list[tuple[int, float | str]]: Run id and value, numbers for numeric statistics
+        """
+        rows = self.__select("SELECT runs.id, info.number, info.text FROM runs JOIN info ON info.run = runs.id WHERE info.key = ?",
+                             model_key, None, [key])
+        return [(row[0], row[1] if row[1] is not None else row[2]) for row in rows]
+
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+        with self.__lock:
+            self.__connection.close()
+
+    def __select(self, query:str, model_key:str|None, since:float|None, params:list|None=None,
+                 group_by:str|None=None) -> list[tuple]:
+        """
+        Run a query on the runs, adding the common filters.
+
+        Args:
+            query (str): SELECT query on the runs table, with or without a WHERE clause
+            model_key (str, optional): Only select the runs of this model
+            since (float, optional): Only select the runs recorded after this timestamp
+            params (list, optional): Parameters of the query
+            group_by (str, optional): GROUP BY expression
+
+        Returns:
+            list[tuple]: Rows, ordered by run
+        """
+        params = list(params or [])
+        filters = []
+        if model_key is not None:
+            filters.append("runs.model = ?")
+            params.append(model_key)
+        if since is not None:
+            filters.append("runs.timestamp > ?")
+            params.append(since)
+        if len(filters) > 0:
+            query += (" AND " if " WHERE " in query else " WHERE ") + " AND ".join(filters)
+        if group_by is not None:
+            query += f" GROUP BY {group_by}"
+        query += " ORDER BY runs.id"
+        with self.__lock:
+            return self.__connection.execute(query, params).fetchall()
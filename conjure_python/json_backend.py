@@ -0,0 +1,207 @@
+import json
+from functools import lru_cache
+from typing import Any, Callable, IO, Iterator
+
+# backends are tried in this order when no backend is explicitly selected
+PREFERRED_BACKENDS = ['orjson', 'ujson', 'json']
+# containers with more elements than this are streamed one element at a time
+STREAM_THRESHOLD = 1024
+
+def _orjson_backend() -> tuple[Callable[[str|bytes], Any], Callable[[Any], str]]:
+    import orjson
+    def dumps(obj:Any) -> str:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            # orjson rejects integers wider than 64 bits and unknown types
+            return json.dumps(obj)
+    return orjson.loads, dumps
+
+def _ujson_backend() -> tuple[Callable[[str|bytes], Any], Callable[[Any], str]]:
+    import ujson
+    return ujson.loads, ujson.dumps
+
+def _json_backend() -> tuple[Callable[[str|bytes], Any], Callable[[Any], str]]:
+    return json.loads, json.dumps
+
+_BACKENDS = {
+    'orjson': _orjson_backend,
+    'ujson': _ujson_backend,
+    'json': _json_backend,
+}
+
+_backend_name = 'json'
+_loads, _dumps = _json_backend()
+
+def set_json_backend(name:str|None=None) -> str:
+    """
+    Select the JSON backend used to decode Conjure outputs and encode parameters.
+
+    Args:
+        name (str, optional): One of 'orjson', 'ujson' or 'json'. If None, the fastest installed backend is used
+
+    Returns:
+        str: Name of the selected backend
+
+    Raises:
+        Exception: If the requested backend is unknown or not installed
+    """
+    global _backend_name, _loads, _dumps
+    candidates = PREFERRED_BACKENDS if name is None else [name]
+    for candidate in candidates:
+        if candidate not in _BACKENDS:
+            raise Exception(f"unknown json backend {candidate}. Available backends are: {list(_BACKENDS.keys())}")
+        try:
+            _loads, _dumps = _BACKENDS[candidate]()
+        except ImportError:
+            if name is not None:
+                raise Exception(f"json backend {candidate} is not installed")
+            continue
+        _backend_name = candidate
+        return candidate
+    return _backend_name
+
+def get_json_backend() -> str:
+    """
+    Get the name of the JSON backend in use.
+
+    Returns:
+        str: Name of the backend
+    """
+    return _backend_name
+
+def loads(content:str|bytes) -> Any:
+    """
+    Decode a JSON document with the selected backend.
+
+    Args:
+        content (str | bytes): JSON document
+
+    Returns:
+        Any: Decoded document
+    """
+    return _loads(content)
+
+def load(file:IO) -> Any:
+    """
+    Decode a JSON file with the selected backend.
+
+    Args:
+        file (IO): Open file object
+
+    Returns:
+        Any: Decoded document
+    """
+    return _loads(file.read())
+
+def dumps(obj:Any) -> str:
+    """
+    Encode an object to a JSON string with the selected backend.
+
+    Args:
+        obj (Any): Object to encode
+
+    Returns:
+        str: JSON document
+    """
+    return _dumps(obj)
+
+def iterdumps(obj:Any, threshold:int=STREAM_THRESHOLD) -> Iterator[str]:
+    """
+    Encode an object to JSON in chunks, so large documents never exist as a single string.
+    Containers larger than the threshold are written element by element, anything smaller is encoded in one call.
+
+    Args:
+        obj (Any): Object to encode
+        threshold (int, optional): Size above which a container is streamed
+
+    Returns:
+        Iterator[str]: JSON chunks
+    """
+    yield from _iterdumps(obj, threshold, {})
+
+def _iterdumps(obj:Any, threshold:int, sizes:dict[int, int]) -> Iterator[str]:
+    if isinstance(obj, dict) and _estimate_size(obj, sizes) > threshold:
+        yield '{'
+        for i, (k, v) in enumerate(obj.items()):
+            yield (',' if i > 0 else '') + _dumps(str(k)) + ':'
+            yield from _iterdumps(v, threshold, sizes)
+        yield '}'
+    elif isinstance(obj, (list, tuple)) and _estimate_size(obj, sizes) > threshold:
+        yield '['
+        for i, v in enumerate(obj):
+            if i > 0:
+                yield ','
+            yield from _iterdumps(v, threshold, sizes)
+        yield ']'
+    else:
+        yield _dumps(obj)
+
+def _estimate_size(obj:Any, sizes:dict[int, int]) -> int:
+    # number of scalars in a container, assuming its elements look like the first one.
+    # sizes are kept by object id, so each container of the document is measured once
+    if not isinstance(obj, (dict, list, tuple)):
+        return 1
+    if id(obj) in sizes:
+        return sizes[id(obj)]
+    if isinstance(obj, dict):
+        size = len(obj) * max([_estimate_size(v, sizes) for v in obj.values()], default=1)
+    else:
+        size = len(obj) * (_estimate_size(obj[0], sizes) if len(obj) > 0 else 1)
+    sizes[id(obj)] = size
+    return size
+
+def dump(obj:Any, file:IO) -> None:
+    """
+    Encode an object to a JSON file, writing it in chunks.
+
+    Args:
+        obj (Any): Object to encode
+        file (IO): File open for writing text
+    """
+    for chunk in iterdumps(obj):
+        file.write(chunk)
+
+def is_matrix_encoding(values:dict) -> bool:
+    """
+    Check if a decoded JSON object is Conjure's encoding of a matrix indexed from 1, i.e. its keys are '1'..'n' in order.
+
+    Args:
+        values (dict): Decoded JSON object
+
+    Returns:
+        bool: True if the object encodes a 1-indexed matrix, False otherwise
+    """
+    return len(values) > 0 and list(values) == _index_keys(len(values))
+
+@lru_cache(maxsize=None)
+def _index_keys(size:int) -> list[str]:
+    return [str(i) for i in range(1, size + 1)]
+
+def decode_matrix(values:dict|list, value_type:Callable[[Any], Any]=lambda v: v, dimensions:int=1) -> list|None:
+    """
+    Decode Conjure's encoding of an int indexed matrix (nested objects keyed by '1'..'n') straight into nested lists.
+
+    Args:
+        values (dict | list): Decoded JSON matrix
+        value_type (Callable, optional): Conversion applied to each element
+        dimensions (int, optional): Number of dimensions of the matrix
+
+    Returns:
+        list | None: Nested lists of converted elements, None if some level is not indexed by '1'..'n'
+    """
+    if isinstance(values, dict):
+        if not is_matrix_encoding(values):
+            return None
+        values = list(values.values())
+    if dimensions == 1:
+        return list(map(value_type, values))
+    rows = []
+    for v in values:
+        row = decode_matrix(v, value_type, dimensions - 1)
+        if row is None:
+            return None
+        rows.append(row)
+    return rows
+
+set_json_backend()
@@ -1,10 +1,29 @@
-import json
+import os
+import threading
+import time
 from copy import deepcopy
-from typing import Any
+from re import MULTILINE, search
+from typing import Any, Callable, Iterator, Literal
 
-from .conjure import Conjure
-from .solution import EssenceSolution
-from .essence_types import EssenceFunction, EssenceMatrix, EssenceRecord, EssenceRelation, EssenceType, EssenceTuple, EssenceSet, EssenceSequence, is_bool, is_function, is_int, is_matrix, is_record, is_relation, is_tuple, is_set, is_sequence
+from os.path import abspath, isfile, join
+
+from .conjure import DEFAULT_SOLVER, TRANSLATABLE_SOLVERS, Conjure, MemoryLimitExceeded, iterate_callback
+from .encoder import encode_parameters
+from .generator import generate_instances
+from .solution import EssenceSolution, build_python_solution
+from .solution_store import SolutionStoreWriter
+from .parallel import select_representation, solve_cooperative, solve_partitioned
+from .tuning import apply_configuration, autotune, load_profile
+from .selection import RunHistory, Selector, instance_features, solver_timed_out
+from .history import HistoryDatabase
+from .conjure_cache import file_hash
+from .fingerprint import fingerprint
+from .tracing import Tracer, span
+from . import json_backend
+from .essence_types import EssenceType
+
+# history paths opening a HistoryDatabase
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
 
 class EssenceModel:
     """
@@ -25,21 +44,64 @@ class EssenceModel:
             **kwargs: Additional arguments for Conjure initialization
         """
         self.__model = model
+        self.__model_file = None
+        # declarations dumped by conjure, and the model text they were dumped from
+        self.__declarations = None
+        self.__declarations_model = None
         self.__solver = solver
         self.__time_limit = None
         self.__seed = None
         self.__threads = None
+        self.__number_of_solutions = None
+        self.__reuse_translation = False
+        self.__representation = None
+        self.__solver_options = None
+        self.__savilerow_options = None
+        self.__history = None
+        self.__memory_limit = None
+        self.__cpu_affinity = None
+        # set by cancel, each solve has its own so a late cancel cannot stop the next solve
+        self.__cancel_token = threading.Event()
         self.__conjure = Conjure(**kwargs)
         assert self.__conjure.available(), "conjure not available, please install it"
         self.__params = {}
 
+    @classmethod
+    def from_file(cls, path:str, solver:str|None=None, **kwargs) -> "EssenceModel":
+        """
+        Create a model backed by an Essence file.
+        The file is passed to Conjure in place, and its declarations are cached by file hash.
+
+        Args:
+            path (str): Path of the Essence model file
+            solver (str, optional): Solver name
+            **kwargs: Additional arguments for Conjure initialization
+
+        Returns:
+            EssenceModel: Model reading from the file
+
+        Raises:
+            Exception: If the file is not found
+        """
+        if not isfile(path):
+            raise Exception(f"model file {path} not found")
+        model = cls(solver=solver, **kwargs)
+        model.__model_file = abspath(path)
+        return model
+
     def append(self, new_constraint:str) -> None:
         """
         Append a new constraint to the model.
+        A model created from a file is read into memory first, the file itself is not modified.
+        The representation set on the model is dropped, as its Essence' model does not have the new constraint.
 
         Args:
             new_constraint (str): New constraint to add
         """
+        self.__representation = None
+        if self.__model_file is not None:
+            self.__model = self.get_model()
+            self.__model_file = None
         if self.__model != '':
             self.__model += '\n' + new_constraint
         else:
@@ -56,7 +118,8 @@ class EssenceModel:
 
     def set_random_seed(self, random_seed:int) -> None:
         """
-        Set the random seed for the solver.
+        Set the random seed for the solver. Minion, the default solver, does not take a seed, so an explicit solver
+        taking one must be set, see set_solver.
 
         Args:
             random_seed (int): Random seed value
@@ -81,11 +144,249 @@ class EssenceModel:
         """
         self.__threads = str(threads)
 
+    def set_memory_limit(self, memory_limit:int|None) -> None:
+        """
+        Limit the memory of the processes of each solve. The address space of conjure, savilerow and the solver is limited 
+        with RLIMIT_AS, and a solve that runs out of memory raises MemoryLimitExceeded. As the address space also counts 
+        memory reserved but not used, Conjure and the JVM of Savile Row need a limit of a few gigabytes to start.
+
+        Args:
+            memory_limit (int | None): Limit of each process in megabytes, None for no limit
+        """
+        assert memory_limit is None or memory_limit > 0, f"expected a positive memory limit, got {memory_limit}"
+        self.__memory_limit = memory_limit
+
+    def set_cpu_affinity(self, cpu_affinity:list[int]|None) -> None:
+        """
+        Pin the processes of each solve to some CPUs, e.g. to give concurrent solves their own cores.
+
+        Args:
+            cpu_affinity (list[int] | None): CPU numbers, None to run on any CPU
+        """
+        self.__cpu_affinity = None if cpu_affinity is None else list(cpu_affinity)
+
+    def set_solver_options(self, solver_options:str|None) -> None:
+        """
+        Set additional options for the solver, e.g. search heuristics. They are added to the options built from the 
+        time limit, seed and threads, and for Minion they replace the default '-varorder domoverwdeg -preprocess GAC'.
+
+        Args:
+            solver_options (str | None): Solver options, None for the defaults
+        """
+        self.__solver_options = solver_options
+
+    def set_savilerow_options(self, savilerow_options:str|None) -> None:
+        """
+        Set the options passed to Savile Row, e.g. the optimisation level '-O3'.
+
+        Args:
+            savilerow_options (str | None): Savile Row options, None for Conjure's defaults
+        """
+        self.__savilerow_options = savilerow_options
+
+    def use_profile(self, name:str) -> None:
+        """
+        Apply a solver configuration saved as a named profile, e.g. by autotune.
+
+        Args:
+            name (str): Name of the profile
+
+        Raises:
+            Exception: If the profile does not exist
+        """
+        apply_configuration(self, load_profile(name))
+
+    def autotune(self, instances:list[dict|str], search_space:dict[str, list], profile:str|None=None, budget:float|None=None, 
+                 time_limit:int|None=None, statistic:str="mean", max_workers:int|None=None) -> dict:
+        """
+        Benchmark solver configurations in parallel on training instances and pick the fastest one.
+
+        Args:
+            instances (list[dict | str]): Training parameters, as dicts or parameter file paths
+            search_space (dict[str, list]): Values to try for each configuration key, among 'solver', 'solver_options', 
+                'savilerow_options' and 'threads'. Every combination is benchmarked
+            profile (str, optional): Save the best configuration under this name, to be loaded with use_profile
+            budget (float, optional): Wall-clock budget in seconds. No new run starts once it is spent, 
+                and configurations that were not run on every instance are not ranked
+            time_limit (int, optional): Time limit of each run in seconds. Failed and timed out runs count as ten times the limit
+            statistic (str, optional): Runtime statistic to minimise: 'mean', 'median', 'max' or a percentile such as 'p90'
+            max_workers (int, optional): Maximum number of runs at once. Defaults to the number of CPUs
+
+        Returns:
+            dict: 'configuration' (the best configuration), 'score' (its statistic) and 'results' 
+                (every ranked configuration with its 'runtimes' and 'score', best first)
+
+        Raises:
+            Exception: If no configuration could be ranked within the budget
+        """
+        return autotune(self, instances, search_space, profile, budget, time_limit, statistic, max_workers)
+
+    def set_number_of_solutions(self, number_of_solutions:int|str) -> None:
+        """
+        Set the number of solutions Conjure looks for.
+
+        Args:
+            number_of_solutions (int | str): Number of solutions, or 'all' to enumerate every solution
+        """
+        assert number_of_solutions == 'all' or int(number_of_solutions) > 0, f"expected a positive number or 'all', got {number_of_solutions}"
+        self.__number_of_solutions = str(number_of_solutions)
+
+    def set_reuse_translation(self, reuse_translation:bool=True) -> None:
+        """
+        Keep the solver input translated for each model and parameters, so later solves with other seeds, 
+        time limits or solver options only run the back-end solver. Only used for Minion, Kissat and Lingeling, 
+        when looking for a single solution without on_solution, trace or store.
+
+        Args:
+            reuse_translation (bool, optional): Whether translations are reused
+        """
+        self.__reuse_translation = reuse_translation
+
+    def generate_representations(self, portfolio_size:int) -> list[str]:
+        """
+        Ask Conjure for a portfolio of alternative Essence' models of this model, one per choice of representations.
+
+        Args:
+            portfolio_size (int): Maximum number of models
+
+        Returns:
+            list[str]: Paths of the generated Essence' models
+
+        Raises:
+            Exception: If Conjure execution fails
+        """
+        return self.__conjure.generate_models(portfolio_size, self.__model if self.__model_file is None else None, self.__model_file)
+
+    def set_representation(self, eprime_file:str|None, remember:bool=False) -> None:
+        """
+        Solve an Essence' model in place of the one chosen by Conjure's default heuristic.
+
+        Args:
+            eprime_file (str | None): Path of the Essence' model, e.g. one from generate_representations. 
+                None goes back to the default heuristic
+            remember (bool, optional): Also save the choice for later solves of the same model, in this and other sessions
+        """
+        if eprime_file is not None and remember:
+            eprime_file = self.__conjure.save_representation(eprime_file, self.__model if self.__model_file is None else None, self.__model_file)
+        self.__representation = eprime_file
+
+    def get_representation(self) -> str|None:
+        """
+        Get the Essence' model solved in place of Conjure's default choice, either set on this model 
+        or saved by an earlier set_representation or select_representation on the same model.
+
+        Returns:
+            str | None: Path of the Essence' model, None when Conjure's default heuristic is used
+        """
+        if self.__representation is not None:
+            return self.__representation
+        return self.__conjure.get_saved_representation(self.__model if self.__model_file is None else None, self.__model_file)
+
+    def select_representation(self, instances:list[dict|str], portfolio_size:int=4, max_workers:int|None=None) -> list[dict]:
+        """
+        Generate a portfolio of alternative Essence' models, benchmark them in parallel on sample instances 
+        and remember the fastest one for later solves of this model.
+
+        Args:
+            instances (list[dict | str]): Sample parameters, as dicts or parameter file paths
+            portfolio_size (int, optional): Maximum number of alternative models
+            max_workers (int, optional): Maximum number of solves run at once. Defaults to the number of CPUs
+
+        Returns:
+            list[dict]: One entry per alternative model, best first, with the keys 'model' (path of the Essence' model), 
+                'time' (total solving time in seconds over the instances) and 'failures' (number of failed solves)
+
+        Raises:
+            Exception: If Conjure cannot generate the portfolio or every alternative fails
+        """
+        return select_representation(self, instances, portfolio_size, max_workers)
+
+    def generate_instances(self, count:int, seed:int=0, sizes:dict[str, int]|None=None, fixed:dict[str, Any]|None=None,
+                           directory:str|None=None) -> list[dict]|list[str]:
+        """
+        Sample random instances of the model from the domains of its 'given' declarations.
+        The instance i is sampled with the seed seed + i, so the same arguments always give the same instances.
+
+        Args:
+            count (int): Number of instances
+            seed (int, optional): Seed of the first instance
+            sizes (dict[str, int], optional): Size of the collections of each parameter (sets, sequences, relations
+                and non-total functions) whose size is not fixed by its domain
+            fixed (dict[str, Any], optional): Parameters with a fixed value, e.g. {'n': 100} to control the size of the instances
+            directory (str, optional): Write each instance to a JSON parameter file in this directory,
+                e.g. for the benchmark command line, and return the paths
+
+        Returns:
+            list[dict] | list[str]: Instances, ready for solve, or the paths of their parameter files
+
+        Raises:
+            Exception: If a domain cannot be sampled, e.g. an enumerated type without a fixed value
+        """
+        essence_in = [p for p in self.get_all_model_params() if p['kind'] == "Given"]
+        instances = generate_instances(essence_in, count, seed, sizes, fixed)
+        if directory is None:
+            return instances
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for i, instance in enumerate(instances):
+            path = join(directory, f'instance-{seed + i}.json')
+            with open(path, 'w') as f:
+                f.write(json_backend.dumps(encode_parameters(instance, essence_in)))
+            paths.append(path)
+        return paths
+
+    def get_number_of_solutions(self) -> str|None:
+        """
+        Get the number of solutions Conjure looks for.
+
+        Returns:
+            str | None: Number of solutions, 'all', or None for Conjure's default (one solution)
+        """
+        return self.__number_of_solutions
+
+    def get_model(self) -> str:
+        """
+        Get the Essence model string, reading it from the model file if the model was created from one.
+
+        Returns:
+            str: Essence model string
+        """
+        if self.__model_file is not None:
+            with open(self.__model_file) as f:
+                return f.read()
+        return self.__model
+
+    def copy(self, **kwargs) -> "EssenceModel":
+        """
+        Create an independent copy of the model, with the same solver configuration and parameters.
+
+        Args:
+            **kwargs: Arguments for Conjure initialization of the copy, e.g. its own cache_dir
+
+        Returns:
+            EssenceModel: Copy of the model
+        """
+        model = EssenceModel(self.__model, self.__solver, **kwargs)
+        model.__model_file = self.__model_file
+        model.__declarations, model.__declarations_model = self.__declarations, self.__declarations_model
+        model.__time_limit, model.__seed, model.__threads = self.__time_limit, self.__seed, self.__threads
+        model.__number_of_solutions = self.__number_of_solutions
+        model.__reuse_translation = self.__reuse_translation
+        model.__representation = self.__representation
+        model.__memory_limit, model.__cpu_affinity = self.__memory_limit, self.__cpu_affinity
+        if 'tracer' not in kwargs:
+            model.set_tracer(self.get_tracer())
+        model.__solver_options, model.__savilerow_options = self.__solver_options, self.__savilerow_options
+        model.__history = self.__history
+        model.__params = dict(self.__params)
+        return model
+
     def clear_model(self) -> None:
         """
         Clear the current model string.
         """
         self.__model = ""
+        self.__model_file = None
 
     def clear_parameters(self) -> None:
         """
@@ -110,8 +411,17 @@ class EssenceModel:
         """
         self.__params[name] = value
 
+    def get_parameters(self) -> dict:
+        """
+        Get the parameters added to the model.
+
+        Returns:
+            dict: Copy of the parameters by name
+        """
+        return dict(self.__params)
+
     def __get_essence_representation(self) -> tuple[list[dict], list[dict]]:
-        essence_params = self.__conjure.get_model_parameters(self.__model)
+        essence_params = self.get_all_model_params()
         params, out = [], []
         for param in essence_params:
             if param['kind'] == "Given":
@@ -120,14 +430,120 @@ class EssenceModel:
                 out.append({'name': param['name'], 'domain': param['domain']})
         return params, out
 
-    def solve(self, parameters:dict|None=None, solver_arguments:str|None=None) -> EssenceSolution:
+    def solve(self, parameters:dict|str|None=None, solver_arguments:str|None=None, 
+              on_solution:Callable[[dict[str, EssenceType]], None]|None=None, trace:bool=False, store:str|None=None, 
+              solver:str|None=None, memory_limit:int|None=None, cpu_affinity:list[int]|None=None) -> EssenceSolution:
         """
         Solve the model with given parameters and solver arguments. 
         if no parameters are given, the ones set in the model are used. if no solver arguments are given, the ones set in the model are used. 
         if no solver is set, the default solver is used.
+        Parameters are converted to Conjure's format following their declared domains, so they can be given as python
+        collections, NumPy arrays or EssenceType objects (e.g. the solution of a previous solve).
+        Parameters can also be the path of an existing parameter file (.json or .param), which is passed to Conjure in place.
+
         Args:
-            parameters (dict, optional): Parameters for the model
+            parameters (dict | str, optional): Parameters for the model, or the path of a parameter file
             solver_arguments (str, optional): Additional solver arguments
+            on_solution (Callable[[dict[str, EssenceType]], None], optional): Called with each solution, converted to 
+                EssenceType python objects, as soon as Conjure writes it. It may be called from a watcher thread.
+                Conjure writes the solutions once the solver has finished, so this is not a live view of the search
+            trace (bool, optional): Record every intermediate solution with its objective value, in the order they were found.
+                The objective value is recorded when the objective is a decision variable, None otherwise.
+                For optimisation models all the improving solutions are requested, and the trace is available as 
+                EssenceSolution.trace. Entries are not timed by the solver: Conjure writes the solution files only 
+                once the solver has finished, so their 'delivered' time only says when each one was picked up
+            store (str, optional): Path of an on-disk solution store. Solutions are written to it as soon as they are found
+                instead of being kept in memory, and the returned EssenceSolution reads them back from disk when accessed.
+                Meant for enumerations with more solutions than fit in memory
+            solver (str, optional): Solver for this solve only, in place of the one set on the model. 'auto' picks the 
+                configuration that was fastest on similar instances in the run history (see set_history)
+            memory_limit (int, optional): Memory limit in megabytes for this solve only, see set_memory_limit
+            cpu_affinity (list[int], optional): CPUs for this solve only, see set_cpu_affinity
+
+        Returns:
+            EssenceSolution: Solution object containing results
+
+        Raises:
+            MemoryLimitExceeded: If the solve runs out of memory under the memory limit
+            Exception: If parameters are missing
+        """
+        # the token is made before any work, so a cancel while the solve is prepared is not lost
+        self.__cancel_token = threading.Event()
+        return self.__solve_configured(parameters, solver_arguments, on_solution, trace, store, solver, memory_limit, cpu_affinity)
+
+    def __solve_configured(self, parameters:dict|str|None, solver_arguments:str|None, 
+                           on_solution:Callable[[dict[str, EssenceType]], None]|None, trace:bool, store:str|None, 
+                           solver:str|None=None, memory_limit:int|None=None, cpu_affinity:list[int]|None=None) -> EssenceSolution:
+        """
+        Solve the model with the solver, memory limit and CPUs given for this solve only, see solve.
+
+        Returns:
+            EssenceSolution: Solution object containing results
+
+        Raises:
+            Exception: If parameters are missing
+        """
+        if memory_limit is not None or cpu_affinity is not None:
+            saved = (self.__memory_limit, self.__cpu_affinity)
+            if memory_limit is not None:
+                self.set_memory_limit(memory_limit)
+            if cpu_affinity is not None:
+                self.set_cpu_affinity(cpu_affinity)
+            try:
+                return self.__solve_configured(parameters, solver_arguments, on_solution, trace, store, solver)
+            finally:
+                self.__memory_limit, self.__cpu_affinity = saved
+        if solver is not None:
+            return self.__solve_with(solver, parameters, solver_arguments, on_solution, trace, store)
+        instance = parameters if isinstance(parameters, str) else None
+        with span(self.get_tracer(), 'solve', solver=self.__solver or DEFAULT_SOLVER, instance=instance) as solve_span:
+            result = self.__solve_recorded(parameters, solver_arguments, on_solution, trace, store)
+            result.resources = self.get_resources()
+            if solve_span is not None:
+                solve_span['attributes'].update({'state': result.state, 'solutions': len(result)})
+            return result
+
+    def __solve_recorded(self, parameters:dict|str|None, solver_arguments:str|None, 
+                         on_solution:Callable[[dict[str, EssenceType]], None]|None, trace:bool, store:str|None) -> EssenceSolution:
+        """
+        Solve the model, recording the run in the history if one is set, see solve.
+
+        Returns:
+            EssenceSolution: Solution object containing results
+
+        Raises:
+            Exception: If parameters are missing
+        """
+        if self.__history is None:
+            return self.__solve(parameters, solver_arguments, on_solution, trace, store)
+        params = self.__params if parameters is None else parameters
+        features, instance_key = self.__instance_features(params), self.__instance_key(params)
+        configuration = self.__get_configuration()
+        try:
+            arguments = solver_arguments if solver_arguments is not None else self.__build_solver_args()
+        except Exception:
+            arguments = None
+        details = {'instance_key': instance_key, 'solver_arguments': arguments, 'conjure_version': Conjure.version()}
+        start = time.perf_counter()
+        try:
+            result = self.__solve(parameters, solver_arguments, on_solution, trace, store)
+        except Exception as e:
+            if self.get_progress()['phase'] != 'cancelled':
+                status = 'memout' if isinstance(e, MemoryLimitExceeded) else 'error'
+                self.__history.record(self.__model_key(), features, configuration, time.perf_counter() - start, status, 
+                                      phases=self.get_progress()['phases'], resources=self.get_resources(), **details)
+            raise
+        runtime = time.perf_counter() - start
+        info = self.getStats()
+        status = 'timeout' if solver_timed_out(info) else result.state
+        self.__history.record(self.__model_key(), features, configuration, runtime, status, info, 
+                              phases=self.get_progress()['phases'], resources=self.get_resources(), **details)
+        return result
+
+    def __solve(self, parameters:dict|str|None, solver_arguments:str|None, on_solution:Callable[[dict[str, EssenceType]], None]|None, 
+                trace:bool, store:str|None) -> EssenceSolution:
+        """
+        Solve the model, see solve.
 
         Returns:
             EssenceSolution: Solution object containing results
@@ -137,7 +553,7 @@ class EssenceModel:
         """
         params = self.__params if parameters is None else parameters
         essence_in, essence_out = self.__get_essence_representation()
-        if not self.check_params(params, essence_in):
+        if not isinstance(params, str) and not self.check_params(params, essence_in):
             raise Exception('missing parameters')
         if solver_arguments is None:
             solver_arguments = self.__build_solver_args()
@@ -146,17 +562,347 @@ class EssenceModel:
             solver_args += [f"--solver={self.__solver}"]
         if solver_arguments != "":
             solver_args += [f'--solver-options="{solver_arguments}"']
-        if len(params.keys()) > 0:
-            raw_solution = self.__conjure.solve(self.__model, json.dumps(params), *solver_args)
+        if self.__savilerow_options is not None:
+            solver_args += [f'--savilerow-options="{self.__savilerow_options}"']
+        if self.__number_of_solutions is not None:
+            solver_args += [f'--number-of-solutions={self.__number_of_solutions}']
+        domains = {param['name']: param['domain'] for param in essence_out}
+        solver = self.__solver if self.__solver is not None else DEFAULT_SOLVER
+        if self.__reuse_translation and solver in TRANSLATABLE_SOLVERS and self.__number_of_solutions is None \
+                and on_solution is None and not trace and store is None:
+            raw_solution = self.__solve_translated(params, essence_in, solver, solver_arguments)
+            python_essence_solution = self.__build_essence_solution(raw_solution, (essence_in, essence_out))
+            return EssenceSolution(raw_solution, python_essence_solution, domains=domains)
+        if on_solution is None and not trace and store is None:
+            raw_solution = self.__run_conjure(params, essence_in, solver_args)
             python_essence_solution = self.__build_essence_solution(raw_solution, (essence_in, essence_out))
-            return EssenceSolution(raw_solution, python_essence_solution)
-        raw_solution = self.__conjure.solve(self.__model, None, *solver_args)
-        python_essence_solution = self.__build_essence_solution(raw_solution, (essence_in, essence_out))
-        return EssenceSolution(raw_solution, python_essence_solution)
+            return EssenceSolution(raw_solution, python_essence_solution, domains=domains)
+
+        objective = self.get_objective()
+        if trace and objective is not None and self.__number_of_solutions is None:
+            # conjure reports every improving solution, not only the optimal one
+            solver_args += ['--number-of-solutions=all']
+        python_essence_solution, solutions_trace = [], []
+        writer = SolutionStoreWriter(store, domains) if store is not None else None
+        start = time.time()
+        def deliver(raw:dict) -> None:
+            value = raw.get(objective[1]) if objective is not None else None
+            solutions_trace.append({'objective': value, 'delivered': time.time() - start})
+            if writer is not None:
+                writer.append(raw)
+                if on_solution is not None:
+                    on_solution(build_python_solution(raw, domains))
+                return
+            python_essence_solution.append(build_python_solution(raw, domains))
+            if on_solution is not None:
+                on_solution(python_essence_solution[-1])
+        if writer is None:
+            raw_solution = self.__run_conjure(params, essence_in, solver_args, deliver)
+            return EssenceSolution(raw_solution, python_essence_solution, trace=solutions_trace if trace else None, domains=domains)
+        try:
+            self.__run_conjure(params, essence_in, solver_args, deliver, keep_solutions=False)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close(solutions_trace if trace else None)
+        return EssenceSolution.load(store)
+
+    def __solve_with(self, solver:str, parameters:dict|str|None, solver_arguments:str|None, 
+                     on_solution:Callable[[dict[str, EssenceType]], None]|None, trace:bool, store:str|None) -> EssenceSolution:
+        """
+        Solve the model with another solver, or the configuration chosen by the selector, restoring the model configuration afterwards.
+
+        Returns:
+            EssenceSolution: Solution object containing results
+
+        Raises:
+            Exception: If parameters are missing
+        """
+        configuration = {'solver': solver}
+        if solver == 'auto':
+            configuration = self.select_configuration(parameters) or {'solver': self.__solver}
+        saved = (self.__solver, self.__solver_options, self.__savilerow_options, self.__threads)
+        self.__solver = configuration.get('solver', self.__solver)
+        self.__solver_options = configuration.get('solver_options', self.__solver_options)
+        self.__savilerow_options = configuration.get('savilerow_options', self.__savilerow_options)
+        threads = configuration.get('threads', self.__threads)
+        self.__threads = None if threads is None else str(threads)
+        try:
+            return self.__solve_configured(parameters, solver_arguments, on_solution, trace, store)
+        finally:
+            self.__solver, self.__solver_options, self.__savilerow_options, self.__threads = saved
+
+    def set_tracer(self, tracer:Tracer|None) -> None:
+        """
+        Record the steps of every solve of the model as nested spans: parameter encoding, each Conjure phase, 
+        the translation steps and the solver, and the conversion of the solutions. Copies of the model, e.g. the workers
+        of the batch APIs, share the tracer, which also records the time their solves wait for a worker.
+
+        Args:
+            tracer (Tracer | None): Tracer, None stops tracing
+        """
+        self.__conjure.tracer = tracer
+
+    def get_tracer(self) -> Tracer|None:
+        """
+        Get the tracer recording the solves of the model.
+
+        Returns:
+            Tracer | None: Tracer, None if solves are not traced
+        """
+        return self.__conjure.tracer
+
+    def set_history(self, history:RunHistory|HistoryDatabase|str|None) -> None:
+        """
+        Record every solve of the model: the model and instance hashes, the features of the instance, 
+        the solver configuration and arguments, the runtime and time spent in each phase, the .eprime-info statistics, 
+        the resources used by Conjure and the solver, the Conjure version and the outcome.
+        The history is what solve(solver="auto") learns from.
+
+        Args:
+            history (RunHistory | HistoryDatabase | str | None): History, or the path of its file. Paths ending in .db, 
+                .sqlite or .sqlite3 open a HistoryDatabase, other paths a JSON lines RunHistory. None stops recording
+        """
+        if isinstance(history, str):
+            history = HistoryDatabase(history) if history.endswith(SQLITE_SUFFIXES) else RunHistory(history)
+        self.__history = history
+
+    def get_history(self) -> RunHistory|HistoryDatabase|None:
+        """
+        Get the history the solves of the model are recorded in.
+
+        Returns:
+            RunHistory | HistoryDatabase | None: History, None if solves are not recorded
+        """
+        return self.__history
+
+    def select_configuration(self, parameters:dict|str|None=None) -> dict|None:
+        """
+        Choose the solver configuration for an instance, from the runs of this model recorded on similar instances.
+
+        Args:
+            parameters (dict | str, optional): Parameters of the instance. If None, the ones set in the model are used
+
+        Returns:
+            dict | None: Chosen configuration, None if the history has no comparable runs
+        """
+        history = self.__history if self.__history is not None else RunHistory()
+        params = self.__params if parameters is None else parameters
+        return Selector(history.runs(self.__model_key())).select(self.__instance_features(params))
+
+    def __instance_features(self, params:dict|str) -> dict[str, float]:
+        """
+        Extract the features of an instance, see instance_features.
+
+        Args:
+            params (dict | str): Parameters, or the path of a parameter file
+
+        Returns:
+            dict[str, float]: Features, empty for Essence parameter files
+        """
+        if isinstance(params, str):
+            if not params.endswith('.json'):
+                return {}
+            with open(params, 'rb') as f:
+                return instance_features(json_backend.load(f))
+        essence_in, _ = self.__get_essence_representation()
+        return instance_features(self.__encode(params, essence_in))
+
+    def __instance_key(self, params:dict|str) -> str:
+        """
+        Get a hash identifying an instance in the run history.
+
+        Args:
+            params (dict | str): Parameters, or the path of a parameter file
+
+        Returns:
+            str: Hex digest of the parameters
+        """
+        if isinstance(params, str):
+            return file_hash(params)
+        essence_in, _ = self.__get_essence_representation()
+        return fingerprint(self.__encode(params, essence_in))
+
+    def __get_configuration(self) -> dict:
+        """
+        Get the solver configuration of the model, as recorded in the run history.
+
+        Returns:
+            dict: Solver configuration
+        """
+        return {'solver': self.__solver, 'solver_options': self.__solver_options, 'savilerow_options': self.__savilerow_options, 
+                'threads': None if self.__threads is None else int(self.__threads)}
+
+    def __model_key(self) -> str:
+        """
+        Get the key identifying the model in the run history.
+
+        Returns:
+            str: Key of the model
+        """
+        return Conjure.model_key(self.__model if self.__model_file is None else None, self.__model_file)
+
+    def solve_partitioned(self, var:str, parts:int, parameters:dict|None=None, solver_arguments:str|None=None, 
+                          mode:Literal["first", "all", "best"]|None=None, max_workers:int|None=None) -> EssenceSolution:
+        """
+        Solve the model in parallel, splitting the domain of a decision variable into disjoint parts (cube and conquer).
+        The first solution wins for satisfaction models, solutions are merged when enumerating every solution 
+        (see set_number_of_solutions) and the best objective wins for optimisation models.
+
+        Args:
+            var (str): Name of a decision variable with a bounded int or bool domain
+            parts (int): Number of parts
+            parameters (dict, optional): Parameters for the model. If None, the ones set in the model are used
+            solver_arguments (str, optional): Additional solver arguments
+            mode (Literal["first", "all", "best"], optional): Overrides how the results of the parts are merged
+            max_workers (int, optional): Maximum number of parts solved at once. Defaults to the number of parts, 
+                at most the number of CPUs
+
+        Returns:
+            EssenceSolution: Merged solutions
+
+        Raises:
+            Exception: If the variable cannot be partitioned or a part fails
+        """
+        return solve_partitioned(self, var, parts, parameters, solver_arguments, mode, max_workers)
+
+    def solve_cooperative(self, seeds:list[int]|int, rounds:int, parameters:dict|None=None, solver_arguments:str|None=None, 
+                          round_time:int|None=None) -> EssenceSolution:
+        """
+        Solve an optimisation model with several random seeds in parallel, at most one per CPU. After each round the best 
+        objective found is shared, and every seed restarts with a constraint requiring a better solution.
+        The seeds need a solver taking one, set with set_solver: Minion, the default solver, does not.
+
+        Args:
+            seeds (list[int] | int): Random seeds, or a number of seeds starting from 0
+            rounds (int): Maximum number of rounds, fewer are run if a round finds no improvement
+            parameters (dict, optional): Parameters for the model. If None, the ones set in the model are used
+            solver_arguments (str, optional): Additional solver arguments
+            round_time (int, optional): Time limit of each round in seconds. Defaults to the time limit of the model
+
+        Returns:
+            EssenceSolution: Best solution, with the trace of the improving solutions (see convergence())
+
+        Raises:
+            Exception: If the model is not an optimisation model or a worker fails
+        """
+        return solve_cooperative(self, seeds, rounds, parameters, solver_arguments, round_time)
+
+    def get_objective(self) -> tuple[str, str]|None:
+        """
+        Get the objective of the model.
+
+        Returns:
+            tuple[str, str] | None: Direction ('minimising' or 'maximising') and objective expression, None for satisfaction models
+        """
+        model = self.get_model()
+        # '$' starts a comment in Essence
+        model = '\n'.join([line.split('$')[0] for line in model.splitlines()])
+        match = search(r'\b(minimising|maximising)\s+(.+?)\s*$', model, MULTILINE)
+        if match is None:
+            return None
+        return match.group(1), match.group(2)
+
+    def solve_iter(self, parameters:dict|str|None=None, solver_arguments:str|None=None) -> Iterator[dict[str, EssenceType]]:
+        """
+        Solve the model, yielding each solution as soon as Conjure writes it. 
+        Parameters and solver arguments work as in solve. Conjure writes the solutions only once the solver has 
+        finished, so the iterator does not follow the search as it runs, it only saves keeping all the solutions in memory.
+
+        Args:
+            parameters (dict | str, optional): Parameters for the model, or the path of a parameter file
+            solver_arguments (str, optional): Additional solver arguments
+
+        Returns:
+            Iterator[dict[str, EssenceType]]: Solutions converted to EssenceType python objects
+
+        Raises:
+            Exception: If parameters are missing or Conjure execution fails
+        """
+        return iterate_callback(lambda on_solution: self.solve(parameters, solver_arguments, on_solution=on_solution))
+
+    def __run_conjure(self, params:dict|str, essence_in:list[dict], solver_args:list[str], 
+                      on_solution:Callable[[dict], None]|None=None, keep_solutions:bool=True) -> list[dict]:
+        """
+        Run Conjure on the model, passing the parameters in the most direct way available.
+
+        Args:
+            params (dict | str): Parameters for the model, or the path of a parameter file
+            essence_in (list[dict]): Declarations of the model parameters
+            solver_args (list[str]): Arguments for Conjure
+            on_solution (Callable[[dict], None], optional): Called with each raw solution as soon as Conjure writes it
+            keep_solutions (bool, optional): If False, solutions are only delivered to on_solution and not returned
+
+        Returns:
+            list[dict]: Raw solutions
+        """
+        options = {'on_solution': on_solution, 'keep_solutions': keep_solutions, 'existing_model': self.get_representation(), 
+                   'memory_limit': self.__memory_limit, 'cpu_affinity': self.__cpu_affinity, 'cancel_token': self.__cancel_token}
+        if self.__model_file is not None:
+            if isinstance(params, str):
+                return self.__conjure.solve_file(self.__model_file, params, *solver_args, **options)
+            encoded = self.__encode(params, essence_in) if len(params.keys()) > 0 else None
+            return self.__conjure.solve_file(self.__model_file, None, *solver_args, parameter=encoded, **options)
+        if isinstance(params, str):
+            return self.__conjure.solve(self.__model, None, *solver_args, parameter_file=params, **options)
+        if len(params.keys()) > 0:
+            return self.__conjure.solve(self.__model, self.__encode(params, essence_in), *solver_args, **options)
+        return self.__conjure.solve(self.__model, None, *solver_args, **options)
+
+    def __encode(self, params:dict, essence_in:list[dict]) -> dict:
+        """
+        Convert parameters to Conjure's JSON format, see encode_parameters.
+
+        Args:
+            params (dict): Parameters for the model
+            essence_in (list[dict]): Declarations of the model parameters
+
+        Returns:
+            dict: JSON-compatible parameters
+        """
+        with span(self.get_tracer(), 'encode parameters'):
+            return encode_parameters(params, essence_in)
+
+    def __solve_translated(self, params:dict|str, essence_in:list[dict], solver:str, solver_options:str) -> list[dict]:
+        """
+        Solve the model reusing the solver input translated by earlier solves with the same parameters.
+
+        Args:
+            params (dict | str): Parameters for the model, or the path of a parameter file
+            essence_in (list[dict]): Declarations of the model parameters
+            solver (str): Back-end solver
+            solver_options (str): Options for the back-end solver
+
+        Returns:
+            list[dict]: Raw solutions
+        """
+        parameter_file = params if isinstance(params, str) else None
+        parameter = self.__encode(params, essence_in) if not isinstance(params, str) and len(params.keys()) > 0 else None
+        return self.__conjure.solve_translated(self.__model if self.__model_file is None else None, parameter, solver, solver_options, 
+                                               model_file=self.__model_file, parameter_file=parameter_file, 
+                                               existing_model=self.get_representation(), 
+                                               savilerow_options=self.__savilerow_options or "", 
+                                               memory_limit=self.__memory_limit, cpu_affinity=self.__cpu_affinity, 
+                                               cancel_token=self.__cancel_token)
 
     def __build_solver_args(self) -> str:
         """
-        Build solver-specific arguments string.
+        Build solver-specific arguments string, followed by the solver options set on the model.
+
+        Returns:
+            str: Solver arguments string
+
+        Raises:
+            Exception: If invalid solver configuration is provided
+        """
+        limit_args = self.__build_limit_args()
+        if self.__solver_options is None:
+            return limit_args
+        return f"{limit_args} {self.__solver_options}".strip()
+
+    def __build_limit_args(self) -> str:
+        """
+        Build the solver-specific arguments for the time limit, random seed and threads.
 
         Returns:
             str: Solver arguments string
@@ -166,13 +912,15 @@ class EssenceModel:
         """
         if self.__time_limit is None and self.__threads is None and self.__seed is None:
             return ""
-        if self.__solver is None:
+        if self.__solver is None or self.__solver == "minion":
             if self.__threads is not None:
                 raise Exception("thread configuration not available for Minion solver")
             if self.__seed is not None:
-                raise Exception("random seed configuration not available for Minion solver")
+                raise Exception("random seed configuration not available for Minion solver, the default solver. "
+                                "Set a solver that takes a seed, e.g. set_solver('kissat')")
             solver_str = "" if self.__time_limit is None else f"-cpulimit {self.__time_limit} "
-            return solver_str + "-varorder domoverwdeg -preprocess GAC"
+            # the default heuristics give way to the solver options set on the model
+            return solver_str + ("-varorder domoverwdeg -preprocess GAC" if self.__solver_options is None else "")
         elif self.__solver == "chuffed":
             if self.__threads is not None:
                 raise Exception("thread configuration not available for Chuffed solver")
@@ -219,35 +967,40 @@ class EssenceModel:
             list[dict[str, EssenceType]]: List of solutions with Essence types
         """
         _, essence_out = essence_representation
-        essence_out = deepcopy(essence_out)
-        out_param_dict = {}
-        solutions = []
-        for sol in solution:
-            new_sol = {}
-            for name in sol.keys():
-                dom = out_param_dict[name]['domain']
-                if is_matrix(dom):
-                    new_sol[name] = EssenceMatrix(sol[name], dom)
-                elif is_function(dom):
-                    new_sol[name] = EssenceFunction(sol[name], dom)
-                elif is_relation(dom):
-                    new_sol[name] = EssenceRelation(sol[name], dom)
-                elif is_tuple(dom):
-                    new_sol[name] = EssenceTuple(sol[name], dom)
-                elif is_record(dom):
-                    new_sol[name] = EssenceRecord(sol[name], dom)
-                elif is_int(dom):
-                    new_sol[name] = int(sol[name])
-                elif is_bool(dom):
-                    new_sol[name] = bool(sol[name])
-                elif is_set(dom):
-                    new_sol[name] = EssenceSet(sol[name], dom)
-                elif is_sequence(dom):
-                    new_sol[name] = EssenceSequence(sol[name], dom)
-                else:
-                    new_sol[name] = sol[name]
-            solutions.append(new_sol)
-        return solutions
+        domains = {param['name']: param['domain'] for param in essence_out}
+        with span(self.get_tracer(), 'build solutions', solutions=len(solution)):
+            return [build_python_solution(sol, domains) for sol in solution]
+
+    def get_resources(self) -> dict|None:
+        """
+        Get the resources used by the processes of the current, or last, solve of the model, measured with wait4 
+        on Conjure, Savile Row and the solver, so concurrent solves are measured separately.
+
+        Returns:
+            dict | None: 'user_time', 'system_time' and 'wall_time' in seconds, 'max_rss' the peak memory of the largest 
+                process in kilobytes, and 'processes' the number of processes run. None before the first solve
+        """
+        return self.__conjure.get_resources()
+
+    def get_progress(self) -> dict:
+        """
+        Get the progress of the current, or last, solve. Can be called from another thread while solving.
+
+        Returns:
+            dict: Current phase, number of solutions found so far and elapsed time in seconds
+        """
+        return self.__conjure.get_progress()
+
+    def cancel(self) -> bool:
+        """
+        Cancel the running solve from another thread. The cancelled solve raises an exception, also when it had not 
+        started its Conjure process yet. A cancel after the solve finished has no effect on the next one.
+
+        Returns:
+            bool: True if a running process was killed, False otherwise
+        """
+        self.__cancel_token.set()
+        return self.__conjure.cancel()
 
     def getStats(self) -> dict|None:
         try:
@@ -274,7 +1027,46 @@ class EssenceModel:
         return True
 
     def get_all_model_params(self, model:str="") -> list[dict]:
-        return self.__conjure.get_model_parameters(model if model != "" else self.__model)
+        """
+        Get the declarations of a model. The declarations of this model are dumped once and reused until the model changes.
+
+        Args:
+            model (str, optional): Essence model string. If empty, this model is used
+
+        Returns:
+            list[dict]: List of declarations
+        """
+        if model != "":
+            return self.__conjure.get_model_parameters(model)
+        if self.__model_file is not None:
+            return self.__conjure.get_model_parameters_file(self.__model_file)
+        if self.__declarations is None or self.__declarations_model != self.__model:
+            self.__declarations = self.__conjure.get_model_parameters(self.__model)
+            self.__declarations_model = self.__model
+        return deepcopy(self.__declarations)
     
     def get_required_params(self, model:str="") -> list[str]:
-        return self.__conjure.get_required_parameters(model if model != "" else self.__model)
+        """
+        Get the names of the parameters that must be given to solve a model.
+
+        Args:
+            model (str, optional): Essence model string. If empty, this model is used
+
+        Returns:
+            list[str]: Names of the required parameters
+        """
+        return Conjure.required_parameters(self.get_all_model_params(model))
+
+    def pretty_print(self, output_type:str="plain") -> str:
+        """
+        Pretty print the model in specified format.
+
+        Args:
+            output_type (str, optional): Desired output format
+
+        Returns:
+            str: Formatted Essence code
+        """
+        if self.__model_file is not None:
+            return self.__conjure.pretty_print_file(self.__model_file, output_type)
+        return self.__conjure.pretty_print(self.__model, output_type)
@@ -0,0 +1,312 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from re import fullmatch
+from shutil import rmtree
+from os.path import join
+from typing import TYPE_CHECKING, Any, Literal
+
+from . import json_backend
+from .encoder import split_top_level
+from .conjure import aggregate_resources
+from .essence_types import is_bool, is_int
+from .solution import EssenceSolution
+from .tracing import submit
+
+if TYPE_CHECKING:
+    from .model import EssenceModel
+
+def resolve_bound(bound:str, parameters:dict[str, Any]) -> int:
+    """
+    Evaluate a bound of an int domain, either an integer literal or the name of an int parameter.
+
+    Args:
+        bound (str): Bound expression
+        parameters (dict[str, Any]): Parameters of the model
+
+    Returns:
+        int: Value of the bound
+
+    Raises:
+        Exception: If the bound cannot be evaluated
+    """
+    bound = bound.strip()
+    if fullmatch(r'-?\d+', bound):
+        return int(bound)
+    if bound in parameters and isinstance(parameters[bound], int):
+        return parameters[bound]
+    raise Exception(f"cannot evaluate domain bound {bound}, only integer literals and int parameters are supported")
+
+def partition_constraints(variable:str, domain:str, parts:int, parameters:dict[str, Any]|None=None) -> list[str]:
+    """
+    Build constraints splitting the domain of a decision variable into disjoint parts.
+
+    Args:
+        variable (str): Name of the decision variable
+        domain (str): Domain of the variable, as returned by the model declarations
+        parts (int): Number of parts. Fewer parts are returned if the domain is smaller
+        parameters (dict[str, Any], optional): Parameters used to evaluate the domain bounds
+
+    Returns:
+        list[str]: One 'such that' constraint per part
+
+    Raises:
+        Exception: If the domain cannot be partitioned
+    """
+    assert parts > 0, f"expected a positive number of parts, got {parts}"
+    domain = domain.strip()
+    if is_bool(domain):
+        return [f"such that {variable} = false", f"such that {variable} = true"][:parts] if parts > 1 else [f"such that true"]
+    if not is_int(domain) or '(' not in domain:
+        raise Exception(f"cannot partition {variable}: only bounded int and bool domains are supported, got {domain}")
+    ranges = split_top_level(domain[domain.index('(')+1:domain.rindex(')')], ',')
+    lower = resolve_bound(ranges[0].split('..')[0], parameters or {})
+    upper = resolve_bound(ranges[-1].split('..')[-1], parameters or {})
+    size = upper - lower + 1
+    parts = min(parts, size)
+    constraints = []
+    start = lower
+    for i in range(parts):
+        end = start + size // parts + (1 if i < size % parts else 0) - 1
+        constraints.append(f"such that {variable} >= {start} /\\ {variable} <= {end}")
+        start = end + 1
+    return constraints
+
+def _objective_value(solution:EssenceSolution, objective:tuple[str, str]) -> Any:
+    # conjure reports improving solutions in order, so the last one is the best
+    last = solution.raw[-1]
+    if objective[1] not in last:
+        raise Exception(f"cannot compare objective {objective[1]}, only decision variables are supported as objectives")
+    return last[objective[1]]
+
+def solve_partitioned(model:"EssenceModel", var:str, parts:int, parameters:dict|None=None, solver_arguments:str|None=None, 
+                      mode:Literal["first", "all", "best"]|None=None, max_workers:int|None=None) -> EssenceSolution:
+    """
+    Solve a model in parallel by splitting the domain of a decision variable into disjoint parts.
+    Each part is solved as an independent copy of the model with its own cache directory.
+
+    Args:
+        model (EssenceModel): Model to solve
+        var (str): Name of the decision variable to partition
+        parts (int): Number of parts
+        parameters (dict, optional): Parameters for the model. If None, the ones set in the model are used
+        solver_arguments (str, optional): Additional solver arguments
+        mode (Literal["first", "all", "best"], optional): How results are merged: first solution found, union of all 
+            solutions, or best objective. By default 'best' for optimisation models, 'all' when the model enumerates 
+            every solution and 'first' otherwise
+        max_workers (int, optional): Maximum number of parts solved at once. Defaults to the number of parts, 
+            at most the number of CPUs
+
+    Returns:
+        EssenceSolution: Merged solutions, with the resources used by all the parts
+
+    Raises:
+        Exception: If the variable cannot be partitioned or a part fails
+    """
+    params = model.get_parameters() if parameters is None else parameters
+    declarations = [d for d in model.get_all_model_params() if d.get('kind') == 'Find' and d.get('name') == var]
+    if len(declarations) == 0:
+        raise Exception(f"decision variable {var} not found")
+    constraints = partition_constraints(var, declarations[0]['domain'], parts, params)
+    objective = model.get_objective()
+    if mode is None:
+        mode = 'best' if objective is not None else ('all' if model.get_number_of_solutions() == 'all' else 'first')
+    if mode == 'best' and objective is None:
+        raise Exception("mode 'best' requires an optimisation model")
+
+    work_dir = tempfile.mkdtemp(prefix='conjure-partitioned-')
+    sub_models = []
+    for i, constraint in enumerate(constraints):
+        sub_model = model.copy(cache_dir=join(work_dir, f'part{i}'))
+        sub_model.append(constraint)
+        sub_models.append(sub_model)
+    executor = ThreadPoolExecutor(max_workers=max_workers if max_workers is not None else min(len(sub_models), os.cpu_count() or 1))
+    first, pending = None, set()
+    try:
+        pending = set([submit(executor, model.get_tracer(), m.solve, params, solver_arguments) for m in sub_models])
+        results = []
+        while len(pending) > 0 and first is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if mode == 'first' and result.state == 'SAT':
+                    # parts still queued never start, the running ones are killed or stop before their next process
+                    for pending_future in pending:
+                        pending_future.cancel()
+                    for m in sub_models:
+                        m.cancel()
+                    first = result
+                    break
+                results.append(result)
+    except Exception:
+        for pending_future in pending:
+            pending_future.cancel()
+        for m in sub_models:
+            m.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        rmtree(work_dir, ignore_errors=True)
+
+    # every part counts, including the ones cancelled once a solution was found
+    resources = aggregate_resources([m.get_resources() for m in sub_models])
+    if first is not None:
+        first.resources = resources
+        return first
+    solved = [r for r in results if r.state == 'SAT']
+    if len(solved) == 0:
+        return EssenceSolution([], [], resources=resources)
+    if mode == 'best':
+        assert objective is not None
+        pick = min if objective[0] == 'minimising' else max
+        best = pick(solved, key=lambda r: _objective_value(r, objective))
+        return EssenceSolution(best.raw[-1:], best.python_solution[-1:], domains=best.domains, resources=resources)
+    return EssenceSolution([s for r in solved for s in r.raw], [s for r in solved for s in r.python_solution], domains=solved[0].domains, 
+                           resources=resources)
+
+def bound_constraint(objective:tuple[str, str], value:Any) -> str:
+    """
+    Build the constraint requiring a solution strictly better than a known objective value.
+
+    Args:
+        objective (tuple[str, str]): Direction ('minimising' or 'maximising') and objective expression
+        value (Any): Objective value to improve on
+
+    Returns:
+        str: 'such that' constraint
+    """
+    direction, expression = objective
+    return f"such that {expression} {'<' if direction == 'minimising' else '>'} {json_backend.dumps(value)}"
+
+def solve_cooperative(model:"EssenceModel", seeds:list[int]|int, rounds:int, parameters:dict|None=None, 
+                      solver_arguments:str|None=None, round_time:int|None=None) -> EssenceSolution:
+    """
+    Solve an optimisation model with several random seeds in parallel, sharing the best objective between rounds.
+    Every round restarts each seed with a constraint requiring a solution better than the best one found so far,
+    so seeds that fell behind continue from the shared incumbent. The search stops after the given number of rounds,
+    or earlier when a round finds no improvement. At most one seed per CPU runs at once, the others wait for a free CPU.
+    The model needs a solver taking a seed, see EssenceModel.set_random_seed: Minion, the default solver, does not.
+
+    Args:
+        model (EssenceModel): Optimisation model, whose objective must be a decision variable
+        seeds (list[int] | int): Random seeds, or a number of seeds starting from 0
+        rounds (int): Maximum number of rounds
+        parameters (dict, optional): Parameters for the model. If None, the ones set in the model are used
+        solver_arguments (str, optional): Additional solver arguments. If given, they replace the seed and time limit set by the model
+        round_time (int, optional): Time limit of each round in seconds. Defaults to the time limit of the model, 
+            without one the first round runs to optimality
+
+    Returns:
+        EssenceSolution: Best solution, with the trace of the improving solutions over all the rounds and the resources 
+            used by all the workers. Trace entries also record the 'seed' and 'round' that found each solution. They are 
+            timed by the end of their round, as Conjure writes the solutions only once the solver has finished, so
+            convergence() has the resolution of round_time
+
+    Raises:
+        Exception: If the model is not an optimisation model or a worker fails
+    """
+    objective = model.get_objective()
+    if objective is None:
+        raise Exception("cooperative solving requires an optimisation model")
+    if isinstance(seeds, int):
+        seeds = list(range(seeds))
+    assert len(seeds) > 0 and rounds > 0, "expected at least one seed and one round"
+    params = model.get_parameters() if parameters is None else parameters
+    better = (lambda a, b: a < b) if objective[0] == 'minimising' else (lambda a, b: a > b)
+
+    best_raw, best_python, trace, domains, resources = None, None, [], None, []
+    start = time.time()
+    work_dir = tempfile.mkdtemp(prefix='conjure-cooperative-')
+    try:
+        with ThreadPoolExecutor(max_workers=min(len(seeds), os.cpu_count() or 1)) as executor:
+            for current_round in range(rounds):
+                workers = []
+                for seed in seeds:
+                    worker = model.copy(cache_dir=join(work_dir, f'round{current_round}-seed{seed}'))
+                    worker.set_random_seed(seed)
+                    if round_time is not None:
+                        worker.set_time_limit(round_time)
+                    if best_raw is not None:
+                        worker.append(bound_constraint(objective, best_raw[objective[1]]))
+                    workers.append(worker)
+                futures = [submit(executor, model.get_tracer(), w.solve, params, solver_arguments, None, True) for w in workers]
+                found = []
+                for seed, future in zip(seeds, futures):
+                    result = future.result()
+                    domains = result.domains
+                    resources.append(result.resources)
+                    for raw, python, entry in zip(result.raw, result.python_solution, result.trace or []):
+                        if objective[1] not in raw:
+                            raise Exception(f"cannot share objective {objective[1]}, only decision variables are supported as objectives")
+                        found.append((entry['delivered'], raw, python, seed))
+                timestamp = time.time()
+                improved = False
+                for _, raw, python, seed in sorted(found, key=lambda f: f[0]):
+                    if best_raw is None or better(raw[objective[1]], best_raw[objective[1]]):
+                        best_raw, best_python, improved = raw, python, True
+                        trace.append({'time': timestamp - start, 'timestamp': timestamp, 'objective': raw[objective[1]], 
+                                      'seed': seed, 'round': current_round})
+                if not improved:
+                    break
+    finally:
+        rmtree(work_dir, ignore_errors=True)
+
+    if best_raw is None:
+        return EssenceSolution([], [], trace=trace, resources=aggregate_resources(resources))
+    return EssenceSolution([best_raw], [best_python], trace=trace, domains=domains, resources=aggregate_resources(resources))
+
+def select_representation(model:"EssenceModel", instances:list[dict|str], portfolio_size:int=4, 
+                          max_workers:int|None=None) -> list[dict]:
+    """
+    Benchmark a portfolio of alternative Essence' models in parallel on sample instances, and remember the fastest 
+    one as the representation choice of the model. Alternatives are ranked by number of failed solves, then by total time.
+
+    Args:
+        model (EssenceModel): Model to choose a representation for
+        instances (list[dict | str]): Sample parameters, as dicts or parameter file paths
+        portfolio_size (int, optional): Maximum number of alternative models
+        max_workers (int, optional): Maximum number of solves run at once. Defaults to the number of CPUs
+
+    Returns:
+        list[dict]: One entry per alternative model, best first, with the keys 'model', 'time', 'failures' 
+            and 'resources' (summed over the instances, see aggregate_resources)
+
+    Raises:
+        Exception: If Conjure cannot generate the portfolio or every alternative fails
+    """
+    assert len(instances) > 0, "expected at least one sample instance"
+    candidates = model.generate_representations(portfolio_size)
+    if len(candidates) == 0:
+        raise Exception("conjure generated no models")
+
+    def benchmark(candidate:str, instance:dict|str, cache_dir:str) -> tuple[float|None, dict|None]:
+        worker = model.copy(cache_dir=cache_dir)
+        worker.set_representation(candidate)
+        start = time.perf_counter()
+        try:
+            worker.solve(instance)
+        except Exception:
+            return None, worker.get_resources()
+        return time.perf_counter() - start, worker.get_resources()
+
+    work_dir = tempfile.mkdtemp(prefix='conjure-representations-')
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers if max_workers is not None else os.cpu_count()) as executor:
+            runs = {candidate: [submit(executor, model.get_tracer(), benchmark, candidate, instance, join(work_dir, f'model{i}-instance{j}')) 
+                                for j, instance in enumerate(instances)] 
+                    for i, candidate in enumerate(candidates)}
+            outcomes = {candidate: [future.result() for future in futures] for candidate, futures in runs.items()}
+    finally:
+        rmtree(work_dir, ignore_errors=True)
+
+    results = []
+    for candidate, runs_outcomes in outcomes.items():
+        ts = [t for t, _ in runs_outcomes]
+        results.append({'model': candidate, 'time': sum([t for t in ts if t is not None]), 'failures': ts.count(None), 
+                        'resources': aggregate_resources([r for _, r in runs_outcomes])})
+    results.sort(key=lambda r: (r['failures'], r['time']))
+    if results[0]['failures'] == len(instances):
+        raise Exception("every alternative model failed on every sample instance")
+    model.set_representation(results[0]['model'], remember=True)
+    return results
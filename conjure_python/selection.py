@@ -0,0 +1,188 @@
+import math
+import os
+import threading
+import time
+from os.path import dirname, isfile, join, realpath
+from typing import Any
+
+from . import json_backend
+
+HISTORY_FILE = join(dirname(realpath(__file__)), '.history.jsonl')
+# number of recorded instances the selector compares a new instance with
+NEIGHBOURS = 5
+# statuses of recorded runs that did not solve the instance, counted as PENALTY times the slowest recorded run
+FAILED_STATUSES = ['timeout', 'memout', 'error']
+PENALTY = 10
+
+def _count_scalars(value:Any) -> int:
+    if isinstance(value, dict):
+        return sum([_count_scalars(v) for v in value.values()])
+    if isinstance(value, (list, tuple)):
+        return sum([_count_scalars(v) for v in value])
+    return 1
+
+def instance_features(parameters:dict[str, Any]) -> dict[str, float]:
+    """
+    Extract cheap features of an instance from its parameters, without solving it.
+    Numeric parameters are features as they are, collections contribute their number of elements.
+
+    Args:
+        parameters (dict[str, Any]): Parameters in Conjure's JSON format, as returned by encode_parameters
+
+    Returns:
+        dict[str, float]: Feature values by name, including 'total_size', the number of scalar values of the instance
+    """
+    features = {}
+    for name, value in parameters.items():
+        if isinstance(value, bool):
+            features[name] = float(value)
+        elif isinstance(value, (int, float)):
+            features[name] = float(value)
+        elif isinstance(value, (dict, list, tuple)):
+            features[f'{name}.size'] = float(_count_scalars(value))
+    features['total_size'] = float(_count_scalars(list(parameters.values())))
+    return features
+
+def solver_timed_out(info:dict|None) -> bool:
+    """
+    Check if the statistics of a run report that the solver reached its time limit.
+
+    Args:
+        info (dict, optional): Statistics from the .eprime-info file
+
+    Returns:
+        bool: True if the solver timed out
+    """
+    return info is not None and info.get('SolverTimeOut', '').lower() in ('true', '1', 'yes')
+
+def configuration_key(configuration:dict) -> str:
+    """
+    Get a key identifying a solver configuration.
+
+    Args:
+        configuration (dict): Solver configuration
+
+    Returns:
+        str: Canonical JSON form of the configuration
+    """
+    return json_backend.dumps(dict(sorted(configuration.items())))
+
+class RunHistory:
+    """
+    Local record of solver runs, stored as one JSON document per line.
+
+    Args:
+        path (str, optional): Path of the history file
+    """
+    def __init__(self, path:str=HISTORY_FILE) -> None:
+        """
+        Initialize the RunHistory instance.
+
+        Args:
+            path (str, optional): Path of the history file, created by the first record
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+
+    def record(self, model_key:str, features:dict[str, float], configuration:dict, runtime:float, status:str,
+               info:dict|None=None, instance_key:str|None=None, solver_arguments:str|None=None,
+               phases:dict[str, float]|None=None, resources:dict|None=None, conjure_version:str|None=None) -> None:
+        """
+        Record a solver run.
+
+        Args:
+            model_key (str): Key of the model, see Conjure.model_key
+            features (dict[str, float]): Features of the instance, see instance_features
+            configuration (dict): Solver configuration of the run
+            runtime (float): Wall-clock time of the run in seconds
+            status (str): 'SAT', 'UNSAT', 'timeout', 'memout' (memory limit exceeded) or 'error'
+            info (dict, optional): Statistics of the run, e.g. from the .eprime-info file
+            instance_key (str, optional): Hash of the instance
+            solver_arguments (str, optional): Arguments passed to the solver
+            phases (dict[str, float], optional): Seconds spent in each phase of the solve
+            resources (dict, optional): Resource usage of the solve
+            conjure_version (str, optional): Version of Conjure
+        """
+        entry = {'model': model_key, 'features': features, 'configuration': configuration, 'runtime': runtime,
+                 'status': status, 'info': info, 'timestamp': time.time(), 'instance': instance_key,
+                 'solver_arguments': solver_arguments, 'phases': phases, 'resources': resources, 'conjure_version': conjure_version}
+        line = json_backend.dumps(entry) + '\n'
+        with self.__lock:
+            directory = dirname(self.path)
+            if directory != '':
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(line)
+
+    def runs(self, model_key:str|None=None) -> list[dict]:
+        """
+        Get the recorded runs.
+
+        Args:
+            model_key (str, optional): Only return the runs of this model
+
+        Returns:
+            list[dict]: Recorded runs, oldest first
+        """
+        if not isfile(self.path):
+            return []
+        with open(self.path, 'rb') as f:
+            entries = [json_backend.loads(line) for line in f if line.strip() != b'']
+        return [e for e in entries if model_key is None or e['model'] == model_key]
+
+class Selector:
+    """
+    Chooses a solver configuration for an instance from the runs recorded on similar instances (k nearest neighbours).
+
+    Args:
+        runs (list[dict]): Recorded runs, as returned by RunHistory.runs
+        neighbours (int, optional): Number of similar instances to compare
+    """
+    def __init__(self, runs:list[dict], neighbours:int=NEIGHBOURS) -> None:
+        """
+        Initialize the Selector instance, grouping the runs by instance.
+
+        Args:
+            runs (list[dict]): Recorded runs
+            neighbours (int, optional): Number of similar instances to compare
+        """
+        self.neighbours = neighbours
+        self.__configurations = {}
+        # instance key -> (features, configuration key -> runtimes)
+        self.__instances = {}
+        slowest = max([r['runtime'] for r in runs if r['status'] not in FAILED_STATUSES], default=1.0)
+        for run in runs:
+            key = configuration_key(run['configuration'])
+            self.__configurations[key] = run['configuration']
+            runtime = PENALTY * slowest if run['status'] in FAILED_STATUSES else run['runtime']
+            instance_key = json_backend.dumps(dict(sorted(run['features'].items())))
+            _, runtimes = self.__instances.setdefault(instance_key, (run['features'], {}))
+            runtimes.setdefault(key, []).append(runtime)
+
+    def select(self, features:dict[str, float]) -> dict|None:
+        """
+        Choose the configuration with the lowest mean runtime on the most similar recorded instances.
+        Only the configurations recorded on the largest number of these instances are compared.
+
+        Args:
+            features (dict[str, float]): Features of the instance, see instance_features
+
+        Returns:
+            dict | None: Chosen configuration, None if nothing was recorded
+        """
+        if len(self.__instances) == 0:
+            return None
+        nearest = sorted(self.__instances.values(), key=lambda i: _distance(features, i[0]))[:self.neighbours]
+        # configuration key -> mean runtime on each of the nearest instances where it was recorded
+        means = {}
+        for _, runtimes in nearest:
+            for key, times in runtimes.items():
+                means.setdefault(key, []).append(sum(times) / len(times))
+        coverage = max([len(m) for m in means.values()])
+        candidates = sorted([key for key, m in means.items() if len(m) == coverage])
+        return self.__configurations[min(candidates, key=lambda key: sum(means[key]) / coverage)]
+
+def _distance(a:dict[str, float], b:dict[str, float]) -> float:
+    # sizes span orders of magnitude, so features are compared on a log scale
+    scale = lambda x: math.copysign(math.log1p(abs(x)), x)
+    return math.sqrt(sum([(scale(a.get(k, 0.0)) - scale(b.get(k, 0.0))) ** 2 for k in set(a) | set(b)]))
@@ -1,9 +1,64 @@
-from typing import Any, Literal
-from .essence_types import EssenceType
+from collections.abc import Sequence
+from typing import Any, Callable, Iterable, Iterator, Literal
+from .essence_types import EssenceFunction, EssenceMatrix, EssenceRecord, EssenceRelation, EssenceType, EssenceTuple, EssenceSet, EssenceSequence, is_bool, is_function, is_int, is_matrix, is_record, is_relation, is_tuple, is_set, is_sequence
+from .fingerprint import fingerprint
+from .solution_store import SolutionStore, SolutionStoreWriter
 
 SAT = "SAT"
 UNSAT = "UNSAT"
 
+def build_python_solution(solution:dict, domains:dict[str, str]) -> dict[str, EssenceType]:
+    """
+    Convert a raw solution to EssenceType python objects.
+
+    Args:
+        solution (dict): Raw solution
+        domains (dict[str, str]): Essence domain of each decision variable
+
+    Returns:
+        dict[str, EssenceType]: Solution with EssenceType values. Variables without a known domain are left as they are
+    """
+    new_sol = {}
+    for name in solution.keys():
+        dom = domains.get(name)
+        if dom is None:
+            new_sol[name] = solution[name]
+        elif is_matrix(dom):
+            new_sol[name] = EssenceMatrix(solution[name], dom)
+        elif is_function(dom):
+            new_sol[name] = EssenceFunction(solution[name], dom)
+        elif is_relation(dom):
+            new_sol[name] = EssenceRelation(solution[name], dom)
+        elif is_tuple(dom):
+            new_sol[name] = EssenceTuple(solution[name], dom)
+        elif is_record(dom):
+            new_sol[name] = EssenceRecord(solution[name], dom)
+        elif is_int(dom):
+            new_sol[name] = int(solution[name])
+        elif is_bool(dom):
+            new_sol[name] = bool(solution[name])
+        elif is_set(dom):
+            new_sol[name] = EssenceSet(solution[name], dom)
+        elif is_sequence(dom):
+            new_sol[name] = EssenceSequence(solution[name], dom)
+        else:
+            new_sol[name] = solution[name]
+    return new_sol
+
+class _StoredSolutions(Sequence):
+    # list-like view of a solution store, reading and converting each solution only when it is accessed
+    def __init__(self, store:SolutionStore, convert:Callable[[dict], Any]) -> None:
+        self.__store = store
+        self.__convert = convert
+
+    def __len__(self) -> int:
+        return len(self.__store)
+
+    def __getitem__(self, idx:int|slice) -> Any:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return self.__convert(self.__store.get(idx))
+
 class EssenceSolution:
     """
     Class representing a solution to an Essence problem.
@@ -13,7 +68,8 @@ class EssenceSolution:
         python_solution (list[dict[str,EssenceType]]): Solutions converted to EssenceType python objects
         mode (Literal["raw", "python"]) : Mode for accessing solutions
     """
-    def __init__(self, raw_solutions:list[dict], python_solution:list[dict[str,EssenceType]], mode:Literal["raw", "python"]="python") -> None:
+    def __init__(self, raw_solutions:Sequence[dict], python_solution:Sequence[dict[str,EssenceType]], mode:Literal["raw", "python"]="python", 
+                 trace:list[dict]|None=None, domains:dict[str, str]|None=None, resources:dict|None=None) -> None:
         """
         Initialize the EssenceSolution instance.
 
@@ -21,9 +77,21 @@ class EssenceSolution:
             raw_solutions (list[dict]): Raw (in basic dict format) solutions from Conjure
             python_solution (list[dict[str,EssenceType]]): Solutions converted to EssenceType python objects
             mode (Literal["raw", "python"]) : Mode for accessing solutions
+            trace (list[dict], optional): One entry per solution, in the order they were found, with the key 'objective' 
+                (objective value or None). Single solves add 'delivered' (seconds since the solve started when the solution 
+                was picked up, see EssenceModel.solve). Cooperative solves add 'time' (seconds since the solve started when 
+                the round that found it ended) and 'timestamp' (wall-clock time of the same), see solve_cooperative
+            domains (dict[str, str], optional): Essence domain of each decision variable, saved with the solutions
+            resources (dict, optional): Resources used by the processes of the solve, with the keys 'user_time', 
+                'system_time' and 'wall_time' (seconds), 'max_rss' (peak memory of the largest process in kilobytes) 
+                and 'processes', see Conjure.get_resources
         """
         self.raw = raw_solutions
         self.python_solution = python_solution
+        self.trace = trace
+        self.domains = domains
+        self.resources = resources
+        self.__store = None
         self.state = SAT if len(raw_solutions) > 0 else UNSAT
         self.__mode = mode
         self.__current_idx = 0
@@ -119,5 +187,237 @@ class EssenceSolution:
             solution_strs.append(f"solution {i}: \n {sol_str}")
         return "\n".join(solution_strs)
     
+    def convergence(self) -> list[tuple[float, Any]]:
+        """
+        Get the convergence curve of a cooperative solve. Single solves are not timed, as Conjure writes their
+        solutions only once the solver has finished.
+
+        Returns:
+            list[tuple[float, Any]]: (seconds since the solve started, objective value) for each improving solution,
+                timed by the end of the round that found it, see solve_cooperative
+
+        Raises:
+            AssertionError: If the solve was not traced, or its trace is not timed
+        """
+        assert self.trace is not None, "no trace available, solve the model with trace=True"
+        assert all('time' in entry for entry in self.trace), \
+            "the trace is not timed, conjure writes the solutions of a single solve once the solver has finished"
+        return [(entry['time'], entry['objective']) for entry in self.trace]
+
+    def fingerprints(self) -> list[str]:
+        """
+        Get the stable fingerprint of every solution.
+
+        Returns:
+            list[str]: Fingerprint of each solution, in order
+        """
+        return [fingerprint(sol) for sol in self.python_solution]
+
+    def save(self, path:str) -> None:
+        """
+        Save the solutions to an on-disk solution store, so they can be reopened with load without solving again.
+
+        Args:
+            path (str): Path of the solutions file. An index (.idx) and a metadata (.meta.json) file are written next to it
+        """
+        with SolutionStoreWriter(path, self.domains) as writer:
+            for raw in self.raw:
+                writer.append(raw)
+            writer.close(self.trace)
+
+    @classmethod
+    def load(cls, path:str, mode:Literal["raw", "python"]="python") -> "EssenceSolution":
+        """
+        Open solutions saved with save, or spilled to disk while solving. Solutions are read from disk, 
+        and converted to EssenceType objects, only when they are accessed.
+
+        Args:
+            path (str): Path of the solutions file
+            mode (Literal["raw", "python"]) : Mode for accessing solutions
+
+        Returns:
+            EssenceSolution: Solutions backed by the store
+
+        Raises:
+            Exception: If the store is missing or unfinished
+        """
+        store = SolutionStore(path)
+        domains = store.domains
+        convert = (lambda raw: build_python_solution(raw, domains)) if domains is not None else (lambda raw: raw)
+        solution = cls(_StoredSolutions(store, lambda raw: raw), _StoredSolutions(store, convert), mode, store.trace, domains)
+        solution.__store = store
+        return solution
+
+    def close(self) -> None:
+        """
+        Release the on-disk store backing the solutions, if any. The solutions cannot be accessed afterwards.
+        """
+        if self.__store is not None:
+            self.__store.close()
+
     def __dict__(self):
-        return self.raw
\ No newline at end of file
+        return self.raw
+
+class SolutionIndex:
+    """
+    Index of unique solutions, keyed by their fingerprint.
+
+    Args:
+        solutions (Iterable[EssenceSolution], optional): Solutions to index
+    """
+    def __init__(self, solutions:Iterable[EssenceSolution]|None=None) -> None:
+        """
+        Initialize the SolutionIndex instance.
+
+        Args:
+            solutions (Iterable[EssenceSolution], optional): Solutions to index
+        """
+        self.__raw = {}
+        self.__python = {}
+        # domains of the indexed solutions, to look up raw solutions by their python form
+        self.__domains = {}
+        if solutions is not None:
+            for solution in solutions:
+                self.add_all(solution)
+
+    def add(self, raw_solution:dict, python_solution:dict[str, EssenceType]|None=None) -> bool:
+        """
+        Add a single solution to the index.
+
+        Args:
+            raw_solution (dict): Raw solution
+            python_solution (dict[str, EssenceType], optional): Same solution as EssenceType python objects
+
+        Returns:
+            bool: True if the solution was new, False if it was already indexed
+        """
+        key = fingerprint(python_solution if python_solution is not None else self.__python_form(raw_solution))
+        if key in self.__raw:
+            return False
+        self.__raw[key] = raw_solution
+        self.__python[key] = python_solution if python_solution is not None else raw_solution
+        return True
+
+    def add_all(self, solution:EssenceSolution) -> int:
+        """
+        Add every solution of an EssenceSolution to the index.
+
+        Args:
+            solution (EssenceSolution): Solutions to add
+
+        Returns:
+            int: Number of new solutions
+        """
+        if solution.domains is not None:
+            self.__domains.update(solution.domains)
+        added = 0
+        for i in range(len(solution)):
+            added += self.add(solution.raw[i], solution.python_solution[i])
+        return added
+
+    def __contains__(self, solution:dict|str) -> bool:
+        """
+        Check if a solution, or a fingerprint, is indexed. Raw values are converted to their python form with the domains 
+        of the indexed solutions, so raw and python solutions are found alike. Without domains, e.g. for solutions built 
+        by hand, only python solutions and fingerprints can be looked up.
+
+        Args:
+            solution (dict | str): Raw or python solution, or fingerprint
+
+        Returns:
+            bool: True if indexed, False otherwise
+        """
+        key = solution if isinstance(solution, str) else fingerprint(self.__python_form(solution))
+        return key in self.__raw
+
+    def __len__(self) -> int:
+        """
+        Get the number of unique solutions.
+
+        Returns:
+            int: Number of unique solutions
+        """
+        return len(self.__raw)
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterate over the fingerprints of the indexed solutions.
+
+        Returns:
+            Iterator[str]: Fingerprints in insertion order
+        """
+        return iter(list(self.__raw.keys()))
+
+    def fingerprints(self) -> set[str]:
+        """
+        Get the fingerprints of the indexed solutions.
+
+        Returns:
+            set[str]: Set of fingerprints
+        """
+        return set(self.__raw.keys())
+
+    def union(self, other:"SolutionIndex") -> "SolutionIndex":
+        """
+        Build the index of the solutions found in either index.
+
+        Args:
+            other (SolutionIndex): Index to merge with
+
+        Returns:
+            SolutionIndex: New index
+        """
+        result = self.__copy_keys(self.__raw.keys())
+        result.__domains = {**other.__domains, **self.__domains}
+        for key in other:
+            if key not in result.__raw:
+                result.__raw[key], result.__python[key] = other.__raw[key], other.__python[key]
+        return result
+
+    def difference(self, other:"SolutionIndex") -> "SolutionIndex":
+        """
+        Build the index of the solutions not found in the other index.
+
+        Args:
+            other (SolutionIndex): Index of solutions to remove
+
+        Returns:
+            SolutionIndex: New index
+        """
+        return self.__copy_keys([key for key in self.__raw if key not in other])
+
+    def intersection(self, other:"SolutionIndex") -> "SolutionIndex":
+        """
+        Build the index of the solutions found in both indexes.
+
+        Args:
+            other (SolutionIndex): Index to intersect with
+
+        Returns:
+            SolutionIndex: New index
+        """
+        return self.__copy_keys([key for key in self.__raw if key in other])
+
+    def to_solution(self) -> EssenceSolution:
+        """
+        Convert the index to an EssenceSolution holding the unique solutions.
+
+        Returns:
+            EssenceSolution: Unique solutions in insertion order
+        """
+        return EssenceSolution(list(self.__raw.values()), list(self.__python.values()))
+
+    def __python_form(self, solution:dict) -> dict:
+        raw = {name: value for name, value in solution.items() if not isinstance(value, EssenceType)}
+        return {**solution, **build_python_solution(raw, self.__domains)}
+
+    def __copy_keys(self, keys:Iterable[str]) -> "SolutionIndex":
+        result = SolutionIndex()
+        result.__domains = dict(self.__domains)
+        for key in keys:
+            result.__raw[key], result.__python[key] = self.__raw[key], self.__python[key]
+        return result
+
+    __or__ = union
+    __sub__ = difference
+    __and__ = intersection
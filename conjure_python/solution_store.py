@@ -0,0 +1,182 @@
+import mmap
+import os
+import struct
+from typing import Any, Iterator
+
+from . import json_backend
+
+# a store is made of three files: the solutions, one JSON document per line, the byte offset of each line, and the metadata
+INDEX_SUFFIX = '.idx'
+META_SUFFIX = '.meta.json'
+STORE_VERSION = 1
+_OFFSET = struct.Struct('<Q')
+
+class SolutionStoreWriter:
+    """
+    Writes raw solutions to an on-disk solution store, one at a time.
+
+    Args:
+        path (str): Path of the solutions file. The index and metadata files are written next to it
+        domains (dict[str, str], optional): Essence domain of each decision variable, used to convert solutions back to EssenceType objects
+    """
+    def __init__(self, path:str, domains:dict[str, str]|None=None) -> None:
+        """
+        Initialize the SolutionStoreWriter instance, truncating any existing store at the same path. The metadata
+        of the existing store is removed first, so the store cannot be opened until the writer is closed.
+
+        Args:
+            path (str): Path of the solutions file
+            domains (dict[str, str], optional): Essence domain of each decision variable
+        """
+        self.path = path
+        self.domains = domains
+        if os.path.exists(path + META_SUFFIX):
+            os.remove(path + META_SUFFIX)
+        self.__data = open(path, 'wb')
+        self.__index = open(path + INDEX_SUFFIX, 'wb')
+        self.__offset = 0
+        self.__count = 0
+
+    def append(self, solution:dict) -> None:
+        """
+        Write a solution at the end of the store.
+
+        Args:
+            solution (dict): Raw solution
+        """
+        line = (json_backend.dumps(solution) + '\n').encode('utf-8')
+        self.__index.write(_OFFSET.pack(self.__offset))
+        self.__data.write(line)
+        self.__offset += len(line)
+        self.__count += 1
+
+    def __len__(self) -> int:
+        """
+        Get the number of solutions written so far.
+
+        Returns:
+            int: Number of solutions
+        """
+        return self.__count
+
+    def close(self, trace:list[dict]|None=None) -> None:
+        """
+        Finish the store, writing its metadata atomically.
+
+        Args:
+            trace (list[dict], optional): Trace of the solve that found the solutions
+        """
+        if self.__data.closed:
+            return
+        self.__data.close()
+        self.__index.close()
+        with open(self.path + META_SUFFIX + '.tmp', 'w') as f:
+            f.write(json_backend.dumps({'version': STORE_VERSION, 'count': self.__count, 'domains': self.domains, 'trace': trace}))
+        os.replace(self.path + META_SUFFIX + '.tmp', self.path + META_SUFFIX)
+
+    def abort(self) -> None:
+        """
+        Close the files without writing the metadata, e.g. when the solve failed. The store cannot be opened afterwards.
+        """
+        self.__data.close()
+        self.__index.close()
+
+    def __enter__(self) -> "SolutionStoreWriter":
+        return self
+
+    def __exit__(self, exc_type:Any, *exc:Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class SolutionStore:
+    """
+    Read-only view of an on-disk solution store. The solutions and the index are memory-mapped,
+    so accessing a solution only reads its own line.
+
+    Args:
+        path (str): Path of the solutions file
+    """
+    def __init__(self, path:str) -> None:
+        """
+        Open a solution store.
+
+        Args:
+            path (str): Path of the solutions file
+
+        Raises:
+            Exception: If the store is missing, unfinished or of an unsupported version
+        """
+        if not os.path.isfile(path + META_SUFFIX):
+            raise Exception(f"solution store {path} not found or not closed")
+        with open(path + META_SUFFIX) as f:
+            meta = json_backend.loads(f.read())
+        if meta.get('version') != STORE_VERSION:
+            raise Exception(f"unsupported solution store version {meta.get('version')}")
+        self.path = path
+        self.domains = meta['domains']
+        self.trace = meta['trace']
+        self.__count = meta['count']
+        self.__data, self.__index = None, None
+        if self.__count > 0:
+            with open(path, 'rb') as f:
+                self.__data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with open(path + INDEX_SUFFIX, 'rb') as f:
+                self.__index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        """
+        Get the number of solutions in the store.
+
+        Returns:
+            int: Number of solutions
+        """
+        return self.__count
+
+    def get(self, idx:int) -> dict:
+        """
+        Read a single raw solution.
+
+        Args:
+            idx (int): Index of the solution, negative indices count from the end
+
+        Returns:
+            dict: Raw solution
+
+        Raises:
+            IndexError: If the index is out of range
+        """
+        if idx < 0:
+            idx += self.__count
+        if idx < 0 or idx >= self.__count:
+            raise IndexError(f"solution index {idx} out of range")
+        assert self.__data is not None and self.__index is not None, "solution store is closed"
+        start = _OFFSET.unpack_from(self.__index, idx * _OFFSET.size)[0]
+        end = _OFFSET.unpack_from(self.__index, (idx + 1) * _OFFSET.size)[0] if idx + 1 < self.__count else len(self.__data)
+        return json_backend.loads(self.__data[start:end])
+
+    def __iter__(self) -> Iterator[dict]:
+        """
+        Iterate over the raw solutions, in order.
+
+        Returns:
+            Iterator[dict]: Raw solutions
+        """
+        for i in range(self.__count):
+            yield self.get(i)
+
+    def close(self) -> None:
+        """
+        Release the memory maps of the store.
+        """
+        for view in (self.__data, self.__index):
+            if view is not None:
+                view.close()
+        self.__data, self.__index, self.__count = None, None, 0
+
+    def __enter__(self) -> "SolutionStore":
+        return self
+
+    def __exit__(self, *exc:Any) -> None:
+        self.close()
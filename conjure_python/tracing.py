@@ -0,0 +1,240 @@
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Iterator
+
+from . import json_backend
+
+# category of the spans recorded by conjure_python
+CATEGORY = 'conjure_python'
+
+class Tracer:
+    """
+    Collects nested timing spans of solves, e.g. parameter encoding, each Conjure phase, the solver and the conversion
+    of solutions, with the process and thread they ran on. A tracer can be shared by the models of a batch, and exported
+    to the Chrome trace event format (chrome://tracing, Perfetto) or to OpenTelemetry JSON.
+    """
+    def __init__(self) -> None:
+        """
+        Initialize the Tracer instance.
+        """
+        self.trace_id = secrets.token_hex(16)
+        self.__spans = []
+        self.__next_id = 1
+        self.__lock = threading.Lock()
+        # spans open on each thread, innermost last
+        self.__local = threading.local()
+
+    @contextmanager
+    def span(self, name:str, category:str=CATEGORY, **attributes:Any) -> Iterator[dict]:
+        """
+        Record a span around a block of code, nested in the span open on the same thread.
+
+        Args:
+            name (str): Name of the span
+            category (str, optional): Category of the span
+            **attributes: Attributes of the span, more can be added to the yielded span's 'attributes' inside the block
+
+        Returns:
+            Iterator[dict]: The span, recorded when the block exits
+        """
+        stack = self.__stack()
+        span = self.__new_span(name, category, time.time(), None, stack[-1]['id'] if len(stack) > 0 else None, attributes)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span['attributes']['error'] = str(e) or type(e).__name__
+            raise
+        finally:
+            stack.pop()
+            span['end'] = time.time()
+            with self.__lock:
+                self.__spans.append(span)
+
+    def add_span(self, name:str, start:float, end:float, category:str=CATEGORY, parent:int|None=None,
+                 asynchronous:bool=False, **attributes:Any) -> dict:
+        """
+        Record a span measured elsewhere, e.g. a phase of a Conjure run or the time a job waited in a queue.
+
+        Args:
+            name (str): Name of the span
+            start (float): Start time, as returned by time.time()
+            end (float): End time, as returned by time.time()
+            category (str, optional): Category of the span
+            parent (int, optional): Id of the parent span. Defaults to the span open on the current thread
+            asynchronous (bool, optional): Whether the span overlaps other spans of the thread, such as a wait in a queue.
+                Asynchronous spans are drawn on their own track
+            **attributes: Attributes of the span
+
+        Returns:
+            dict: The span
+        """
+        if parent is None:
+            stack = self.__stack()
+            parent = stack[-1]['id'] if len(stack) > 0 else None
+        span = self.__new_span(name, category, start, end, parent, attributes)
+        span['asynchronous'] = asynchronous
+        with self.__lock:
+            self.__spans.append(span)
+        return span
+
+    def spans(self) -> list[dict]:
+        """
+        Get the recorded spans.
+
+        Returns:
+            list[dict]: Spans ordered by start time, with the keys 'id', 'parent', 'name', 'category', 'start', 'end',
+                'pid', 'tid', 'thread', 'asynchronous' and 'attributes'
+        """
+        with self.__lock:
+            return sorted(self.__spans, key=lambda s: (s['start'], s['id']))
+
+    def clear(self) -> None:
+        """
+        Forget the recorded spans.
+        """
+        with self.__lock:
+            self.__spans = []
+
+    def to_chrome(self) -> dict:
+        """
+        Convert the spans to the Chrome trace event format.
+
+        Returns:
+            dict: Trace with complete events ('X') for spans, async events ('b'/'e') for asynchronous spans
+                and the names of the threads, timestamps in microseconds
+        """
+        events, threads = [], {}
+        for span in self.spans():
+            threads[(span['pid'], span['tid'])] = span['thread']
+            event = {'name': span['name'], 'cat': span['category'], 'ts': span['start'] * 1e6, 'pid': span['pid'],
+                     'tid': span['tid'], 'args': span['attributes']}
+            if span['asynchronous']:
+                events.append({**event, 'ph': 'b', 'id': span['id']})
+                events.append({**event, 'ph': 'e', 'id': span['id'], 'ts': span['end'] * 1e6, 'args': {}})
+            else:
+                events.append({**event, 'ph': 'X', 'dur': (span['end'] - span['start']) * 1e6})
+        for (pid, tid), thread in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_otlp(self, service:str=CATEGORY) -> dict:
+        """
+        Convert the spans to the OpenTelemetry protocol JSON encoding (OTLP/JSON), one resource per process.
+
+        Args:
+            service (str, optional): Service name of the resources
+
+        Returns:
+            dict: Document with the 'resourceSpans' of the trace
+        """
+        processes = {}
+        for span in self.spans():
+            attributes = {**span['attributes'], 'thread.id': span['tid'], 'thread.name': span['thread']}
+            processes.setdefault(span['pid'], []).append({
+                'traceId': self.trace_id, 'spanId': f"{span['id']:016x}",
+                'parentSpanId': f"{span['parent']:016x}" if span['parent'] is not None else '',
+                'name': span['name'], 'kind': 1,
+                'startTimeUnixNano': str(int(span['start'] * 1e9)), 'endTimeUnixNano': str(int(span['end'] * 1e9)),
+                'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()],
+                'status': {'code': 2, 'message': span['attributes']['error']} if 'error' in span['attributes'] else {}})
+        return {'resourceSpans': [{'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service}},
+                                                               {'key': 'process.pid', 'value': {'intValue': str(pid)}}]},
+                                   'scopeSpans': [{'scope': {'name': CATEGORY}, 'spans': spans}]}
+                                  for pid, spans in processes.items()]}
+
+    def export_chrome(self, path:str) -> None:
+        """
+        Write the spans to a Chrome trace event file, to open in chrome://tracing or Perfetto.
+
+        Args:
+            path (str): Path of the JSON file
+        """
+        _write(path, self.to_chrome())
+
+    def export_otlp(self, path:str, service:str=CATEGORY) -> None:
+        """
+        Write the spans to an OpenTelemetry JSON file, e.g. for the file receiver of the OpenTelemetry collector.
+
+        Args:
+            path (str): Path of the JSON file
+            service (str, optional): Service name of the resources
+        """
+        _write(path, self.to_otlp(service))
+
+    def __stack(self) -> list[dict]:
+        """
+        Get the spans open on the current thread.
+        """
+        if not hasattr(self.__local, 'stack'):
+            self.__local.stack = []
+        return self.__local.stack
+
+    def __new_span(self, name:str, category:str, start:float, end:float|None, parent:int|None, attributes:dict) -> dict:
+        """
+        Create a span on the current process and thread.
+        """
+        with self.__lock:
+            span_id = self.__next_id
+            self.__next_id += 1
+        return {'id': span_id, 'parent': parent, 'name': name, 'category': category, 'start': start, 'end': end,
+                'pid': os.getpid(), 'tid': threading.get_ident(), 'thread': threading.current_thread().name,
+                'asynchronous': False, 'attributes': dict(attributes)}
+
+def span(tracer:Tracer|None, name:str, **attributes:Any) -> ContextManager:
+    """
+    Record a span with a tracer, or nothing without one.
+
+    Args:
+        tracer (Tracer, optional): Tracer
+        name (str): Name of the span
+        **attributes: Attributes of the span
+
+    Returns:
+        ContextManager: Context of the span
+    """
+    return nullcontext() if tracer is None else tracer.span(name, **attributes)
+
+def submit(executor:Executor, tracer:Tracer|None, fn:Callable, *args:Any, name:str="queued") -> Future:
+    """
+    Submit a job to an executor, recording the time it waits for a worker as an asynchronous span.
+
+    Args:
+        executor (Executor): Executor
+        tracer (Tracer, optional): Tracer, the job is submitted as it is without one
+        fn (Callable): Job
+        *args: Arguments of the job
+        name (str, optional): Name of the span
+
+    Returns:
+        Future: Future of the job
+    """
+    if tracer is None:
+        return executor.submit(fn, *args)
+    submitted = time.time()
+    def job() -> Any:
+        tracer.add_span(name, submitted, time.time(), asynchronous=True, job=getattr(fn, '__name__', str(fn)))
+        return fn(*args)
+    return executor.submit(job)
+
+def _otlp_value(value:Any) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        # 64-bit integers are strings in OTLP/JSON
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': value if isinstance(value, str) else json_backend.dumps(value)}
+
+def _write(path:str, document:dict) -> None:
+    directory = os.path.dirname(path)
+    if directory != '':
+        os.makedirs(directory, exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        f.write(json_backend.dumps(document))
+    os.replace(path + '.tmp', path)
@@ -0,0 +1,197 @@
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from os.path import dirname, isfile, join, realpath
+from shutil import rmtree
+from statistics import mean, median
+from typing import TYPE_CHECKING
+
+from . import json_backend
+from .conjure import aggregate_resources
+from .selection import solver_timed_out
+from .tracing import submit
+
+if TYPE_CHECKING:
+    from .model import EssenceModel
+
+PROFILE_DIR = join(dirname(realpath(__file__)), '.profiles')
+# configuration keys understood by apply_configuration
+CONFIGURATION_KEYS = ['solver', 'solver_options', 'savilerow_options', 'threads']
+# failed and timed out runs count as this many times the time limit (PAR10)
+FAILURE_PENALTY = 10
+
+def configurations(search_space:dict[str, list]) -> list[dict]:
+    """
+    List every configuration of a search space.
+
+    Args:
+        search_space (dict[str, list]): Values to try for each configuration key
+
+    Returns:
+        list[dict]: One configuration per combination of values
+
+    Raises:
+        Exception: If the search space has an unknown key
+    """
+    unknown = [key for key in search_space if key not in CONFIGURATION_KEYS]
+    if len(unknown) > 0:
+        raise Exception(f"unknown configuration keys {unknown}. Supported keys are: {CONFIGURATION_KEYS}")
+    keys = list(search_space.keys())
+    return [dict(zip(keys, values)) for values in product(*[search_space[k] for k in keys])]
+
+def score(runtimes:list[float], statistic:str="mean") -> float:
+    """
+    Summarise the runtimes of a configuration.
+
+    Args:
+        runtimes (list[float]): Runtime of each run in seconds
+        statistic (str, optional): 'mean', 'median', 'max' or a percentile such as 'p90'
+
+    Returns:
+        float: Value of the statistic
+
+    Raises:
+        Exception: If the statistic is unknown
+    """
+    if statistic == 'mean':
+        return mean(runtimes)
+    if statistic == 'median':
+        return median(runtimes)
+    if statistic == 'max':
+        return max(runtimes)
+    if statistic.startswith('p') and statistic[1:].isdigit() and 0 < int(statistic[1:]) <= 100:
+        # nearest-rank percentile
+        ordered = sorted(runtimes)
+        return ordered[max(0, math.ceil(int(statistic[1:]) / 100 * len(ordered)) - 1)]
+    raise Exception(f"unknown statistic {statistic}. Supported statistics are 'mean', 'median', 'max' and percentiles such as 'p90'")
+
+def apply_configuration(model:"EssenceModel", configuration:dict) -> None:
+    """
+    Apply a solver configuration to a model. Keys missing from the configuration leave the model unchanged.
+
+    Args:
+        model (EssenceModel): Model to configure
+        configuration (dict): Configuration with some of the CONFIGURATION_KEYS
+    """
+    if configuration.get('solver') is not None:
+        model.set_solver(configuration['solver'])
+    if 'solver_options' in configuration:
+        model.set_solver_options(configuration['solver_options'])
+    if 'savilerow_options' in configuration:
+        model.set_savilerow_options(configuration['savilerow_options'])
+    if configuration.get('threads') is not None:
+        model.set_threads(configuration['threads'])
+
+def save_profile(name:str, configuration:dict, profile_dir:str=PROFILE_DIR) -> str:
+    """
+    Save a solver configuration as a named profile.
+
+    Args:
+        name (str): Name of the profile
+        configuration (dict): Configuration to save
+        profile_dir (str, optional): Directory of the profiles
+
+    Returns:
+        str: Path of the profile file
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    path = join(profile_dir, f'{name}.json')
+    with open(path + '.tmp', 'w') as f:
+        f.write(json_backend.dumps(configuration))
+    os.replace(path + '.tmp', path)
+    return path
+
+def load_profile(name:str, profile_dir:str=PROFILE_DIR) -> dict:
+    """
+    Load a solver configuration saved as a named profile.
+
+    Args:
+        name (str): Name of the profile
+        profile_dir (str, optional): Directory of the profiles
+
+    Returns:
+        dict: Saved configuration
+
+    Raises:
+        Exception: If the profile does not exist
+    """
+    path = join(profile_dir, f'{name}.json')
+    if not isfile(path):
+        raise Exception(f"profile {name} not found")
+    with open(path, 'rb') as f:
+        return json_backend.load(f)
+
+def autotune(model:"EssenceModel", instances:list[dict|str], search_space:dict[str, list], profile:str|None=None,
+             budget:float|None=None, time_limit:int|None=None, statistic:str="mean", max_workers:int|None=None) -> dict:
+    """
+    Benchmark every configuration of a search space in parallel on training instances and pick the one with the
+    lowest runtime statistic. Each run solves an independent copy of the model with its own cache directory.
+
+    Args:
+        model (EssenceModel): Model to tune
+        instances (list[dict | str]): Training parameters, as dicts or parameter file paths
+        search_space (dict[str, list]): Values to try for each of the CONFIGURATION_KEYS
+        profile (str, optional): Save the best configuration under this name
+        budget (float, optional): Wall-clock budget in seconds. No new run starts once it is spent,
+            and configurations that were not run on every instance are not ranked
+        time_limit (int, optional): Time limit of each run in seconds. Failed and timed out solves count as
+            FAILURE_PENALTY times the limit, or as infinite without a limit
+        statistic (str, optional): Runtime statistic to minimise, see score
+        max_workers (int, optional): Maximum number of runs at once. Defaults to the number of CPUs
+
+    Returns:
+        dict: 'configuration' (the best configuration), 'score' (its statistic) and 'results'
+            (every ranked configuration with its 'runtimes', 'score' and 'resources' summed over the instances, best first)
+
+    Raises:
+        Exception: If no configuration could be ranked within the budget, or a configuration is invalid for the model
+    """
+    assert len(instances) > 0, "expected at least one training instance"
+    candidates = configurations(search_space)
+    penalty = math.inf if time_limit is None else FAILURE_PENALTY * time_limit
+    start = time.perf_counter()
+
+    def run(configuration:dict, instance:dict|str, cache_dir:str) -> tuple[float|None, dict|None]:
+        if budget is not None and time.perf_counter() - start > budget:
+            return None, None
+        worker = model.copy(cache_dir=cache_dir)
+        try:
+            apply_configuration(worker, configuration)
+            if time_limit is not None:
+                worker.set_time_limit(time_limit)
+            run_start = time.perf_counter()
+            worker.solve(instance)
+            runtime = time.perf_counter() - run_start
+        except Exception:
+            resources = worker.get_resources()
+            # errors raised before any process ran come from the configuration or the arguments, not from the solve
+            if resources is None or resources['processes'] == 0:
+                raise
+            return penalty, resources
+        return penalty if solver_timed_out(worker.getStats()) else runtime, worker.get_resources()
+
+    work_dir = tempfile.mkdtemp(prefix='conjure-autotune-')
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers if max_workers is not None else os.cpu_count()) as executor:
+            runs = [[submit(executor, model.get_tracer(), run, configuration, instance, join(work_dir, f'config{i}-instance{j}'))
+                     for j, instance in enumerate(instances)]
+                    for i, configuration in enumerate(candidates)]
+            outcomes = [[future.result() for future in futures] for futures in runs]
+    finally:
+        rmtree(work_dir, ignore_errors=True)
+
+    results = []
+    for configuration, configuration_outcomes in zip(candidates, outcomes):
+        times = [t for t, _ in configuration_outcomes]
+        if None not in times:
+            results.append({'configuration': configuration, 'runtimes': times, 'score': score(times, statistic),
+                            'resources': aggregate_resources([r for _, r in configuration_outcomes])})
+    results.sort(key=lambda r: r['score'])
+    if len(results) == 0:
+        raise Exception("no configuration was run on every instance within the budget")
+    if profile is not None:
+        save_profile(profile, results[0]['configuration'])
+    return {'configuration': results[0]['configuration'], 'score': results[0]['score'], 'results': results}
@@ -0,0 +1,125 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import conjure_python.conjure
+
+# conjure stand-in: answers --version, ide --dump-declarations, modelling, refine-param, translate-solution and solve, 
+# and logs every call. solve finds x = n, or fails when CONJURE_STUB_FAIL is set
+STUB = """#!{python}
+import json, os, sys
+args = sys.argv[1:]
+if 'CONJURE_STUB_LOG' in os.environ:
+    with open(os.environ['CONJURE_STUB_LOG'], 'a') as f:
+        f.write(json.dumps(args) + '\\n')
+# available() runs conjure without arguments
+if args == [] or args[:1] == ['--version']:
+    print('Conjure: stub')
+elif args[:2] == ['ide', '--dump-declarations']:
+    print(os.environ.get('CONJURE_STUB_DECLARATIONS', json.dumps([
+        {{'kind': 'Given', 'name': 'n', 'domain': 'int(1..10)'}},
+        {{'kind': 'Find', 'name': 'x', 'domain': 'int(1..10)'}}])))
+elif args[:1] == ['modelling']:
+    size = int(([a.split('=', 1)[1] for a in args if a.startswith('--portfolio=')] + ['1'])[0])
+    output = [a.split('=', 1)[1] for a in args if a.startswith('--output-directory=')][0]
+    os.makedirs(output, exist_ok=True)
+    for i in range(1, size + 1):
+        with open(os.path.join(output, 'model%06d.eprime' % i), 'w') as f:
+            f.write("language ESSENCE' 1.0\\n")
+elif args[:1] == ['refine-param']:
+    essence_param = [a.split('=', 1)[1] for a in args if a.startswith('--essence-param=')][0]
+    eprime_param = [a.split('=', 1)[1] for a in args if a.startswith('--eprime-param=')][0]
+    with open(essence_param) as f, open(eprime_param, 'w') as g:
+        g.write(f.read())
+elif args[:1] == ['translate-solution']:
+    params = {{}}
+    for a in args:
+        if a.startswith('--essence-param='):
+            with open(a.split('=', 1)[1]) as f:
+                params = json.load(f)
+    with open([a.split('=', 1)[1] for a in args if a.startswith('--essence-solution=')][0], 'w') as f:
+        json.dump({{'x': params.get('n', 1)}}, f)
+elif args[:1] == ['solve']:
+    if 'CONJURE_STUB_FAIL' in os.environ:
+        sys.stderr.write(os.environ['CONJURE_STUB_FAIL'])
+        sys.exit(1)
+    params = {{}}
+    if len(args) > 2 and not args[2].startswith('--'):
+        with open(args[2]) as f:
+            params = json.load(f)
+    output = [a.split('=', 1)[1] for a in args if a.startswith('--output-directory=')][0]
+    os.makedirs(output, exist_ok=True)
+    print('Savile Row: model000001.eprime', flush=True)
+    print('Running minion for domain filtering.', flush=True)
+    solution = {{'x': params.get('n', 1)}}
+    with open(os.path.join(output, 'model000001.eprime-info'), 'w') as f:
+        f.write('SolverTotalTime:0.01\\nSolverTimeOut:0\\n')
+    print('Copying solution to: model000001-solution000001.solution.json', flush=True)
+    if '--solutions-in-one-file' in args:
+        with open(os.path.join(output, 'model000001-solutions.json'), 'w') as f:
+            json.dump([solution], f)
+    else:
+        with open(os.path.join(output, 'model000001-solution000001.solution.json'), 'w') as f:
+            json.dump(solution, f)
+else:
+    sys.exit('unsupported command ' + ' '.join(args))
+"""
+
+# savilerow and SAT solver stand-in: logs every call with the name of the program, writes the files savile row 
+# is asked for, and answers satisfiable as a SAT solver
+TOOL_STUB = """#!{python}
+import json, os, sys
+args = sys.argv[1:]
+name = os.path.basename(sys.argv[0])
+if 'CONJURE_STUB_LOG' in os.environ:
+    with open(os.environ['CONJURE_STUB_LOG'], 'a') as f:
+        f.write(json.dumps([name] + args) + '\\n')
+if name == 'savilerow':
+    for flag in ['-out-minion', '-out-sat', '-out-aux', '-out-solution']:
+        if flag in args:
+            with open(args[args.index(flag) + 1], 'w') as f:
+                f.write(flag)
+else:
+    print('s SATISFIABLE')
+    print('v 1 0')
+    sys.exit(10)
+"""
+
+class ConjureStubTestCase(unittest.TestCase):
+    """
+    Runs its tests with a stub conjure on the PATH, and a temporary cache directory in self.cache_dir.
+    """
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.log = os.path.join(self.directory, 'calls.jsonl')
+        bin_dir = os.path.join(self.directory, 'bin')
+        os.mkdir(bin_dir)
+        with open(os.path.join(bin_dir, 'conjure'), 'w') as f:
+            f.write(STUB.format(python=sys.executable))
+        os.chmod(os.path.join(bin_dir, 'conjure'), 0o755)
+        for tool in ['savilerow', 'kissat']:
+            with open(os.path.join(bin_dir, tool), 'w') as f:
+                f.write(TOOL_STUB.format(python=sys.executable))
+            os.chmod(os.path.join(bin_dir, tool), 0o755)
+        environment = mock.patch.dict(os.environ, {'PATH': bin_dir + os.pathsep + os.environ.get('PATH', ''),
+                                                   'CONJURE_STUB_LOG': self.log})
+        environment.start()
+        self.addCleanup(environment.stop)
+        version = mock.patch.object(conjure_python.conjure, '_conjure_version', None)
+        version.start()
+        self.addCleanup(version.stop)
+
+    def calls(self, command:str) -> list[list[str]]:
+        """
+        Get the arguments of the stub calls running a command, e.g. 'solve', or a tool, e.g. 'savilerow'.
+        """
+        import json
+        if not os.path.isfile(self.log):
+            return []
+        with open(self.log) as f:
+            return [c for c in [json.loads(line) for line in f] if c[:1] == [command]]
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from conjure_python.bench import (compare, discover, format_table, load_results, main, parse_configurations, result_key, run, 
+                                  summarise, unmatched)
+from tests.conjure_stub import ConjureStubTestCase
+
+def result(instance, solver, status, runtime):
+    return {'model': 'm.essence', 'instance': instance, 'configuration': {'solver': solver}, 'status': status, 'runtime': runtime}
+
+class TestBench(unittest.TestCase):
+
+    def test_discover(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.makedirs(os.path.join(directory, 'a'))
+            os.makedirs(os.path.join(directory, 'b'))
+            for name in ['a/model.essence', 'a/1.param', 'a/2.json', 'a/notes.txt', 'b/model.essence']:
+                open(os.path.join(directory, name), 'w').close()
+            pairs = [(os.path.relpath(m, directory), p and os.path.basename(p)) for m, p in discover(directory)]
+            self.assertEqual(pairs, [('a/model.essence', '1.param'), ('a/model.essence', '2.json'), ('b/model.essence', None)])
+
+    def test_summary(self):
+        results = [result('1', 'kissat', 'SAT', 1.0), result('2', 'kissat', 'UNSAT', 3.0), result('3', 'kissat', 'timeout', 60.0),
+                   result('1', None, 'error', None)]
+        rows = summarise(results)
+        self.assertEqual(rows[0]['solved'], 2)
+        self.assertEqual(rows[0]['timeouts'], 1)
+        self.assertEqual(rows[0]['mean'], 2.0)
+        self.assertIsNone(rows[1]['mean'])
+        table = format_table(rows)
+        self.assertIn('solver=kissat', table)
+        self.assertIn('default', table)
+
+    def test_compare(self):
+        baseline = [result('1', 'kissat', 'SAT', 1.0), result('2', 'kissat', 'SAT', 1.0), result('3', 'kissat', 'timeout', 60.0)]
+        results = [result('1', 'kissat', 'SAT', 1.1), result('2', 'kissat', 'timeout', 60.0), result('3', 'kissat', 'SAT', 5.0)]
+        self.assertEqual([r['reason'] for r in compare(results, baseline)], ['unsolved'])
+        self.assertEqual([r['reason'] for r in compare(results, baseline, threshold=1.05)], ['slower', 'unsolved'])
+        self.assertEqual(unmatched(results, baseline), [])
+        self.assertEqual(unmatched(results + [result('4', 'kissat', 'SAT', 1.0)], baseline), [result('4', 'kissat', 'SAT', 1.0)])
+
+    def test_arguments(self):
+        self.assertEqual(parse_configurations(None, None), [{}])
+        self.assertEqual(parse_configurations(['minion', 'kissat'], None), [{'solver': 'minion'}, {'solver': 'kissat'}])
+        self.assertEqual(main(['/does/not/exist']), 2)
+
+class TestBenchRun(ConjureStubTestCase):
+
+    def test_run_minion_with_timeout(self):
+        model_file = os.path.join(self.directory, 'model.essence')
+        with open(model_file, 'w') as f:
+            f.write("given n : int(1..10)\nfind x : int(1..10)\nsuch that x = n")
+        parameter_file = os.path.join(self.directory, 'instance.json')
+        with open(parameter_file, 'w') as f:
+            f.write('{"n": 6}')
+        result = run(model_file, parameter_file, {'solver': 'minion'}, timeout=60)
+        self.assertEqual(result['status'], 'SAT', result['error'])
+        self.assertEqual(result['solutions'], 1)
+        solve = self.calls('solve')[0]
+        self.assertIn('-cpulimit 60', ' '.join(solve))
+
+    def test_generated_instances_match_baseline(self):
+        benchmark = os.path.join(self.directory, 'models')
+        os.makedirs(benchmark)
+        with open(os.path.join(benchmark, 'model.essence'), 'w') as f:
+            f.write("given n : int(1..10)\nfind x : int(1..10)\nsuch that x = n")
+        baseline = os.path.join(self.directory, 'baseline.jsonl')
+        candidate = os.path.join(self.directory, 'candidate.jsonl')
+        self.assertEqual(main([benchmark, '--generate', '2', '--output', baseline, '--jobs', '1']), 0)
+        self.assertEqual(main([benchmark, '--generate', '2', '--output', candidate, '--jobs', '1', 
+                               '--baseline', baseline, '--threshold', '1000']), 0)
+        results, previous = load_results(candidate), load_results(baseline)
+        # the instances are written next to each results file, but hash the same
+        self.assertNotEqual([r['instance'] for r in results], [r['instance'] for r in previous])
+        self.assertEqual([result_key(r) for r in results], [result_key(r) for r in previous])
+        # a baseline of other instances compares nothing, which is an error rather than no regression
+        other = os.path.join(self.directory, 'other.jsonl')
+        self.assertEqual(main([benchmark, '--generate', '2', '--seed', '5', '--output', other, '--jobs', '1', 
+                               '--baseline', baseline]), 2)
+
+if __name__ == "__main__":
+    unittest.main()
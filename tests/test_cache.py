@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from hashlib import sha256
+from conjure_python import conjure_cache
+from conjure_python.conjure_cache import Cache, file_hash
+
+class TestCache(unittest.TestCase):
+
+    def test_file_hash(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.essence')
+            with open(path, 'w') as f:
+                f.write('find x : int(1..3)')
+            self.assertEqual(file_hash(path), sha256(b'find x : int(1..3)').hexdigest())
+            self.assertIn(os.path.abspath(path), conjure_cache._file_hashes)
+
+            # unchanged files are not read again
+            conjure_cache._file_hashes[os.path.abspath(path)] = conjure_cache._file_hashes[os.path.abspath(path)][:2] + ('cached',)
+            self.assertEqual(file_hash(path), 'cached')
+
+            # changed files are hashed again
+            with open(path, 'w') as f:
+                f.write('find x : int(1..4)')
+            os.utime(path, ns=(0, 1))
+            self.assertEqual(file_hash(path), sha256(b'find x : int(1..4)').hexdigest())
+
+    def test_create_file_from_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = Cache(directory)
+            def chunks():
+                yield '{"n": '
+                raise TypeError("cannot encode value")
+            with self.assertRaises(TypeError):
+                cache.create_file_from_chunks('instance.json', chunks())
+            self.assertFalse(os.path.exists(os.path.join(directory, 'instance.json')))
+            # write errors leave no partial file either
+            def full_disk():
+                yield '{"n": '
+                raise OSError(28, "No space left on device")
+            self.assertFalse(cache.create_file_from_chunks('instance.json', full_disk()))
+            self.assertFalse(os.path.exists(os.path.join(directory, 'instance.json')))
+            self.assertTrue(cache.create_file_from_chunks('instance.json', ['{"n": ', '1}']))
+            with open(os.path.join(directory, 'instance.json')) as f:
+                self.assertEqual(f.read(), '{"n": 1}')
+
+if __name__ == "__main__":
+    unittest.main()
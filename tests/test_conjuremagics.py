@@ -0,0 +1,66 @@
+import json
+import os
+from collections import OrderedDict
+import unittest
+from unittest import mock
+from conjure_python import conjure_cache
+from tests.conjure_stub import ConjureStubTestCase
+
+DECLARATIONS = [{'kind': 'Given', 'name': 'n', 'domain': 'int(1..10)'},
+                {'kind': 'Given', 'name': 'f', 'domain': 'function (total) int(1..3) --> int(1..3)'},
+                {'kind': 'Find', 'name': 'x', 'domain': 'int(1..10)'}]
+MODEL = "given n : int(1..10)\ngiven f : function (total) int(1..3) --> int(1..3)\nfind x : int(1..10)\nsuch that x = n"
+
+class TestConjureMagics(ConjureStubTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from IPython.testing.globalipapp import get_ipython
+        from conjure_python.conjuremagics import ConjureMagics
+        patches = [mock.patch.dict(os.environ, {'CONJURE_STUB_DECLARATIONS': json.dumps(DECLARATIONS)}),
+                   mock.patch.object(conjure_cache, 'CACHE_DIR', self.cache_dir),
+                   mock.patch.object(ConjureMagics, 'conjure_session_models', {}),
+                   mock.patch.object(ConjureMagics, 'conjure_results', OrderedDict()),
+                   mock.patch.object(ConjureMagics, 'conjure_solutions_dir', None),
+                   mock.patch('conjure_python.conjuremagics.atexit')]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.shell = get_ipython()
+        self.magics = ConjureMagics(self.shell)
+        self.shell.register_magics(self.magics)
+
+    def test_function_parameter(self):
+        self.shell.user_ns.update({'n': 4, 'f': {1: 2, 2: 3, 3: 1}})
+        self.shell.run_cell_magic('conjure', '', MODEL)
+        self.assertEqual(self.shell.user_ns['x'], 4)
+        solve = self.calls('solve')[0]
+        with open(os.path.join(self.cache_dir, solve[2])) as f:
+            self.assertEqual(json.load(f)['f'], {'1': 2, '2': 3, '3': 1})
+
+    def test_stores_removed_at_exit(self):
+        from conjure_python.conjuremagics import ConjureMagics, atexit
+        self.shell.user_ns.update({'n': 4, 'f': {1: 2, 2: 3, 3: 1}})
+        self.shell.run_cell_magic('conjure', '', MODEL)
+        self.shell.run_cell_magic('conjure', '--fresh', MODEL)
+        solutions_dir = ConjureMagics.conjure_solutions_dir
+        self.assertEqual(len(os.listdir(solutions_dir)), 6)
+        atexit.register.assert_called_once()
+        function, *args = atexit.register.call_args.args
+        function(*args, **atexit.register.call_args.kwargs)
+        self.assertFalse(os.path.exists(solutions_dir))
+
+    def test_memoized_results_are_bounded(self):
+        from conjure_python import conjuremagics
+        self.shell.user_ns['f'] = {1: 2, 2: 3, 3: 1}
+        with mock.patch.object(conjuremagics, 'MEMOIZED_RESULTS', 2):
+            for n in [1, 2, 1, 3, 1, 2]:
+                self.shell.user_ns['n'] = n
+                self.shell.run_cell_magic('conjure', '', MODEL)
+                self.assertEqual(self.shell.user_ns['x'], n)
+        # n = 1 stays memoized as it is used again, n = 2 is forgotten when n = 3 comes in and is solved again
+        self.assertEqual(len(self.magics.conjure_results), 2)
+        self.assertEqual(len(self.calls('solve')), 4)
+
+if __name__ == "__main__":
+    unittest.main()
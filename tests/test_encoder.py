@@ -0,0 +1,93 @@
+import unittest
+from conjure_python.encoder import encode_parameter, encode_parameters, function_domains, matrix_index_domains, tuple_domains
+from conjure_python.essence_types import EssenceMatrix, EssenceFunction, EssenceRelation, EssenceSet, EssenceSequence, EssenceTuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class TestEncoder(unittest.TestCase):
+
+    def test_domain_parsing(self):
+        self.assertEqual(matrix_index_domains("matrix indexed by [int(1..k), int(1..b)] of int(1..g)"), ['int(1..k)', 'int(1..b)'])
+        self.assertEqual(function_domains("function (total, injective) int(1..n) --> int(1..n)"), ('int(1..n)', 'int(1..n)'))
+        self.assertEqual(function_domains("function (int(1..2), bool) --> int(1..n)"), ('(int(1..2), bool)', 'int(1..n)'))
+        self.assertEqual(tuple_domains("relation (minSize 1) of ( int(1..n) * bool )"), ['int(1..n)', 'bool'])
+        self.assertEqual(tuple_domains("tuple(int(1..5), bool)"), ['int(1..5)', 'bool'])
+
+    def test_matrix(self):
+        domain = "matrix indexed by [int(1..2), int(1..3)] of int(0..9)"
+        self.assertEqual(encode_parameter([[1, 2, 3], [4, 5, 6]], domain), [[1, 2, 3], [4, 5, 6]])
+        self.assertEqual(encode_parameter(((1, 2, 3), (4, 5, 6)), domain), [[1, 2, 3], [4, 5, 6]])
+        self.assertEqual(encode_parameter({'1': {'1': 1}}, domain), {'1': {'1': 1}})
+        matrix = EssenceMatrix([[1, 2, 3], [4, 5, 6]], domain)
+        self.assertEqual(encode_parameter(matrix, domain), [[1, 2, 3], [4, 5, 6]])
+        self.assertEqual(encode_parameter([{3, 1}, {2}], "matrix indexed by [int(1..2)] of set of int(1..3)"), [[1, 3], [2]])
+
+    @unittest.skipIf(numpy is None, "numpy not installed")
+    def test_numpy(self):
+        array = numpy.arange(6).reshape(2, 3)
+        self.assertEqual(encode_parameter(array, "matrix indexed by [int(1..2), int(1..3)] of int(0..9)"), [[0, 1, 2], [3, 4, 5]])
+        self.assertEqual(encode_parameter(array % 2, "matrix indexed by [int(1..2), int(1..3)] of bool"), [[False, True, False], [True, False, True]])
+        self.assertEqual(encode_parameter(numpy.int64(3), "int(1..5)"), 3)
+        with self.assertRaises(Exception):
+            encode_parameter(array / 2, "matrix indexed by [int(1..2), int(1..3)] of int(0..9)")
+        for value in [numpy.float64(3.0), numpy.bool_(True), numpy.array([1.5, 2.5]), numpy.array([True, False])]:
+            with self.assertRaises(Exception):
+                encode_parameter(value, "int(1..5)")
+        with self.assertRaises(Exception):
+            encode_parameter(array > 2, "matrix indexed by [int(1..2), int(1..3)] of int(0..9)")
+        with self.assertRaises(Exception):
+            encode_parameter(numpy.array([0.5]), "sequence of int(1..3)")
+        self.assertEqual(encode_parameter(numpy.bool_(True), "bool"), True)
+
+    def test_collections(self):
+        self.assertEqual(encode_parameter({3, 1, 2}, "set of int(1..3)"), [1, 2, 3])
+        self.assertEqual(encode_parameter(EssenceSet([2, 1], "set of int(1..3)"), "set of int(1..3)"), [1, 2])
+        self.assertEqual(encode_parameter((3, 1), "sequence of int(1..3)"), [3, 1])
+        self.assertEqual(encode_parameter(EssenceSequence([3, 1], "sequence of int(1..3)"), "sequence of int(1..3)"), [3, 1])
+        self.assertEqual(encode_parameter({(2, 1), (1, 2)}, "relation of (int(1..2) * int(1..2))"), [[1, 2], [2, 1]])
+        self.assertEqual(encode_parameter(EssenceRelation([[2, 1]], "relation of (int(1..2) * int(1..2))"), "relation of (int(1..2) * int(1..2))"), [[2, 1]])
+        self.assertEqual(encode_parameter((1, True), "tuple(int(1..2), bool)"), [1, True])
+        self.assertEqual(encode_parameter(EssenceTuple([1, True], "tuple(int(1..2), bool)"), "(int(1..2), bool)"), [1, True])
+        self.assertEqual(encode_parameter({'A': 1}, "record {A : int(0..1)}"), {'A': 1})
+
+    def test_function(self):
+        domain = "function (total) int(1..3) --> int(1..3)"
+        self.assertEqual(encode_parameter({1: 2, 2: 3}, domain), {'1': 2, '2': 3})
+        self.assertEqual(encode_parameter(EssenceFunction({'1': 2}, domain), domain), {'1': 2})
+
+    def test_encode_parameters(self):
+        declarations = [{'name': 'n', 'domain': 'int(1..5)'}, {'name': 'S', 'domain': 'set of int(1..5)'}]
+        self.assertEqual(encode_parameters({'n': 3, 'S': {2, 1}, 'extra': 'x'}, declarations), {'n': 3, 'S': [1, 2], 'extra': 'x'})
+        with self.assertRaises(Exception):
+            encode_parameter("3", "int(1..5)")
+
+    def test_composite_domains(self):
+        self.assertEqual(encode_parameter((1, {2, 1}), "(int(1..3), set of int(1..3))"), [1, [1, 2]])
+        self.assertEqual(encode_parameter({'A': {2, 1}}, "record {A : set of int(1..3)}"), {'A': [1, 2]})
+        self.assertEqual(encode_parameter([{'A': 1}], "set of record {A : int(0..1)}"), [{'A': 1}])
+
+    def test_encode_twice(self):
+        declarations = [{'name': 'f', 'domain': 'function (total) int(1..3) --> int(1..3)'},
+                        {'name': 'g', 'domain': 'function (int(1..2), int(1..2)) --> bool'},
+                        {'name': 't', 'domain': '(int(1..3), set of int(1..3))'},
+                        {'name': 'M', 'domain': 'matrix indexed by [int(1..2)] of bool'}]
+        params = {'f': {1: 2, 2: 3, 3: 1}, 'g': {(1, 2): True}, 't': (1, {3, 2}), 'M': [True, False]}
+        encoded = encode_parameters(params, declarations)
+        self.assertEqual(encoded['f'], {'1': 2, '2': 3, '3': 1})
+        self.assertEqual(encode_parameters(encoded, declarations), encoded)
+
+    def test_bool_is_not_int(self):
+        self.assertEqual(encode_parameter(True, "bool"), True)
+        self.assertEqual(encode_parameter(1, "bool"), True)
+        with self.assertRaises(Exception):
+            encode_parameter(True, "int(1..5)")
+        with self.assertRaises(Exception):
+            encode_parameter([True, 2], "matrix indexed by [int(1..2)] of int(0..9)")
+        with self.assertRaises(Exception):
+            encode_parameter({False}, "set of int(0..1)")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+import unittest
+from conjure_python import EssenceSolution, SolutionIndex, fingerprint
+from conjure_python.essence_types import EssenceMatrix, EssenceFunction, EssenceRelation, EssenceRecord, EssenceSet, EssenceSequence, EssenceTuple
+
+MATRIX_DOMAIN = "matrix indexed by [int(1..2), int(1..2), int(1..2)] of int(0..9)"
+
+def make_solution(x:int, s:list[int]) -> tuple[dict, dict]:
+    raw = {'x': x, 'S': s, 'M': {'1': {'1': {'1': x, '2': 0}, '2': {'1': 0, '2': 0}}, '2': {'1': {'1': 0, '2': 0}, '2': {'1': 0, '2': 0}}}}
+    python = {'x': x, 'S': EssenceSet(s, "set of int(0..9)"), 'M': EssenceMatrix(raw['M'], MATRIX_DOMAIN)}
+    return raw, python
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_equality_and_hash(self):
+        pairs = [
+            (EssenceMatrix({'1': {'1': {'1': 1}}}, "matrix indexed by [int(1..1), int(1..1), int(1..1)] of int(0..9)"),
+             EssenceMatrix([[[1]]], "matrix indexed by [int(1..1), int(1..1), int(1..1)] of int(0..9)")),
+            (EssenceFunction({'1': 2, '2': 3}, "function int(1..2) --> int(1..3)"),
+             EssenceFunction({'2': 3, '1': 2}, "function int(1..2) --> int(1..3)")),
+            (EssenceRelation([[1, 2], [2, 1]], "relation of ( int(1..2) * int(1..2) )"),
+             EssenceRelation([[2, 1], [1, 2]], "relation of ( int(1..2) * int(1..2) )")),
+            (EssenceRecord({'A': 0, 'B': 1}, 'record {A : int(0..1), B : int(1..2)}'),
+             EssenceRecord({'B': 1, 'A': 0}, 'record {A : int(0..1), B : int(1..2)}')),
+            (EssenceSet([3, 1, 2], "set of int(1..3)"), EssenceSet([1, 2, 3], "set of int(1..3)")),
+            (EssenceSequence([1, 2], "sequence of int(1..2)"), EssenceSequence([1, 2], "sequence of int(1..2)")),
+            (EssenceTuple([1, True], "tuple(int(1..2), bool)"), EssenceTuple([1, True], "tuple(int(1..2), bool)")),
+        ]
+        for a, b in pairs:
+            self.assertEqual(a, b)
+            self.assertEqual(hash(a), hash(b))
+            self.assertEqual(len({a, b}), 1)
+            self.assertEqual(fingerprint({'v': a}), fingerprint({'v': b}))
+        self.assertNotEqual(EssenceSequence([1, 2], "sequence of int(1..2)"), EssenceSequence([2, 1], "sequence of int(1..2)"))
+        self.assertNotEqual(EssenceSet([1], "set of int(1..3)"), EssenceSequence([1], "sequence of int(1..3)"))
+
+    def test_fingerprint_is_stable_across_processes(self):
+        _, python = make_solution(1, [1, 2])
+        code = "from tests.test_fingerprint import make_solution; from conjure_python import fingerprint; print(fingerprint(make_solution(1, [2, 1])[1]))"
+        output = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, env={'PYTHONHASHSEED': '123'}, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), check=True)
+        self.assertEqual(output.stdout.decode('utf-8').strip(), fingerprint(python))
+
+    def test_solution_index(self):
+        first_run = [make_solution(1, [1, 2]), make_solution(2, [3])]
+        second_run = [make_solution(2, [3]), make_solution(3, [4])]
+        first = EssenceSolution([r for r, _ in first_run], [p for _, p in first_run])
+        second = EssenceSolution([r for r, _ in second_run], [p for _, p in second_run])
+
+        index = SolutionIndex([first])
+        self.assertEqual(len(index), 2)
+        self.assertIn(first.python_solution[0], index)
+        self.assertIn(first.fingerprints()[1], index)
+        self.assertNotIn(second.python_solution[1], index)
+        self.assertEqual(index.add_all(second), 1)
+        self.assertEqual(len(index), 3)
+
+        first_index, second_index = SolutionIndex([first]), SolutionIndex([second])
+        self.assertEqual(len(first_index | second_index), 3)
+        self.assertEqual((first_index - second_index).fingerprints(), {first.fingerprints()[0]})
+        self.assertEqual((first_index & second_index).fingerprints(), {second.fingerprints()[0]})
+        merged = (first_index | second_index).to_solution()
+        self.assertEqual(len(merged), 3)
+        self.assertEqual(merged.raw[0], first.raw[0])
+
+    def test_solution_index_raw_lookup(self):
+        domains = {'x': 'int(0..9)', 'M': 'matrix indexed by [int(1..2)] of int(0..9)'}
+        raw = [{'x': 1, 'M': {'1': 5, '2': 6}}]
+        solution = EssenceSolution(raw, [{'x': 1, 'M': EssenceMatrix(raw[0]['M'], domains['M'])}], domains=domains)
+        index = SolutionIndex([solution])
+        self.assertIn({'x': 1, 'M': {'1': 5, '2': 6}}, index)
+        self.assertIn(solution.python_solution[0], index)
+        self.assertNotIn({'x': 1, 'M': {'1': 6, '2': 5}}, index)
+        self.assertFalse(index.add({'x': 1, 'M': {'1': 5, '2': 6}}))
+        self.assertIn({'x': 1, 'M': {'1': 5, '2': 6}}, index | SolutionIndex())
+
+if __name__ == "__main__":
+    unittest.main()
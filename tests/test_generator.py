@@ -0,0 +1,71 @@
+import unittest
+from conjure_python.encoder import encode_parameters
+from conjure_python.generator import evaluate, generate_instances
+
+DECLARATIONS = [
+    {'kind': 'Given', 'name': 'n', 'domain': 'int(3..6)'},
+    {'kind': 'Given', 'name': 'm', 'domain': 'matrix indexed by [int(1..n), int(1..2)] of int(0..n - 1)'},
+    {'kind': 'Given', 'name': 's', 'domain': 'set (size 3) of int(1..n)'},
+    {'kind': 'Given', 'name': 'f', 'domain': 'function (total, injective) int(1..3) --> int(1..2 * n)'},
+    {'kind': 'Given', 'name': 'r', 'domain': 'relation (size 2) of (int(1..3) * bool)'},
+    {'kind': 'Given', 'name': 'q', 'domain': 'sequence (maxSize 2) of set (size 2) of int(1..4)'},
+    {'kind': 'Given', 'name': 'c', 'domain': 'int(1..5)', 'values': 3},
+    {'kind': 'Find', 'name': 'x', 'domain': 'int(1..n)'},
+]
+
+class TestGenerator(unittest.TestCase):
+
+    def test_evaluate(self):
+        self.assertEqual(evaluate('2 * n - 1', {'n': 4}), 7)
+        self.assertEqual(evaluate('n / 2', {'n': 5}), 2)
+        self.assertEqual(evaluate('-3', {}), -3)
+        with self.assertRaises(Exception):
+            evaluate('k + 1', {})
+        with self.assertRaises(Exception):
+            evaluate('__import__("os")', {})
+
+    def test_valid_instances(self):
+        for instance in generate_instances(DECLARATIONS, 20, seed=3):
+            self.assertEqual(set(instance), {'n', 'm', 's', 'f', 'r', 'q'})
+            n = instance['n']
+            self.assertTrue(3 <= n <= 6)
+            self.assertEqual(len(instance['m']), n)
+            self.assertTrue(all([len(row) == 2 and all([0 <= v < n for v in row]) for row in instance['m']]))
+            self.assertEqual(len(instance['s']), 3)
+            self.assertTrue(instance['s'] <= set(range(1, n + 1)))
+            self.assertEqual(set(instance['f']), {1, 2, 3})
+            self.assertEqual(len(set(instance['f'].values())), 3)
+            self.assertEqual(len(set(instance['r'])), 2)
+            self.assertEqual(len(instance['q']), 2)
+            encode_parameters(instance, DECLARATIONS)
+
+    def test_seeds(self):
+        self.assertEqual(generate_instances(DECLARATIONS, 3, seed=7), generate_instances(DECLARATIONS, 3, seed=7))
+        self.assertEqual(generate_instances(DECLARATIONS, 3, seed=7)[1], generate_instances(DECLARATIONS, 1, seed=8)[0])
+        self.assertNotEqual(generate_instances(DECLARATIONS, 5, seed=0), generate_instances(DECLARATIONS, 5, seed=1))
+
+    def test_sizes_and_fixed(self):
+        declarations = [{'kind': 'Given', 'name': 'n', 'domain': 'int(1..100)'},
+                        {'kind': 'Given', 'name': 'edges', 'domain': 'set of (int(1..n), int(1..n))'},
+                        {'kind': 'Given', 'name': 'colour', 'domain': 'Colour'}]
+        with self.assertRaises(Exception):
+            generate_instances(declarations, 1)
+        instance = generate_instances(declarations, 1, sizes={'edges': 30}, fixed={'n': 10, 'colour': 'red'})[0]
+        self.assertEqual(instance['n'], 10)
+        self.assertEqual(len(instance['edges']), 30)
+        self.assertTrue(all([1 <= a <= 10 and 1 <= b <= 10 for a, b in instance['edges']]))
+        with self.assertRaises(Exception):
+            generate_instances(declarations, 1, sizes={'edges': 101}, fixed={'n': 10, 'colour': 'red'})
+
+    def test_composite_domains(self):
+        declarations = [{'kind': 'Given', 'name': 't', 'domain': '(int(1..3), set (size 2) of int(1..3))'},
+                        {'kind': 'Given', 'name': 'p', 'domain': 'record {a : set (size 1) of int(1..2), b : bool}'}]
+        instance = generate_instances(declarations, 1, seed=1)[0]
+        self.assertTrue(1 <= instance['t'][0] <= 3)
+        self.assertEqual(len(instance['t'][1]), 2)
+        self.assertEqual(len(instance['p']['a']), 1)
+        encoded = encode_parameters(instance, declarations)
+        self.assertEqual(encoded['t'][1], sorted(instance['t'][1]))
+
+if __name__ == "__main__":
+    unittest.main()
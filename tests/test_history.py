@@ -0,0 +1,54 @@
+import unittest
+from conjure_python.history import HistoryDatabase
+
+class TestHistoryDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.history = HistoryDatabase(':memory:')
+
+    def tearDown(self):
+        self.history.close()
+
+    def record(self, runtime, version='2.5.0', status='SAT', solver='kissat'):
+        return self.history.record('model', {'n': 10.0}, {'solver': solver}, runtime, status, 
+                                   info={'SolverNodes': '42', 'SolverSatisfiable': 'True'}, instance_key='instance', 
+                                   phases={'savile row': runtime / 4, 'solving': runtime / 2}, 
+                                   resources={'user_time': runtime, 'system_time': 0.1, 'max_rss': 1024}, conjure_version=version)
+
+    def test_runs(self):
+        run = self.record(2.0)
+        runs = self.history.runs('model')
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(runs[0]['id'], run)
+        self.assertEqual(runs[0]['configuration'], {'solver': 'kissat'})
+        self.assertEqual(runs[0]['resources']['max_rss'], 1024)
+        self.assertEqual(self.history.runs('other'), [])
+        self.assertEqual(self.history.info('SolverNodes'), [(run, 42.0)])
+        self.assertEqual(self.history.info('SolverSatisfiable'), [(run, 'True')])
+
+    def test_percentiles(self):
+        for runtime in range(1, 11):
+            self.record(float(runtime))
+        self.record(100.0, status='timeout')
+        self.assertEqual(self.history.percentiles((50, 90)), {50: 5.0, 90: 9.0})
+        self.assertEqual(self.history.percentiles((100,), phase='solving'), {100: 5.0})
+        self.assertEqual(self.history.percentiles(solver='minion'), {})
+        # runs with the default solver are found by its name
+        self.record(3.0, solver=None)
+        self.assertEqual(self.history.percentiles((50,), solver='minion'), {50: 3.0})
+        self.assertEqual(self.history.runtime_over_time(solver='minion')[0]['runs'], 1)
+
+    def test_regressions(self):
+        for runtime in [1.0, 1.1, 0.9]:
+            self.record(runtime, version='2.5.0')
+        for runtime in [2.0, 2.1, 1.9]:
+            self.record(runtime, version='2.6.0')
+        regressions = self.history.regressions()
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual((regressions[0]['previous_version'], regressions[0]['version']), ('2.5.0', '2.6.0'))
+        self.assertAlmostEqual(regressions[0]['ratio'], 2.0)
+        self.assertEqual(self.history.regressions(threshold=3.0), [])
+        self.assertEqual(sum([b['runs'] for b in self.history.runtime_over_time()]), 6)
+
+if __name__ == "__main__":
+    unittest.main()
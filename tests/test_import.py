@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+import unittest
+
+# seconds allowed to import the package in a fresh interpreter
+IMPORT_BUDGET = 1.0
+
+IMPORT_CHECK = """
+import sys, time
+start = time.perf_counter()
+import conjure_python
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(','.join(sorted(m for m in sys.modules if m.split('.')[0] in ('IPython', 'ipywidgets'))))
+"""
+
+class TestImport(unittest.TestCase):
+
+    def test_import_without_ipython(self):
+        output = subprocess.run([sys.executable, '-c', IMPORT_CHECK], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), check=True)
+        elapsed, notebook_modules = output.stdout.decode('utf-8').split('\n')[:2]
+        self.assertEqual(notebook_modules, '')
+        self.assertLess(float(elapsed), IMPORT_BUDGET)
+
+if __name__ == "__main__":
+    unittest.main()
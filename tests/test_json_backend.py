@@ -0,0 +1,88 @@
+import io
+import json
+import tempfile
+import unittest
+from unittest import mock
+from conjure_python import json_backend
+from conjure_python.conjure_cache import Cache
+from conjure_python.essence_types import EssenceMatrix
+
+class TestJsonBackend(unittest.TestCase):
+
+    def tearDown(self):
+        json_backend.set_json_backend()
+
+    def test_backend_selection(self):
+        self.assertIn(json_backend.get_json_backend(), json_backend.PREFERRED_BACKENDS)
+        self.assertEqual(json_backend.set_json_backend('json'), 'json')
+        self.assertEqual(json_backend.get_json_backend(), 'json')
+        with self.assertRaises(Exception):
+            json_backend.set_json_backend('not-a-backend')
+
+    def test_round_trip(self):
+        document = [{'x': 1, 'M': {'1': {'1': 1, '2': 2}, '2': {'1': 3, '2': 4}}, 'b': True}]
+        for backend in json_backend.PREFERRED_BACKENDS:
+            try:
+                json_backend.set_json_backend(backend)
+            except Exception:
+                continue
+            self.assertEqual(json_backend.loads(json_backend.dumps(document)), document)
+            self.assertEqual(json_backend.loads(json_backend.dumps(document).encode('utf-8')), document)
+
+    def test_non_string_keys(self):
+        self.assertEqual(json_backend.loads(json_backend.dumps({1: 2})), {'1': 2})
+
+    def test_decode_matrix(self):
+        matrix = {'1': {'1': '1', '2': '2'}, '2': {'1': '3', '2': '4'}}
+        self.assertEqual(json_backend.decode_matrix(matrix, int, 2), [[1, 2], [3, 4]])
+        self.assertEqual(json_backend.decode_matrix([[1, 2], [3, 4]], dimensions=2), [[1, 2], [3, 4]])
+        # a matrix of sets keeps its innermost lists as elements
+        self.assertEqual(json_backend.decode_matrix({'1': [1, 2], '2': [3]}, set), [{1, 2}, {3}])
+        # matrices not indexed from 1 are left to the generic decoding
+        self.assertIsNone(json_backend.decode_matrix({'0': 1, '1': 2}))
+        self.assertIsNone(json_backend.decode_matrix({'1': {'a': 1}}, dimensions=2))
+
+    def test_matrix_from_lists(self):
+        from_dict = EssenceMatrix({'1': {'1': 1, '2': 2}, '2': {'1': 3, '2': 4}}, "matrix indexed by [int(1..2), int(1..2)] of int(1..4)")
+        from_list = EssenceMatrix([[1, 2], [3, 4]], "matrix indexed by [int(1..2), int(1..2)] of int(1..4)")
+        self.assertEqual(from_dict.matrix, from_list.matrix)
+        self.assertEqual(from_dict.shape, (2, 2))
+        self.assertEqual(from_list.index_types, (int, int))
+        self.assertEqual(from_list[2, 1], 3)
+
+    def test_matrix_not_indexed_from_one(self):
+        matrix = EssenceMatrix({'0': 5, '1': 6}, "matrix indexed by [int(0..1)] of int(0..9)")
+        self.assertEqual(matrix.matrix, [5, 6])
+        self.assertEqual(matrix.shape, (2,))
+
+    def test_streaming_dump(self):
+        document = {'n': 3, 'M': [[i * j for j in range(50)] for i in range(50)], 'F': {str(i): [i, i] for i in range(100)}, 'e': [], 's': 'a"b'}
+        chunks = list(json_backend.iterdumps(document, threshold=64))
+        self.assertGreater(len(chunks), 50)
+        self.assertLess(max(len(c) for c in chunks), len(json.dumps(document)) // 10)
+        self.assertEqual(json.loads(''.join(chunks)), document)
+        buffer = io.StringIO()
+        json_backend.dump(document, buffer)
+        self.assertEqual(json.loads(buffer.getvalue()), document)
+        # small documents are written in a single call
+        self.assertEqual(list(json_backend.iterdumps({'n': [1, 2]})), [json_backend.dumps({'n': [1, 2]})])
+
+    def test_streaming_measures_each_container_once(self):
+        document = {'values': list(range(100))}
+        for _ in range(50):
+            document = {'child': document, 'values': list(range(100))}
+        with mock.patch.object(json_backend, '_estimate_size', wraps=json_backend._estimate_size) as estimate:
+            chunks = list(json_backend.iterdumps(document, threshold=1))
+        self.assertEqual(json.loads(''.join(chunks)), document)
+        # about one call per container and one per sampled element, instead of once per container per level above it
+        self.assertLess(estimate.call_count, 1000)
+
+    def test_cache_streaming(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = Cache(cache_dir)
+            self.assertTrue(cache.create_file_from_chunks('instance.json', json_backend.iterdumps({'M': [[1] * 10] * 10}, threshold=5)))
+            with open(f'{cache_dir}/instance.json') as f:
+                self.assertEqual(json.load(f), {'M': [[1] * 10] * 10})
+
+if __name__ == "__main__":
+    unittest.main()
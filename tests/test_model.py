@@ -0,0 +1,101 @@
+import os
+import time
+import unittest
+from unittest import mock
+from conjure_python import EssenceModel
+from conjure_python.conjure_cache import Cache
+from tests.conjure_stub import ConjureStubTestCase
+
+MODEL = "given n : int(1..10)\nfind x : int(1..10)\nsuch that x = n"
+
+class TestModel(ConjureStubTestCase):
+
+    def test_solve(self):
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        solution = model.solve({'n': 4})
+        self.assertEqual(solution.state, 'SAT')
+        self.assertEqual(solution.raw, [{'x': 4}])
+        self.assertEqual(len(self.calls('solve')), 1)
+        # declarations are dumped once and copied for each solve
+        model.solve({'n': 5})
+        self.assertEqual(len(self.calls('ide')), 1)
+
+    def test_solve_copy(self):
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        model.add_parameters('n', 7)
+        copy = model.copy(cache_dir=self.cache_dir + '-copy')
+        self.assertEqual(copy.solve({'n': 7}).raw, [{'x': 7}])
+
+    def test_solve_with_on_solution(self):
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        found = []
+        solution = model.solve({'n': 2}, on_solution=found.append)
+        self.assertEqual(len(found), 1)
+        self.assertEqual(solution.raw, [{'x': 2}])
+
+    def test_trace_times(self):
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        delivered = []
+        start = time.time()
+        solution = model.solve({'n': 5}, on_solution=lambda _: delivered.append(time.time()), trace=True)
+        # solutions are only timed when their file is picked up, so the trace gives no convergence curve
+        entry = solution.trace[0]
+        self.assertIsNone(entry['objective'])
+        self.assertLessEqual(entry['delivered'], delivered[0] - start)
+        self.assertNotIn('time', entry)
+        with self.assertRaises(AssertionError):
+            solution.convergence()
+
+    def test_append_after_select_representation(self):
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        model.select_representation([{'n': 1}], portfolio_size=2, max_workers=1)
+        self.assertIsNotNone(model.get_representation())
+        model.solve({'n': 2})
+        self.assertTrue(any(a.startswith('--use-existing-models') for a in self.calls('solve')[-1]))
+        # the chosen Essence' model does not have the appended constraint
+        model.append("such that x > 1")
+        self.assertIsNone(model.get_representation())
+        model.solve({'n': 2})
+        self.assertFalse(any(a.startswith('--use-existing-models') for a in self.calls('solve')[-1]))
+
+    def test_failed_solve_to_store(self):
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        store = os.path.join(self.directory, 'solutions.jsonl')
+        self.assertEqual(model.solve({'n': 3}, store=store).raw[0], {'x': 3})
+        with mock.patch.dict(os.environ, {'CONJURE_STUB_FAIL': 'solver crashed'}):
+            with self.assertRaises(Exception):
+                model.solve({'n': 3}, store=store)
+        self.assertFalse(os.path.exists(store + '.meta.json'))
+
+    def test_reuse_sat_translation(self):
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        model.set_solver('kissat')
+        model.set_reuse_translation()
+        for seed in [1, 2]:
+            model.set_random_seed(seed)
+            self.assertEqual(model.solve({'n': 6}).raw, [{'x': 6}])
+        # the model is encoded to DIMACS once, later solves run kissat on it and only read its solution back
+        savilerow = self.calls('savilerow')
+        self.assertEqual(len([c for c in savilerow if '-out-sat' in c]), 1)
+        self.assertEqual(len([c for c in savilerow if 'ReadSolution' in c]), 2)
+        self.assertFalse(any('-run-solver' in c for c in savilerow))
+        self.assertEqual([c[1] for c in self.calls('kissat')], ['--seed=1', '--seed=2'])
+
+    def test_seed_needs_explicit_solver(self):
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        model.set_random_seed(1)
+        with self.assertRaisesRegex(Exception, "default solver"):
+            model.solve({'n': 2})
+        model.set_solver('kissat')
+        self.assertEqual(model.solve({'n': 2}).raw, [{'x': 2}])
+        self.assertIn('--solver-options=--seed=1', self.calls('solve')[-1])
+
+    def test_parameter_write_failure(self):
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        with mock.patch.object(Cache, 'create_file_from_chunks', return_value=False):
+            with self.assertRaisesRegex(OSError, 'could not write parameters'):
+                model.solve({'n': 3})
+        self.assertEqual(self.calls('solve'), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import subprocess
+import unittest
+from unittest import mock
+from conjure_python import EssenceModel
+from conjure_python.parallel import bound_constraint, partition_constraints, resolve_bound, solve_partitioned
+from tests.conjure_stub import ConjureStubTestCase
+
+MODEL = "given n : int(1..10)\nfind x : int(1..10)\nsuch that x = n"
+
+class TestParallel(unittest.TestCase):
+
+    def test_int_domain(self):
+        self.assertEqual(partition_constraints('x', 'int(1..10)', 3), 
+                         ['such that x >= 1 /\\ x <= 4', 'such that x >= 5 /\\ x <= 7', 'such that x >= 8 /\\ x <= 10'])
+        self.assertEqual(partition_constraints('x', 'int(0..n)', 2, {'n': 3}), 
+                         ['such that x >= 0 /\\ x <= 1', 'such that x >= 2 /\\ x <= 3'])
+        self.assertEqual(len(partition_constraints('x', 'int(1..2)', 5)), 2)
+
+    def test_bool_domain(self):
+        self.assertEqual(partition_constraints('b', 'bool', 4), ['such that b = false', 'such that b = true'])
+
+    def test_unsupported(self):
+        self.assertEqual(resolve_bound('-3', {}), -3)
+        with self.assertRaises(Exception):
+            resolve_bound('n - 1', {'n': 3})
+        with self.assertRaises(Exception):
+            partition_constraints('s', 'set of int(1..3)', 2)
+
+    def test_bound_constraint(self):
+        self.assertEqual(bound_constraint(('minimising', 'cost'), 12), 'such that cost < 12')
+        self.assertEqual(bound_constraint(('maximising', 'profit'), 3), 'such that profit > 3')
+
+class TestSolvePartitioned(ConjureStubTestCase):
+
+    def test_first_cancels_queued_parts(self):
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        solution = solve_partitioned(model, 'x', 3, {'n': 2}, mode='first', max_workers=1)
+        self.assertEqual(solution.raw, [{'x': 2}])
+        # the worker may pick up the second part as the first one finishes, the third one never starts
+        self.assertLess(len(self.calls('solve')), 3)
+
+    def test_workers_default_to_cpu_count(self):
+        from conjure_python import parallel
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        with mock.patch.object(parallel.os, 'cpu_count', return_value=2), \
+                mock.patch.object(parallel, 'ThreadPoolExecutor', wraps=parallel.ThreadPoolExecutor) as executor:
+            solve_partitioned(model, 'x', 3, {'n': 2}, mode='all')
+            model.select_representation([{'n': 1}], portfolio_size=3)
+        self.assertEqual([c.kwargs['max_workers'] for c in executor.call_args_list], [2, 2])
+
+    def test_cancel_before_process_starts(self):
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        model.solve({'n': 1})
+        popen = subprocess.Popen
+        def cancel_then_popen(*args, **kwargs):
+            # the cancellation arrives after the solve started but before its process did
+            model.cancel()
+            return popen(*args, **kwargs)
+        with mock.patch('conjure_python.conjure.subprocess.Popen', cancel_then_popen):
+            with self.assertRaisesRegex(Exception, "solve cancelled"):
+                model.solve({'n': 2})
+        self.assertEqual(model.get_progress()['phase'], 'cancelled')
+        # the next solve starts afresh
+        self.assertEqual(model.solve({'n': 3}).raw, [{'x': 3}])
+
+    def test_cancel_while_preparing(self):
+        from conjure_python import model as model_module
+        model = EssenceModel(MODEL, cache_dir=self.cache_dir)
+        encode = model_module.encode_parameters
+        def cancel_then_encode(*args):
+            # the cancellation arrives before the solve reaches conjure
+            model.cancel()
+            return encode(*args)
+        with mock.patch.object(model_module, 'encode_parameters', cancel_then_encode):
+            with self.assertRaisesRegex(Exception, "solve cancelled"):
+                model.solve({'n': 2})
+        # a cancel once the solve is over does not reach the next one
+        model.cancel()
+        self.assertEqual(model.solve({'n': 3}).raw, [{'x': 3}])
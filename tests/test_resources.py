@@ -0,0 +1,59 @@
+import sys
+import tempfile
+import unittest
+import os
+from conjure_python.conjure import Conjure, MemoryLimitExceeded, aggregate_resources
+from conjure_python.tracing import Tracer
+
+class TestResources(unittest.TestCase):
+
+    def test_aggregate_resources(self):
+        first = {'user_time': 1.0, 'system_time': 0.5, 'max_rss': 1000, 'wall_time': 2.0, 'processes': 3}
+        second = {'user_time': 2.0, 'system_time': 0.25, 'max_rss': 4000, 'wall_time': 1.0, 'processes': 1}
+        total = aggregate_resources([first, None, second])
+        self.assertEqual(total, {'user_time': 3.0, 'system_time': 0.75, 'wall_time': 3.0, 'processes': 4, 'max_rss': 4000})
+        self.assertIsNone(aggregate_resources([None]))
+
+    def test_process_usage(self):
+        tracer = Tracer()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            conjure = Conjure(cache_dir=cache_dir, tracer=tracer)
+            self.assertIsNone(conjure.get_resources())
+            # about 50 MB held while burning some CPU, measured on the reaped child with wait4
+            conjure._Conjure__run_step([sys.executable, '-c', 'data = bytearray(50 * 2 ** 20); sum(range(3 * 10 ** 6))'])
+            with self.assertRaisesRegex(Exception, 'failed step'):
+                conjure._Conjure__run_step([sys.executable, '-c', 'import sys; sys.exit("failed step")'])
+        usage = tracer.spans()[0]['attributes']
+        self.assertGreater(usage['user_time'] + usage['system_time'], 0)
+        self.assertGreater(usage['max_rss'], 50 * 1024)
+        self.assertGreater(usage['wall_time'], 0)
+
+    def test_memory_limit(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            conjure = Conjure(cache_dir=cache_dir)
+            conjure._Conjure__set_limits(200, None)
+            allocate = [sys.executable, '-c', 'data = bytearray(400 * 2 ** 20)']
+            with self.assertRaises(MemoryLimitExceeded) as raised:
+                conjure._Conjure__run_step(allocate)
+            self.assertEqual(raised.exception.memory_limit, 200)
+            # solvers run in a shell, like conjure solve
+            with self.assertRaises(MemoryLimitExceeded):
+                conjure._Conjure__run_solver(allocate)
+            # other failures are still generic errors
+            with self.assertRaises(Exception) as raised:
+                conjure._Conjure__run_step([sys.executable, '-c', 'import sys; sys.exit("failed step")'])
+            self.assertNotIsInstance(raised.exception, MemoryLimitExceeded)
+            conjure._Conjure__set_limits(None, None)
+            conjure._Conjure__run_step(allocate)
+
+    def test_cpu_affinity(self):
+        cpu = min(os.sched_getaffinity(0))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            conjure = Conjure(cache_dir=cache_dir)
+            conjure._Conjure__set_limits(None, [cpu])
+            conjure._Conjure__run_step([sys.executable, '-c', f'import os; assert os.sched_getaffinity(0) == {{{cpu}}}'])
+            with self.assertRaises(Exception):
+                conjure._Conjure__set_limits(None, [max(os.sched_getaffinity(0)) + 4096])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+from conjure_python.selection import RunHistory, Selector, instance_features
+
+class TestSelection(unittest.TestCase):
+
+    def test_features(self):
+        features = instance_features({'n': 4, 'flag': True, 'grid': [[1, 2], [3, 4]], 'f': {'1': 2, '2': 3}, 'kind': 'red'})
+        self.assertEqual(features, {'n': 4.0, 'flag': 1.0, 'grid.size': 4.0, 'f.size': 2.0, 'total_size': 9.0})
+
+    def test_selector(self):
+        minion, kissat = {'solver': None}, {'solver': 'kissat'}
+        runs = []
+        for n in [5, 10, 20]:
+            runs.append({'features': {'n': n}, 'configuration': minion, 'runtime': 0.1 * n, 'status': 'SAT'})
+            runs.append({'features': {'n': n}, 'configuration': kissat, 'runtime': 1.0, 'status': 'SAT'})
+        for n in [1000, 2000]:
+            runs.append({'features': {'n': n}, 'configuration': minion, 'runtime': 60.0, 'status': 'timeout'})
+            runs.append({'features': {'n': n}, 'configuration': kissat, 'runtime': 3.0, 'status': 'SAT'})
+        selector = Selector(runs, neighbours=2)
+        self.assertEqual(selector.select({'n': 6}), minion)
+        self.assertEqual(selector.select({'n': 1500}), kissat)
+        self.assertIsNone(Selector([]).select({'n': 6}))
+
+    def test_history(self):
+        with tempfile.TemporaryDirectory() as directory:
+            history = RunHistory(os.path.join(directory, 'history.jsonl'))
+            self.assertEqual(history.runs(), [])
+            history.record('model-a', {'n': 1.0}, {'solver': 'kissat'}, 0.5, 'SAT')
+            history.record('model-b', {'n': 2.0}, {'solver': None}, 0.7, 'UNSAT', {'SolverNodes': '12'})
+            self.assertEqual(len(history.runs()), 2)
+            self.assertEqual([r['runtime'] for r in history.runs('model-b')], [0.7])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from conjure_python import EssenceSolution, SAT, UNSAT
+
+class TestEssenceSolution(unittest.TestCase):
+
+    def test_convergence(self):
+        raw = [{'cost': 10}, {'cost': 7}, {'cost': 5}]
+        trace = [{'time': 0.5, 'timestamp': 100.5, 'objective': 10},
+                 {'time': 1.5, 'timestamp': 101.5, 'objective': 7},
+                 {'time': 4.0, 'timestamp': 104.0, 'objective': 5}]
+        solution = EssenceSolution(raw, raw, trace=trace)
+        self.assertEqual(solution.state, SAT)
+        self.assertEqual(solution.convergence(), [(0.5, 10), (1.5, 7), (4.0, 5)])
+
+    def test_untimed_trace(self):
+        raw = [{'cost': 10}, {'cost': 7}]
+        solution = EssenceSolution(raw, raw, trace=[{'objective': 10, 'delivered': 0.5}, {'objective': 7, 'delivered': 0.5}])
+        with self.assertRaises(AssertionError):
+            solution.convergence()
+
+    def test_untraced(self):
+        solution = EssenceSolution([], [])
+        self.assertEqual(solution.state, UNSAT)
+        self.assertIsNone(solution.trace)
+        with self.assertRaises(AssertionError):
+            solution.convergence()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from conjure_python import EssenceSolution, UNSAT
+from conjure_python.essence_types import EssenceSet
+from conjure_python.solution_store import SolutionStore, SolutionStoreWriter
+
+class TestSolutionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'solutions.jsonl')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_random_access(self):
+        with SolutionStoreWriter(self.path) as writer:
+            for i in range(100):
+                writer.append({'x': i, 'name': 'é' * i})
+        with SolutionStore(self.path) as store:
+            self.assertEqual(len(store), 100)
+            self.assertEqual(store.get(42), {'x': 42, 'name': 'é' * 42})
+            self.assertEqual(store.get(-1)['x'], 99)
+            self.assertEqual([s['x'] for s in store], list(range(100)))
+            with self.assertRaises(IndexError):
+                store.get(100)
+
+    def test_save_load(self):
+        raw = [{'s': [1, 2], 'n': 3}, {'s': [3], 'n': 4}]
+        domains = {'s': 'set of int(1..3)', 'n': 'int(0..9)'}
+        trace = [{'time': 0.1, 'timestamp': 1.1, 'objective': None}, {'time': 0.2, 'timestamp': 1.2, 'objective': None}]
+        EssenceSolution(raw, raw, trace=trace, domains=domains).save(self.path)
+        solution = EssenceSolution.load(self.path)
+        self.assertEqual(len(solution), 2)
+        self.assertEqual(solution[1]['s'], EssenceSet([3], domains['s']))
+        self.assertEqual(solution.raw[0], raw[0])
+        self.assertEqual(solution.trace, trace)
+        self.assertEqual(len(list(solution)), 2)
+        solution.close()
+
+    def test_empty(self):
+        EssenceSolution([], []).save(self.path)
+        solution = EssenceSolution.load(self.path)
+        self.assertEqual(solution.state, UNSAT)
+        self.assertEqual(str(solution), UNSAT)
+
+    def test_unfinished(self):
+        writer = SolutionStoreWriter(self.path)
+        writer.append({'x': 1})
+        with self.assertRaises(Exception):
+            SolutionStore(self.path)
+        writer.close()
+
+    def test_overwrite_unfinished(self):
+        with SolutionStoreWriter(self.path) as writer:
+            for i in range(100):
+                writer.append({'x': i})
+        writer = SolutionStoreWriter(self.path)
+        writer.append({'x': 1})
+        with self.assertRaises(Exception):
+            SolutionStore(self.path)
+        writer.close()
+        with SolutionStore(self.path) as store:
+            self.assertEqual(len(store), 1)
+
+    def test_failed_writer(self):
+        with self.assertRaises(ValueError):
+            with SolutionStoreWriter(self.path) as writer:
+                writer.append({'x': 1})
+                raise ValueError("solve failed")
+        self.assertFalse(os.path.exists(self.path + '.meta.json'))
+        with self.assertRaises(Exception):
+            SolutionStore(self.path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from conjure_python.conjure import SolutionWatcher, iterate_callback
+
+class TestSolutionWatcher(unittest.TestCase):
+
+    def test_delivers_solutions_while_running(self):
+        with tempfile.TemporaryDirectory() as directory:
+            delivered = []
+            watcher = SolutionWatcher(directory, delivered.append)
+            watcher.start()
+            with open(os.path.join(directory, 'model000001-solution000001.solution.json'), 'w') as f:
+                json.dump({'x': 1}, f)
+            deadline = time.time() + 5
+            while len(delivered) == 0 and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(delivered, [{'x': 1}])
+
+            # a file still being written is retried, and later files wait for it
+            with open(os.path.join(directory, 'model000001-solution000002.solution.json'), 'w') as f:
+                f.write('{"x": ')
+            with open(os.path.join(directory, 'model000001-solution000003.solution.json'), 'w') as f:
+                json.dump({'x': 3}, f)
+            watcher.scan()
+            self.assertEqual(len(delivered), 1)
+            with open(os.path.join(directory, 'model000001-solution000002.solution.json'), 'w') as f:
+                json.dump({'x': 2}, f)
+            watcher.stop()
+            self.assertEqual(delivered, [{'x': 1}, {'x': 2}, {'x': 3}])
+            self.assertEqual(watcher.solutions, delivered)
+
+    def test_missing_directory(self):
+        watcher = SolutionWatcher('/nonexistent/conjure/output', lambda s: None)
+        watcher.scan(final=True)
+        self.assertEqual(watcher.solutions, [])
+
+    def test_iterate_callback(self):
+        def run(on_solution):
+            for i in range(3):
+                on_solution({'x': i})
+        self.assertEqual(list(iterate_callback(run)), [{'x': 0}, {'x': 1}, {'x': 2}])
+
+        def fail(on_solution):
+            on_solution({'x': 0})
+            raise Exception('conjure failed')
+        solutions = iterate_callback(fail)
+        self.assertEqual(next(solutions), {'x': 0})
+        with self.assertRaises(Exception):
+            next(solutions)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from conjure_python.tracing import Tracer, span, submit
+
+class TestTracing(unittest.TestCase):
+
+    def test_nested_spans(self):
+        tracer = Tracer()
+        with tracer.span('solve', solver='minion') as outer:
+            with tracer.span('encode parameters'):
+                pass
+            tracer.add_span('savile row', outer['start'], outer['start'] + 0.5)
+        spans = {s['name']: s for s in tracer.spans()}
+        self.assertEqual(set(spans), {'solve', 'encode parameters', 'savile row'})
+        self.assertIsNone(spans['solve']['parent'])
+        self.assertEqual(spans['encode parameters']['parent'], spans['solve']['id'])
+        self.assertEqual(spans['savile row']['parent'], spans['solve']['id'])
+        self.assertEqual(spans['solve']['attributes'], {'solver': 'minion'})
+        self.assertEqual(spans['solve']['pid'], os.getpid())
+        self.assertEqual(spans['solve']['tid'], threading.get_ident())
+        self.assertGreaterEqual(spans['solve']['end'], spans['encode parameters']['end'])
+
+    def test_errors_and_no_tracer(self):
+        tracer = Tracer()
+        with self.assertRaises(ValueError):
+            with tracer.span('solve'):
+                raise ValueError('missing parameters')
+        self.assertEqual(tracer.spans()[0]['attributes']['error'], 'missing parameters')
+        with span(None, 'solve') as nothing:
+            self.assertIsNone(nothing)
+
+    def test_queued_spans(self):
+        tracer = Tracer()
+        def job(value):
+            with tracer.span('job'):
+                return value * 2
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [submit(executor, tracer, job, i) for i in range(4)]
+            self.assertEqual([f.result() for f in futures], [0, 2, 4, 6])
+        queued = [s for s in tracer.spans() if s['name'] == 'queued']
+        self.assertEqual(len(queued), 4)
+        self.assertTrue(all([s['asynchronous'] for s in queued]))
+        self.assertEqual(len([s for s in tracer.spans() if s['name'] == 'job']), 4)
+
+    def test_exports(self):
+        tracer = Tracer()
+        with tracer.span('solve', instance='a.param'):
+            tracer.add_span('queued', 0.0, 1.0, asynchronous=True)
+        with tempfile.TemporaryDirectory() as directory:
+            tracer.export_chrome(os.path.join(directory, 'trace.json'))
+            tracer.export_otlp(os.path.join(directory, 'otlp.json'))
+            with open(os.path.join(directory, 'trace.json')) as f:
+                chrome = json.load(f)
+            with open(os.path.join(directory, 'otlp.json')) as f:
+                otlp = json.load(f)
+        phases = sorted([e['ph'] for e in chrome['traceEvents']])
+        self.assertEqual(phases, ['M', 'X', 'b', 'e'])
+        complete = [e for e in chrome['traceEvents'] if e['ph'] == 'X'][0]
+        self.assertEqual(complete['args'], {'instance': 'a.param'})
+        spans = otlp['resourceSpans'][0]['scopeSpans'][0]['spans']
+        self.assertEqual(len(spans), 2)
+        by_name = {s['name']: s for s in spans}
+        self.assertEqual(by_name['queued']['parentSpanId'], by_name['solve']['spanId'])
+        self.assertEqual(len(by_name['solve']['traceId']), 32)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from conjure_python import EssenceModel
+from conjure_python.tuning import autotune, configurations, load_profile, save_profile, score
+from tests.conjure_stub import ConjureStubTestCase
+
+class TestTuning(unittest.TestCase):
+
+    def test_configurations(self):
+        space = {'solver': ['minion', 'kissat'], 'savilerow_options': ['-O0', '-O2', '-O3']}
+        configs = configurations(space)
+        self.assertEqual(len(configs), 6)
+        self.assertIn({'solver': 'kissat', 'savilerow_options': '-O2'}, configs)
+        with self.assertRaises(Exception):
+            configurations({'heuristic': ['sdf']})
+
+    def test_score(self):
+        runtimes = [1.0, 2.0, 3.0, 10.0]
+        self.assertEqual(score(runtimes), 4.0)
+        self.assertEqual(score(runtimes, 'median'), 2.5)
+        self.assertEqual(score(runtimes, 'max'), 10.0)
+        self.assertEqual(score(runtimes, 'p50'), 2.0)
+        self.assertEqual(score(runtimes, 'p90'), 10.0)
+        with self.assertRaises(Exception):
+            score(runtimes, 'p0')
+
+    def test_profiles(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            save_profile('fast', {'solver': 'kissat', 'threads': None}, profile_dir)
+            self.assertEqual(load_profile('fast', profile_dir), {'solver': 'kissat', 'threads': None})
+            with self.assertRaises(Exception):
+                load_profile('slow', profile_dir)
+
+class TestAutotune(ConjureStubTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.model = EssenceModel("given n : int(1..10)\nfind x : int(1..10)\nsuch that x = n", cache_dir=self.cache_dir)
+
+    def test_failed_solves_are_penalised(self):
+        with mock.patch.dict(os.environ, {'CONJURE_STUB_FAIL': 'solver crashed'}):
+            result = autotune(self.model, [{'n': 1}, {'n': 2}], {'solver': ['minion']}, time_limit=5, max_workers=2)
+        self.assertEqual(result['results'][0]['runtimes'], [50, 50])
+
+    def test_invalid_configuration_is_raised(self):
+        with self.assertRaisesRegex(Exception, "thread configuration not available"):
+            autotune(self.model, [{'n': 1}], {'solver': ['minion'], 'threads': [2]}, time_limit=5)
+
+    def test_runs_default_to_cpu_count(self):
+        from conjure_python import tuning
+        with mock.patch.object(tuning.os, 'cpu_count', return_value=3), \
+                mock.patch.object(tuning, 'ThreadPoolExecutor', wraps=tuning.ThreadPoolExecutor) as executor:
+            autotune(self.model, [{'n': 1}], {'solver': ['minion']}, time_limit=5)
+        self.assertEqual(executor.call_args.kwargs['max_workers'], 3)
+
+if __name__ == "__main__":
+    unittest.main()